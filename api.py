@@ -0,0 +1,221 @@
+"""
+Read-only JSON API for standings, schedule, results and post-lock picks
+
+A small stdlib HTTP service that runs alongside app.py and shares database.py,
+so bots and scripts can poll standings without opening a Streamlit session.
+Requests authenticate with a login session token (the same token the app's
+cookie holds, verified in-process; see session_tokens.py):
+
+    Authorization: Bearer <session_token>
+
+Responses carry an ETag and Last-Modified derived from the data epochs of the
+domains they read (see database.get_data_versions), so a poller that sends
+If-None-Match / If-Modified-Since gets a 304 without any query beyond the
+epoch lookup.
+
+Endpoints:
+    GET /api/leaderboard[?limit=N&method=competition|dense]
+    GET /api/races
+    GET /api/races/<id>/results
+    GET /api/races/<id>/picks        (from race day on)
+    GET /api/races/<id>/ownership    (picks per driver, from race day on)
+
+Usage:
+    python api.py [--host 0.0.0.0] [--port 8502]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import database as db
+import frame_cache
+
+DEFAULT_PORT = int(os.environ.get('API_PORT', 8502))
+
+# Largest leaderboard page a client can ask for
+MAX_LEADERBOARD_LIMIT = 1000
+
+
+class ApiError(Exception):
+    """An error response: HTTP status plus a message for the JSON body"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _dicts(rows):
+    """Row types are namedtuples, which json would encode as lists"""
+    return [dict(row) for row in rows]
+
+
+def _race(race_id: str):
+    race = db.get_race_by_id(int(race_id))
+    if not race:
+        raise ApiError(404, "Race not found")
+    return race
+
+
+def leaderboard(query: Dict) -> Dict:
+    try:
+        limit = min(int(query.get('limit', [100])[0]), MAX_LEADERBOARD_LIMIT)
+    except ValueError:
+        raise ApiError(400, "limit must be a number")
+    method = query.get('method', ['competition'])[0]
+    if method not in db.RANK_FUNCTIONS:
+        raise ApiError(400, f"method must be one of: {', '.join(db.RANK_FUNCTIONS)}")
+    return {'leaderboard': db.get_leaderboard_top(limit, method)}
+
+
+def races(query: Dict) -> Dict:
+    return {'races': _dicts(db.get_all_races())}
+
+
+def race_results(query: Dict, race_id: str) -> Dict:
+    race = _race(race_id)
+    return {'race': dict(race), 'results': _dicts(db.get_race_results(race['id']))}
+
+
+def race_picks(query: Dict, race_id: str) -> Dict:
+    race = _race(race_id)
+    if not db.picks_visible(race):
+        raise ApiError(403, "Picks for this race are hidden until race day")
+    return {'race': dict(race), 'picks': _dicts(db.get_all_picks_for_race(race['id']))}
+
+
+def race_ownership(query: Dict, race_id: str) -> Dict:
+    race = _race(race_id)
+    if not db.picks_visible(race):
+        raise ApiError(403, "Picks for this race are hidden until race day")
+    return {'race': dict(race), 'ownership': _dicts(db.get_pick_counts(race['id']))}
+
+
+# (path pattern, handler, domains the response depends on)
+ROUTES = [
+    (re.compile(r'^/api/leaderboard$'), leaderboard, ('users', 'picks', 'results')),
+    (re.compile(r'^/api/races$'), races, ('races',)),
+    (re.compile(r'^/api/races/(\d+)/results$'), race_results, ('races', 'results')),
+    (re.compile(r'^/api/races/(\d+)/picks$'), race_picks, ('races', 'picks', 'results', 'users')),
+    (re.compile(r'^/api/races/(\d+)/ownership$'), race_ownership, ('races', 'picks')),
+]
+
+
+def validators(path: str, domains, versions: Dict) -> tuple:
+    """ETag and Last-Modified for a response built from these domains' current versions"""
+    epochs = ','.join(f"{d}:{versions[d]['epoch']}" for d in domains if d in versions)
+    etag = '"' + hashlib.sha1(f"{path}|{epochs}".encode()).hexdigest()[:20] + '"'
+
+    changed = [versions[d]['updated_at'] for d in domains if d in versions and versions[d]['updated_at']]
+    # updated_at is a TIMESTAMPTZ, so this converts to UTC rather than relabelling
+    last_modified = max(changed).astimezone(timezone.utc).replace(microsecond=0) if changed else None
+    return etag, last_modified
+
+
+def not_modified(headers, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether the client's conditional headers match the current version"""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since and last_modified:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "NascarContestAPI/1.0"
+
+    def do_GET(self):
+        try:
+            self._handle()
+        except ApiError as e:
+            self._send_json(e.status, {'error': e.message})
+        except Exception as e:
+            print(f"Error handling {self.path}: {e}")
+            self._send_json(500, {'error': "Internal server error"})
+
+    def _handle(self):
+        url = urlparse(self.path)
+        for pattern, handler, domains in ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            raise ApiError(404, "Not found")
+
+        self._authenticate()
+
+        versions = db.get_data_versions()
+        # Drop coalesced reads cached before these epochs, or a new ETag could carry an old body
+        frame_cache.observe({domain: version['epoch'] for domain, version in versions.items()})
+        etag, last_modified = validators(url.path + '?' + url.query, domains, versions)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if last_modified:
+            headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+
+        if not_modified(self.headers, etag, last_modified):
+            self._send(304, b'', headers)
+            return
+
+        body = handler(parse_qs(url.query), *match.groups())
+        self._send_json(200, body, headers)
+
+    def _authenticate(self):
+        auth = self.headers.get('Authorization', '')
+        scheme, _, token = auth.partition(' ')
+        if scheme.lower() != 'bearer' or not db.verify_session(token.strip()):
+            raise ApiError(401, "Missing or invalid session token")
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = json.dumps(body, default=_json_default).encode('utf-8')
+        self._send(status, payload, dict(headers or {}, **{'Content-Type': 'application/json'}))
+
+    def _send(self, status: int, payload: bytes, headers: Dict):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status == 401:
+            self.send_header('WWW-Authenticate', 'Bearer')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API for standings, schedule, results and picks")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    db.init_db()
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"✓ API listening on http://{args.host}:{args.port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Rerun benchmark: per-page rerun time before and after multipage routing
+
+Before the router, every rerun ran the top-level bootstrap (init_db, the
+admin check and session cleanup) and then the active page. Now the bootstrap
+is cached per process and a rerun runs only the active page. This script
+times the old bootstrap directly and each page through streamlit's AppTest,
+against the database in DATABASE_URL or .streamlit/secrets.toml.
+
+The cookie manager is a browser component that AppTest can't render, so pages
+are run directly with a logged-in user in session state.
+
+Usage:
+    python benchmarks/bench_reruns.py --username admin --password admin123
+    python benchmarks/bench_reruns.py leaderboard chat --runs 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db  # noqa: E402
+import views  # noqa: E402
+
+PAGE_SCRIPT = """
+import views
+views._run({name!r})
+"""
+
+
+def timed(fn, runs):
+    """Median and max milliseconds of fn() over runs calls"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def legacy_bootstrap():
+    """What the old app.py ran at the top of every rerun"""
+    db.init_db()
+    db.verify_user("admin", "admin123")
+    db.cleanup_expired_sessions()
+
+
+def page_rerun(name, user):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_string(PAGE_SCRIPT.format(name=name), default_timeout=60)
+    app.session_state['user'] = user
+    app.run()  # first run imports the page and warms caches
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return app.run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pages', nargs='*', help="Pages to time (default: all but login)")
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    user = db.verify_user(args.username, args.password)
+    if not user:
+        parser.error("could not log in with --username/--password")
+
+    pages = args.pages or [name for name in views.PAGES if name != 'login']
+    bootstrap_ms, _ = timed(legacy_bootstrap, args.runs)
+    print(f"old per-rerun bootstrap: {bootstrap_ms:.1f} ms (now cached once per process)\n")
+    print(f"{'page':<14} {'before':>10} {'after':>10} {'after max':>10}")
+    for name in pages:
+        try:
+            median, worst = timed(page_rerun(name, user), args.runs)
+        except RuntimeError as e:
+            print(f"{name:<14} failed: {e}")
+            continue
+        print(f"{name:<14} {bootstrap_ms + median:>8.1f}ms {median:>8.1f}ms {worst:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Rescore benchmark: full-season scoring pass
+
+Builds a synthetic season (36 races of 40 drivers with raw finish, stage and
+fastest-lap data, one pick per user per race) and times
+scoring.compute_scores, checking it against a plain Python loop. No database
+is needed; only the compute side of rescore_season is timed. Most of the
+vectorized time is turning the fetched rows into arrays, so the two are close
+in memory; the saving is on the write side, where a rescore is one UPDATE
+per table instead of one per driver per race.
+
+Usage:
+    python benchmarks/bench_rescore.py
+    python benchmarks/bench_rescore.py --users 10000 --runs 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scoring  # noqa: E402
+
+RACES = 36
+DRIVERS = 40
+
+
+def synthetic_season(users, seed=36):
+    """(results, picks) integer tuples shaped like database.get_scoring_inputs()"""
+    rng = random.Random(seed)
+    drivers = list(range(DRIVERS))
+    results = []
+    for race_id in range(1, RACES + 1):
+        order = rng.sample(drivers, DRIVERS)
+        stage1 = {d: i + 1 for i, d in enumerate(rng.sample(drivers, DRIVERS))}
+        stage2 = {d: i + 1 for i, d in enumerate(rng.sample(drivers, DRIVERS))}
+        fastest = rng.choice(drivers)
+        for finish, driver in enumerate(order, start=1):
+            results.append((len(results) + 1, race_id, driver, finish, stage1[driver], stage2[driver],
+                            int(driver == fastest), 0, 1))
+    picks = []
+    for _ in range(users):
+        for race_id, driver in enumerate(rng.sample(drivers, RACES), start=1):
+            picks.append((len(picks) + 1, race_id, driver, 0))
+    return results, picks
+
+
+def row_by_row(rules, results, picks):
+    """One dict lookup per pick"""
+    finish_table, stage_table = rules['finish_points'], rules['stage_points']
+
+    def table(t, position):
+        return t[position - 1] if position and position <= len(t) else 0
+
+    earned = {}
+    for _, race_id, driver, finish, stage1, stage2, fastest, _, _ in results:
+        points = (table(finish_table, finish) + table(stage_table, stage1) + table(stage_table, stage2)
+                  + fastest * rules['fastest_lap_points'])
+        earned[(race_id, driver)] = round(points * (rules['win_multiplier'] if finish == 1 else 1))
+    return [earned.get((race_id, driver), 0) for _, race_id, driver, _ in picks]
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    rules = scoring.merge_rules({'win_multiplier': 1.5})
+    results, picks = synthetic_season(args.users)
+
+    _, (pick_ids, pick_points) = scoring.compute_scores(rules, results, picks)
+    expected = row_by_row(rules, results, picks)
+    assert dict(zip(pick_ids, pick_points)) == {p[0]: e for p, e in zip(picks, expected) if e}, "scores differ"
+
+    print(f"{args.users:,} users x {RACES} races = {len(picks):,} picks")
+    print(f"python loop: {timed(lambda: row_by_row(rules, results, picks), args.runs):>8.1f} ms")
+    print(f"vectorized:  {timed(lambda: scoring.compute_scores(rules, results, picks), args.runs):>8.1f} ms")
+    print(f"write back:  2 bulk UPDATEs (was {RACES * DRIVERS:,} per-driver UPDATEs across the season)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Memory benchmark: dict rows vs compact row types for a 100k-pick table
+
+Compares the old read path (RealDictCursor rows copied into dicts) with the
+compact models.PickDetail rows, both materialized as a list and streamed.
+
+Usage:
+    python benchmarks/bench_row_memory.py              # synthetic rows, no database needed
+    python benchmarks/bench_row_memory.py --database   # real picks from a temp table in DATABASE_URL
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+
+ROWS = 100_000
+COLUMNS = models.PickDetail._fields
+
+
+def synthetic_tuples(n):
+    created = datetime(2026, 2, 15, 12, 0)
+    for i in range(n):
+        race = i % 36 + 1
+        yield (i, i // 36, race, f"Driver {i % 40}", i % 60, created,
+               f"Race {race}", '2026-02-15', 1, race)
+
+
+def measure(label, build):
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label:<42} retained {current / 1e6:8.1f} MB   peak {peak / 1e6:8.1f} MB")
+
+
+def run_synthetic(n):
+    def dict_rows():
+        # What fetchall() on a RealDictCursor followed by dict(row) holds at its peak
+        fetched = [dict(zip(COLUMNS, t)) for t in synthetic_tuples(n)]
+        return [dict(row) for row in fetched]
+
+    def compact_list():
+        return [models.PickDetail._make(t) for t in synthetic_tuples(n)]
+
+    def compact_stream():
+        total = 0
+        for row in (models.PickDetail._make(t) for t in synthetic_tuples(n)):
+            total += row.points
+        return total
+
+    measure("dict rows (fetchall + dict copy)", dict_rows)
+    measure("compact rows, list", compact_list)
+    measure("compact rows, streamed", compact_stream)
+
+
+def run_database(n):
+    import database as db
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute('DROP TABLE IF EXISTS bench_picks')
+    cursor.execute('''
+        CREATE TABLE bench_picks AS
+        SELECT g AS id, g / 36 AS user_id, g % 36 + 1 AS race_id,
+               'Driver ' || (g % 40) AS driver_name, g % 60 AS points, NOW() AS created_at,
+               'Race ' || (g % 36 + 1) AS race_name, '2026-02-15'::text AS race_date,
+               1 AS is_completed, g % 36 + 1 AS race_number
+        FROM generate_series(1, %s) g
+    ''', (n,))
+    conn.commit()
+    query = f"SELECT {', '.join(COLUMNS)} FROM bench_picks ORDER BY id"
+
+    try:
+        def dict_rows():
+            c = db.get_connection()
+            cur = c.cursor()
+            cur.execute(query)
+            rows = [dict(row) for row in cur.fetchall()]
+            c.close()
+            return rows
+
+        def compact_list():
+            return list(db.stream_rows(query, row_type=models.PickDetail))
+
+        def compact_stream():
+            return sum(row.points for row in db.stream_rows(query, row_type=models.PickDetail, batch_size=2000))
+
+        measure("dict rows (RealDictCursor + dict copy)", dict_rows)
+        measure("compact rows, list", compact_list)
+        measure("compact rows, server-side stream", compact_stream)
+    finally:
+        cursor.execute('DROP TABLE IF EXISTS bench_picks')
+        conn.commit()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=ROWS)
+    parser.add_argument('--database', action='store_true', help="Benchmark against DATABASE_URL")
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} pick rows")
+    if args.database:
+        run_database(args.rows)
+    else:
+        run_synthetic(args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Scarcity benchmark: field-wide driver availability and projected ownership
+
+Builds synthetic used-driver masks (40 drivers, each user halfway through the
+season) and times the array side of scarcity.build_scarcity: unpacking the
+masks into a users x drivers matrix and projecting ownership at the next
+races. Checks the matrix against one driver_masks.has call per user and
+driver, which is what a get_used_drivers call per user amounts to. No
+database is needed.
+
+Usage:
+    python benchmarks/bench_scarcity.py
+    python benchmarks/bench_scarcity.py --users 50000 --runs 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+import driver_masks  # noqa: E402
+import scarcity  # noqa: E402
+
+DRIVERS = 40
+USED = 18
+
+
+def synthetic_masks(users, seed=40):
+    """(masks, hidden) shaped like database.get_all_driver_masks(), driver ids 1..DRIVERS"""
+    rng = random.Random(seed)
+    ids = list(range(1, DRIVERS + 1))
+    masks, hidden = [], []
+    for _ in range(users):
+        used = rng.sample(ids, USED)
+        masks.append(driver_masks.to_bytes(driver_masks.of(used)))
+        hidden.append(used[:1] if rng.random() < 0.5 else [])
+    return masks, hidden
+
+
+def per_user(masks, hidden, ids):
+    """One bit test per user per driver"""
+    return [[driver_id in h or not driver_masks.has(driver_masks.from_bytes(mask), driver_id) for driver_id in ids]
+            for mask, h in zip(masks, hidden)]
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    masks, hidden = synthetic_masks(args.users)
+    ids = list(range(1, DRIVERS + 1))
+    expected = np.random.default_rng(40).uniform(5, 45, size=(DRIVERS, scarcity.UPCOMING_RACES))
+
+    available = scarcity.driver_columns(masks, hidden, ids)
+    assert available.tolist() == per_user(masks, hidden, ids), "availability differs"
+
+    def vectorized():
+        scarcity.project_ownership(scarcity.driver_columns(masks, hidden, ids), expected)
+
+    print(f"{args.users:,} users x {DRIVERS} drivers, {scarcity.UPCOMING_RACES} races projected")
+    print(f"per user:   {timed(lambda: per_user(masks, hidden, ids), args.runs):>8.1f} ms (availability only)")
+    print(f"vectorized: {timed(vectorized, args.runs):>8.1f} ms (availability and projection)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Startup benchmark: module import time for the app and the CLI tools
+
+Each target is imported in a fresh interpreter under `python -X importtime`.
+The script reports the total import time, the slowest top-level imports, and
+whether any heavy dependency (pandas, psycopg2, streamlit, numpy) was loaded
+that the target shouldn't need at startup.
+
+For the app it imports the modules app.py imports at module level, since
+importing app.py itself would render the page.
+
+Usage:
+    python benchmarks/bench_startup.py                 # every target, 5 runs each
+    python benchmarks/bench_startup.py app database --runs 10
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'psycopg2', 'streamlit', 'numpy', 'pyarrow', 'altair']
+
+# Target name -> modules imported at startup
+CLI_TARGETS = {
+    'database': ['database'],
+    'initialize_db': ['initialize_db'],
+    'import_entrants': ['import_entrants'],
+    'exports': ['exports'],
+}
+
+
+def app_imports():
+    """Modules app.py imports at module level"""
+    with open(os.path.join(ROOT, 'app.py')) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def import_times(modules):
+    """Import modules in a fresh interpreter; returns {top-level module: cumulative microseconds}"""
+    code = '; '.join(f"import {m}" for m in modules) or 'pass'
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented; keep the outermost package of each import
+        if not name[1:].startswith(' '):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def run(target, modules, runs, baseline):
+    totals = []
+    for _ in range(runs):
+        # Leave out what the interpreter imports before running any code
+        times = {name: micros for name, micros in import_times(modules).items() if name not in baseline}
+        totals.append(sum(times.values()))
+
+    loaded = {name.split('.')[0] for name in times}
+    heavy = [m for m in HEAVY_MODULES if m in loaded]
+    slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:5]
+
+    print(f"{target:<16} first {totals[0] / 1000:8.1f} ms   "
+          f"median {statistics.median(totals) / 1000:8.1f} ms   "
+          f"heavy: {', '.join(heavy) or 'none'}")
+    for name, micros in slowest:
+        print(f"    {name:<32} {micros / 1000:8.1f} ms")
+
+
+def main():
+    targets = dict(app=app_imports(), **CLI_TARGETS)
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('targets', nargs='*', help=f"Targets to measure: {', '.join(targets)} (default: all)")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    unknown = set(args.targets) - set(targets)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    baseline = set(import_times([]))
+    for target in args.targets or list(targets):
+        try:
+            run(target, targets[target], args.runs, baseline)
+        except RuntimeError as e:
+            print(f"{target:<16} failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,128 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import hashlib
+import functools
 import os
+import sys
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-import streamlit as st
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+import models
+import routing
+from routing import read_only, set_current_user
+from singleflight import coalesced, invalidate_all
+import write_behind
+
+# Where Streamlit looks for secrets; read directly when Streamlit isn't loaded (CLI tools)
+SECRETS_PATHS = (
+    os.path.join('.streamlit', 'secrets.toml'),
+    os.path.join(os.path.expanduser('~'), '.streamlit', 'secrets.toml'),
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _file_secrets() -> Dict:
+    """[database] section of the first secrets.toml found, without importing streamlit"""
+    try:
+        import tomllib
+    except ImportError:
+        return {}
+    for path in SECRETS_PATHS:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return tomllib.load(f).get('database', {})
+    return {}
+
+
+def get_database_settings() -> Dict:
+    """Get database settings (primary DSN, replicas, lag threshold) from Streamlit secrets or environment"""
+    # Only use st.secrets when the app already loaded streamlit; CLI tools shouldn't pay for it
+    st = sys.modules.get('streamlit')
+    if st is not None and hasattr(st, 'secrets') and 'database' in st.secrets:
+        return dict(st.secrets['database'])
+    if st is None and _file_secrets():
+        return dict(_file_secrets())
+    return {
+        'connection_string': os.environ.get('DATABASE_URL', ''),
+        'replicas': [dsn for dsn in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if dsn.strip()],
+        'max_replica_lag_seconds': float(os.environ.get('DATABASE_MAX_REPLICA_LAG', routing.DEFAULT_MAX_LAG_SECONDS)),
+    }
 
 def get_connection_string():
     """Get database connection string from Streamlit secrets or environment"""
-    if hasattr(st, 'secrets') and 'database' in st.secrets:
-        return st.secrets['database']['connection_string']
-    return os.environ.get('DATABASE_URL', '')
+    return get_database_settings().get('connection_string', '')
 
 def get_connection():
-    """Get database connection"""
-    conn = psycopg2.connect(get_connection_string(), cursor_factory=RealDictCursor)
+    """Get database connection (on a replica inside @read_only functions, see routing.py)"""
+    # The driver is imported on first connection, not when the module loads
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+    
+    conn = psycopg2.connect(routing.choose_dsn(get_database_settings()), cursor_factory=RealDictCursor)
     return conn
 
 
+# Column list shared by every read that returns models.Race rows
+RACE_COLUMNS = 'id, race_number, race_name, race_date, track, is_completed, created_at'
+
+# Domains with a data epoch; pages cache frames until the epochs they read change
+EPOCH_DOMAINS = ('races', 'picks', 'results', 'users', 'chat')
+
+# pick_events.source codes: the index into this tuple
+PICK_SOURCES = ('manual', 'auto')
+
+
+def stream_rows(query: str, params: Optional[tuple] = None, row_type=None,
+                batch_size: Optional[int] = None) -> Iterator[tuple]:
+    """Lazily yield compact rows (see models.py) for a query.
+    
+    Rows are built straight from the driver's tuples instead of dicts. With a
+    batch_size the query runs through a named server-side cursor, so only that
+    many rows are held client-side at a time. Without a row_type, a row class
+    is derived from the result's column names.
+    """
+    # Route now, while the caller's read-only context is active; the generator
+    # body only runs once iteration starts
+    dsn = routing.choose_dsn(get_database_settings())
+    return _stream_rows(dsn, query, params, row_type, batch_size)
+
+
+def _stream_rows(dsn: str, query: str, params: Optional[tuple], row_type, batch_size: Optional[int]):
+    import uuid
+    import psycopg2
+    from psycopg2.extensions import cursor as tuple_cursor
+    
+    conn = psycopg2.connect(dsn)
+    try:
+        if batch_size:
+            cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=tuple_cursor)
+            cursor.itersize = batch_size
+        else:
+            cursor = conn.cursor(cursor_factory=tuple_cursor)
+        cursor.execute(query, params)
+        
+        make = None
+        while True:
+            rows = cursor.fetchmany(batch_size or 1000)
+            if not rows:
+                break
+            if make is None:
+                # Named cursors only describe their columns after the first fetch
+                make = (row_type or models.row_type_for(col[0] for col in cursor.description))._make
+            for row in rows:
+                yield make(row)
+        cursor.close()
+    finally:
+        conn.close()
+
+
+@read_only
+def iter_query(query: str, params: Optional[tuple] = None, batch_size: int = 1000) -> Iterator[tuple]:
+    """Stream rows of a query through a named server-side cursor.
+    
+    Only batch_size rows are held client-side at a time, so memory stays flat
+    no matter how large the result is.
+    """
+    return stream_rows(query, params, batch_size=batch_size)
+
+
 def init_db():
     """Initialize database with all required tables"""
     conn = get_connection()
@@ -101,39 +206,468 @@ def init_db():
         )
     ''')
     
+    # Driver x track performance index, maintained by enter_race_results
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS driver_track_index (
+            track TEXT NOT NULL,
+            driver_name TEXT NOT NULL,
+            starts INTEGER NOT NULL,
+            avg_points REAL NOT NULL,
+            best_finish INTEGER NOT NULL,
+            recency_score REAL NOT NULL,
+            last_race_date TEXT,
+            PRIMARY KEY (track, driver_name)
+        )
+    ''')
+    
+    # Admin user listing: prefix search and paid/unpaid filtering
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_username_prefix
+        ON users (lower(username) text_pattern_ops)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_paid ON users (paid, username)')
+    
+    # Standings as of each completed race, written by enter_race_results.
+    # correct_race_results adjusts it in place; no-pick penalty changes only
+    # reach it through a full rescore (apply_scores rebuilds every race)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS standings_history (
+            race_number INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            race_id INTEGER NOT NULL,
+            total_points INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            PRIMARY KEY (race_number, user_id),
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (race_id) REFERENCES races(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_standings_history_user
+        ON standings_history (user_id, race_number)
+    ''')
+    
+    # Raw race data the scoring rules work from; raw_scored = 0 marks results
+    # entered as a total, whose points are kept as entered
+    cursor.execute('''
+        ALTER TABLE results
+            ADD COLUMN IF NOT EXISTS stage1_position INTEGER,
+            ADD COLUMN IF NOT EXISTS stage2_position INTEGER,
+            ADD COLUMN IF NOT EXISTS fastest_lap INTEGER DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS raw_scored INTEGER DEFAULT 0
+    ''')
+    
+    # Scoring rules (JSON, see scoring.py); the newest row is in effect
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scoring_rules (
+            id SERIAL PRIMARY KEY,
+            rules TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Points added to a user's total outside of picks, e.g. no-pick penalties
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS score_adjustments (
+            user_id INTEGER NOT NULL,
+            race_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            PRIMARY KEY (user_id, race_id, reason),
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (race_id) REFERENCES races(id)
+        )
+    ''')
+    
+    # Signed session tokens: logouts until the token would expire anyway, and
+    # per-user cutoffs (password changes) for tokens issued before them
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            jti TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            revoked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at ON revoked_tokens (revoked_at)')
+    cursor.execute('ALTER TABLE users ADD COLUMN IF NOT EXISTS tokens_valid_after TIMESTAMPTZ')
+    # Revocation times come from the database clock, which the revocation sync
+    # is keyed on; they were plain TIMESTAMPs written from Python at first
+    for table, column in (('revoked_tokens', 'revoked_at'), ('users', 'tokens_valid_after')):
+        cursor.execute('''
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = %s AND column_name = %s
+        ''', (table, column))
+        if cursor.fetchone()['data_type'] == 'timestamp without time zone':
+            cursor.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE TIMESTAMPTZ')
+    cursor.execute('ALTER TABLE revoked_tokens ALTER COLUMN revoked_at SET DEFAULT NOW()')
+    
+    # Process-wide settings kept in the database, e.g. a generated session_secret
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS app_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+    
+    # Drivers by compact id, for logs that store a smallint instead of the name.
+    # Only missing names are inserted: a conflicting INSERT still takes a
+    # sequence value, and ids (and driver masks) would grow on every start
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS drivers (
+            id SMALLSERIAL PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO drivers (name)
+        SELECT names.driver_name
+        FROM (SELECT driver_name FROM picks UNION SELECT driver_name FROM results) names
+        WHERE NOT EXISTS (SELECT 1 FROM drivers d WHERE d.name = names.driver_name)
+        ON CONFLICT (name) DO NOTHING
+    ''')
+    
+    # Append-only history of every pick write, partitioned by year (see PICK_SOURCES)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pick_events (
+            event_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            user_id INTEGER NOT NULL,
+            race_id INTEGER NOT NULL,
+            driver_id SMALLINT NOT NULL,
+            source SMALLINT NOT NULL
+        ) PARTITION BY RANGE (event_at)
+    ''')
+    # race_id was a SMALLINT at first; races.id is a SERIAL
+    cursor.execute('''
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'pick_events' AND column_name = 'race_id'
+    ''')
+    if cursor.fetchone()['data_type'] == 'smallint':
+        cursor.execute('ALTER TABLE pick_events ALTER COLUMN race_id TYPE INTEGER')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pick_events_user ON pick_events (user_id, event_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pick_events_race ON pick_events (race_id, event_at)')
+    _create_pick_events_partitions(cursor)
+    cursor.execute('CREATE TABLE IF NOT EXISTS pick_events_default PARTITION OF pick_events DEFAULT')
+    
+    # Each user's used drivers as a bitmask by drivers.id (see driver_masks.py),
+    # kept in step with picks by make_pick
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_driver_masks (
+            user_id INTEGER PRIMARY KEY,
+            used BYTEA NOT NULL DEFAULT ''::bytea,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+    # Live pick count per driver for each race, kept by make_pick, so
+    # ownership reads are one row per driver however many entrants there are
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pick_counts (
+            race_id INTEGER NOT NULL,
+            driver_id SMALLINT NOT NULL,
+            picks INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (race_id, driver_id),
+            FOREIGN KEY (race_id) REFERENCES races(id),
+            FOREIGN KEY (driver_id) REFERENCES drivers(id)
+        )
+    ''')
+    
+    # set_bit only works inside the value, so grow it with zero bytes first;
+    # a NULL bit leaves the mask unchanged
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION driver_mask_set(mask BYTEA, bit INTEGER, value INTEGER) RETURNS BYTEA AS $$
+            SELECT CASE WHEN bit IS NULL THEN mask ELSE set_bit(
+                COALESCE(mask, ''::bytea)
+                    || decode(repeat('00', GREATEST(0, bit / 8 + 1 - length(COALESCE(mask, ''::bytea)))), 'hex'),
+                bit, value
+            ) END
+        $$ LANGUAGE sql IMMUTABLE
+    ''')
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION driver_mask_has(mask BYTEA, bit INTEGER) RETURNS BOOLEAN AS $$
+            SELECT COALESCE(bit / 8 < length(mask) AND get_bit(mask, bit) = 1, FALSE)
+        $$ LANGUAGE sql IMMUTABLE
+    ''')
+    
+    # Data epochs: one counter per domain, bumped in the same transaction as every write
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_epochs (
+            domain TEXT PRIMARY KEY,
+            epoch BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    ''')
+    # updated_at was a plain TIMESTAMP in the session's local time at first;
+    # converting it reads the old values in that same time zone
+    cursor.execute('''
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'data_epochs' AND column_name = 'updated_at'
+    ''')
+    if cursor.fetchone()['data_type'] == 'timestamp without time zone':
+        cursor.execute('ALTER TABLE data_epochs ALTER COLUMN updated_at TYPE TIMESTAMPTZ')
+    cursor.execute(
+        'INSERT INTO data_epochs (domain) SELECT unnest(%s::text[]) ON CONFLICT DO NOTHING',
+        (list(EPOCH_DOMAINS),)
+    )
+    
+    # Backfill the index and snapshots once for databases that already have results
+    cursor.execute('SELECT 1 FROM driver_track_index LIMIT 1')
+    if cursor.fetchone() is None:
+        _refresh_track_index(cursor)
+    
+    _backfill_driver_masks(cursor)
+    
+    cursor.execute('SELECT 1 FROM pick_counts LIMIT 1')
+    if cursor.fetchone() is None:
+        cursor.execute('''
+            INSERT INTO pick_counts (race_id, driver_id, picks)
+            SELECT p.race_id, d.id, COUNT(*)
+            FROM picks p
+            JOIN users u ON u.id = p.user_id
+            JOIN drivers d ON d.name = p.driver_name
+            WHERE u.is_admin = 0
+            GROUP BY p.race_id, d.id
+        ''')
+    
+    cursor.execute('SELECT 1 FROM standings_history LIMIT 1')
+    if cursor.fetchone() is None:
+        cursor.execute('SELECT id FROM races WHERE is_completed = 1 ORDER BY race_number')
+        for race in cursor.fetchall():
+            _write_standings_snapshot(cursor, race['id'])
+    
     conn.commit()
     conn.close()
 
 
-def hash_password(password: str) -> str:
-    """Hash password using SHA256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+def _backfill_driver_masks(cursor):
+    """Build used-driver masks from picks for users who have picks but no mask row"""
+    import driver_masks
+    
+    cursor.execute('''
+        SELECT p.user_id, array_agg(d.id) AS driver_ids
+        FROM picks p
+        JOIN drivers d ON d.name = p.driver_name
+        WHERE NOT EXISTS (SELECT 1 FROM user_driver_masks m WHERE m.user_id = p.user_id)
+        GROUP BY p.user_id
+    ''')
+    rows = cursor.fetchall()
+    if rows:
+        cursor.execute('''
+            INSERT INTO user_driver_masks (user_id, used)
+            SELECT * FROM unnest(%s::int[], %s::bytea[])
+        ''', ([row['user_id'] for row in rows],
+              [driver_masks.to_bytes(driver_masks.of(row['driver_ids'])) for row in rows]))
 
 
-def create_session(user_id: int) -> str:
-    """Create a new session token for a user"""
-    import secrets
-    from datetime import timedelta
+def _create_pick_events_partition(cursor, year: int):
+    """Create the pick_events partition for one calendar year, if it is missing.
     
-    session_token = secrets.token_urlsafe(32)
-    expires_at = datetime.now() + timedelta(days=30)  # 30 day expiration
+    Postgres won't add a partition while the default partition holds rows in
+    its range, so the default is detached, its rows for that year moved into
+    the new partition, and reattached.
+    """
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL AS found', (f'pick_events_{year}',))
+    if cursor.fetchone()['found']:
+        return
     
+    cursor.execute("SELECT to_regclass('pick_events_default') IS NOT NULL AS found")
+    has_default = cursor.fetchone()['found']
+    if has_default:
+        cursor.execute('ALTER TABLE pick_events DETACH PARTITION pick_events_default')
+    cursor.execute(f'''
+        CREATE TABLE pick_events_{year} PARTITION OF pick_events
+        FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+    ''')
+    if has_default:
+        cursor.execute('''
+            WITH moved AS (
+                DELETE FROM pick_events_default
+                WHERE event_at >= make_date(%s, 1, 1) AND event_at < make_date(%s, 1, 1)
+                RETURNING *
+            )
+            INSERT INTO pick_events SELECT * FROM moved
+        ''', (year, year + 1))
+        cursor.execute('ALTER TABLE pick_events ATTACH PARTITION pick_events_default DEFAULT')
+
+
+def _create_pick_events_partitions(cursor):
+    """Make sure this year's and next year's pick_events partitions exist"""
+    year = datetime.now().year
+    for partition_year in (year, year + 1):
+        _create_pick_events_partition(cursor, partition_year)
+
+
+def ensure_pick_events_partitions():
+    """Create upcoming pick_events partitions ahead of time, so events never pile up in the default partition"""
     conn = get_connection()
     cursor = conn.cursor()
+    _create_pick_events_partitions(cursor)
+    conn.commit()
+    conn.close()
+
+
+def _bump_epoch(cursor, *domains: str):
+    """Advance the data epoch of each domain; call inside the writing transaction"""
+    cursor.execute(
+        'UPDATE data_epochs SET epoch = epoch + 1, updated_at = NOW() WHERE domain = ANY(%s)',
+        (list(domains),)
+    )
+
+
+@read_only
+def get_epochs() -> Dict[str, int]:
+    """Get the current data epoch of every domain"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT domain, epoch FROM data_epochs')
+    epochs = {row['domain']: row['epoch'] for row in cursor.fetchall()}
+    conn.close()
+    return epochs
+
+
+@read_only
+def get_data_versions() -> Dict[str, Dict]:
+    """Get each domain's epoch and when it last changed: {domain: {epoch, updated_at}}"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT domain, epoch, updated_at FROM data_epochs')
+    versions = {row['domain']: {'epoch': row['epoch'], 'updated_at': row['updated_at']} for row in cursor.fetchall()}
+    conn.close()
+    return versions
+
+
+# Each older start at a track counts this much less than the next newer one
+TRACK_RECENCY_DECAY = 0.7
+
+
+def _refresh_track_index(cursor, track: Optional[str] = None):
+    """Rebuild driver_track_index rows for one track (or every track) from results.
+
+    Runs on the caller's cursor so it commits with the results it summarizes.
+    """
+    if track is None:
+        cursor.execute('DELETE FROM driver_track_index')
+    else:
+        cursor.execute('DELETE FROM driver_track_index WHERE track = %s', (track,))
+    
+    cursor.execute('''
+        INSERT INTO driver_track_index
+            (track, driver_name, starts, avg_points, best_finish, recency_score, last_race_date)
+        SELECT
+            track,
+            driver_name,
+            COUNT(*),
+            AVG(points),
+            MIN(finish_position),
+            SUM(points * weight) / SUM(weight),
+            MAX(race_date)
+        FROM (
+            SELECT
+                r.track,
+                res.driver_name,
+                r.race_date,
+                res.finish_position,
+                res.points,
+                POWER(%s, ROW_NUMBER() OVER (
+                    PARTITION BY r.track, res.driver_name ORDER BY r.race_date DESC
+                ) - 1) AS weight
+            FROM results res
+            JOIN races r ON res.race_id = r.id
+            WHERE %s IS NULL OR r.track = %s
+        ) history
+        GROUP BY track, driver_name
+    ''', (TRACK_RECENCY_DECAY, track, track))
+
+
+def _write_standings_snapshot(cursor, race_id: int):
+    """Store every user's cumulative points and rank as of a completed race.
     
-    # Delete old sessions for this user
-    cursor.execute('DELETE FROM sessions WHERE user_id = %s', (user_id,))
+    Counts picks and score adjustments from completed races up to and
+    including this one, as they stand now: penalties given or changed later
+    only show up here when the snapshot is rewritten, e.g. by a full rescore.
+    Runs on the caller's cursor so the snapshot commits with the results.
+    """
+    cursor.execute('DELETE FROM standings_history WHERE race_id = %s', (race_id,))
+    cursor.execute('''
+        INSERT INTO standings_history (race_number, user_id, race_id, total_points, rank)
+        SELECT
+            cur.race_number,
+            totals.user_id,
+            cur.id,
+            totals.total_points,
+            RANK() OVER (ORDER BY totals.total_points DESC)
+        FROM races cur
+        CROSS JOIN (
+            SELECT u.id AS user_id, COALESCE(SUM(p.points), 0) + COALESCE((
+                SELECT SUM(a.points) FROM score_adjustments a
+                WHERE a.user_id = u.id AND a.race_id IN (
+                    SELECT r.id FROM races r
+                    WHERE r.is_completed = 1
+                    AND r.race_number <= (SELECT race_number FROM races WHERE id = %s)
+                )
+            ), 0) AS total_points
+            FROM users u
+            LEFT JOIN picks p ON p.user_id = u.id AND p.race_id IN (
+                SELECT r.id FROM races r
+                WHERE r.is_completed = 1
+                AND r.race_number <= (SELECT race_number FROM races WHERE id = %s)
+            )
+            WHERE u.is_admin = 0
+            GROUP BY u.id
+        ) totals
+        WHERE cur.id = %s
+    ''', (race_id, race_id, race_id))
+
+
+def hash_password(password: str) -> str:
+    """Hash password using SHA256"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def _write_chat_messages(cursor, rows: List[tuple]):
+    """Write-behind batch of (user_id, username, message, created_at)"""
+    cursor.execute('''
+        INSERT INTO chat_messages (user_id, username, message, created_at)
+        SELECT * FROM unnest(%s::int[], %s::text[], %s::text[], %s::timestamp[])
+    ''', tuple(list(column) for column in zip(*rows)))
+    _bump_epoch(cursor, 'chat')
+
+
+write_behind.register('chat', _write_chat_messages)
+
+
+@functools.lru_cache(maxsize=1)
+def _session_secret() -> bytes:
+    """Key that signs session tokens: session_secret setting, SESSION_SECRET, or one generated and stored once"""
+    secret = get_database_settings().get('session_secret') or os.environ.get('SESSION_SECRET')
+    if secret:
+        return secret.encode('utf-8')
     
-    # Create new session
+    # Shared by every process on this database (app and api.py)
+    import secrets
+    conn = get_connection()
+    cursor = conn.cursor()
     cursor.execute(
-        'INSERT INTO sessions (user_id, session_token, expires_at) VALUES (%s, %s, %s)',
-        (user_id, session_token, expires_at)
+        "INSERT INTO app_settings (key, value) VALUES ('session_secret', %s) ON CONFLICT (key) DO NOTHING",
+        (secrets.token_urlsafe(48),)
     )
-    
+    cursor.execute("SELECT value FROM app_settings WHERE key = 'session_secret'")
+    secret = cursor.fetchone()['value']
     conn.commit()
     conn.close()
+    return secret.encode('utf-8')
+
+
+def create_session(user_id: int) -> str:
+    """Create a signed session token for a user (see session_tokens.py); nothing is stored"""
+    import session_tokens
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, username, email, is_admin FROM users WHERE id = %s', (user_id,))
+    user = cursor.fetchone()
+    conn.close()
     
-    return session_token
+    return session_tokens.issue(_session_secret(), user)
 
 
 def verify_session(session_token: str) -> Optional[Dict]:
@@ -141,6 +675,12 @@ def verify_session(session_token: str) -> Optional[Dict]:
     if not session_token:
         return None
     
+    # Signed tokens are checked in-process, against the synced revocation list
+    import session_tokens
+    if session_tokens.is_signed(session_token):
+        return session_tokens.verify(_session_secret(), session_token)
+    
+    # Tokens issued before signed sessions are still looked up in the sessions table
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -161,45 +701,126 @@ def verify_session(session_token: str) -> Optional[Dict]:
 
 def delete_session(session_token: str):
     """Delete a session (logout)"""
+    import session_tokens
+    
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM sessions WHERE session_token = %s', (session_token,))
+    
+    claims = session_tokens.decode(_session_secret(), session_token)
+    if claims:
+        expires_at = datetime.fromtimestamp(claims['exp'])
+        cursor.execute('''
+            INSERT INTO revoked_tokens (jti, user_id, expires_at)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (jti) DO NOTHING
+        ''', (claims['jti'], claims['id'], expires_at))
+        session_tokens.revoked_locally(claims['jti'], expires_at)
+    else:
+        cursor.execute('DELETE FROM sessions WHERE session_token = %s', (session_token,))
+    
     conn.commit()
     conn.close()
 
 
-def cleanup_expired_sessions():
-    """Remove expired sessions from database"""
+def change_password(user_id: int, current_password: str, new_password: str) -> Tuple[bool, str]:
+    """Change a user's password and sign out all of their sessions. Returns (success, message)"""
+    import session_tokens
+    
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE users SET password_hash = %s, tokens_valid_after = NOW()
+            WHERE id = %s AND password_hash = %s
+            RETURNING tokens_valid_after
+        ''', (hash_password(new_password), user_id, hash_password(current_password)))
+        row = cursor.fetchone()
+        if row is None:
+            conn.close()
+            return False, "Current password is incorrect"
+        cursor.execute('DELETE FROM sessions WHERE user_id = %s', (user_id,))
+        conn.commit()
+        conn.close()
+        
+        session_tokens.user_revoked_locally(user_id, row['tokens_valid_after'])
+        return True, "Password changed. Please log in again."
+    except Exception as e:
+        print(f"Error changing password: {e}")
+        return False, "Error changing password"
+
+
+def get_token_revocations(since: Optional[datetime] = None) -> Tuple[Dict[str, tuple], Dict[int, datetime], datetime]:
+    """Revocations recorded since a database time (or all unexpired ones).
+    
+    Returns ({jti: (expires_at, revoked_at)}, {user_id: tokens_valid_after},
+    read_at), where read_at is the database's NOW() for the next call's since.
+    Reads the primary, so a logout is never missed because of replica lag.
+    """
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM sessions WHERE expires_at < NOW()')
-    conn.commit()
+    cursor.execute('SELECT NOW() AS read_at')
+    read_at = cursor.fetchone()['read_at']
+    cursor.execute('''
+        SELECT jti, expires_at, revoked_at FROM revoked_tokens
+        WHERE expires_at > NOW() AND (%s::timestamptz IS NULL OR revoked_at > %s)
+    ''', (since, since))
+    revoked = {row['jti']: (row['expires_at'], row['revoked_at']) for row in cursor.fetchall()}
+    cursor.execute('''
+        SELECT id, tokens_valid_after FROM users
+        WHERE tokens_valid_after IS NOT NULL AND (%s::timestamptz IS NULL OR tokens_valid_after > %s)
+    ''', (since, since))
+    valid_after = {row['id']: row['tokens_valid_after'] for row in cursor.fetchall()}
     conn.close()
+    return revoked, valid_after, read_at
 
 
-def save_chat_message(user_id: int, username: str, message: str) -> None:
-    """Save a chat message"""
+def is_token_revoked(jti: str) -> bool:
+    """Exact check for one token id (used when the revocation Bloom filter matches)"""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute(
-        'INSERT INTO chat_messages (user_id, username, message) VALUES (%s, %s, %s)',
-        (user_id, username, message)
-    )
-    conn.commit()
+    cursor.execute('SELECT 1 FROM revoked_tokens WHERE jti = %s', (jti,))
+    revoked = cursor.fetchone() is not None
     conn.close()
+    return revoked
 
 
-def get_chat_messages(limit: int = 100) -> List[Dict]:
-    """Get recent chat messages"""
+def cleanup_expired_sessions():
+    """Remove expired sessions, and revocations of tokens that have expired anyway"""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute(
+    cursor.execute('DELETE FROM sessions WHERE expires_at < NOW()')
+    cursor.execute('DELETE FROM revoked_tokens WHERE expires_at < NOW()')
+    conn.commit()
+    conn.close()
+
+
+def save_chat_message(user_id: int, username: str, message: str) -> None:
+    """Save a chat message (written behind; shown by get_chat_messages right away)"""
+    write_behind.submit('chat', (user_id, username, message, datetime.now()))
+
+
+@read_only
+def iter_chat_messages(limit: int = 100) -> Iterator[models.ChatMessage]:
+    """Stream recent chat messages, newest first"""
+    return stream_rows(
         'SELECT username, message, created_at FROM chat_messages ORDER BY created_at DESC LIMIT %s',
-        (limit,)
+        (limit,), models.ChatMessage
     )
-    messages = cursor.fetchall()
-    conn.close()
-    return list(reversed(messages)) if messages else []
+
+
+@read_only
+def get_chat_messages(limit: int = 100) -> List[models.ChatMessage]:
+    """Get recent chat messages, including ones still queued for writing"""
+    messages = list(iter_chat_messages(limit))
+    messages.reverse()
+    
+    queued = [models.ChatMessage(username, message, created_at)
+              for _, username, message, created_at in write_behind.pending('chat')]
+    if queued:
+        # Drop queued messages whose batch committed after the query ran
+        stored = set(messages)
+        messages = sorted(messages + [m for m in queued if m not in stored], key=lambda m: m.created_at)[-limit:]
+    return messages
 
 
 def create_user(username: str, password: str, email: str, is_admin: bool = False) -> bool:
@@ -212,6 +833,7 @@ def create_user(username: str, password: str, email: str, is_admin: bool = False
             'INSERT INTO users (username, password_hash, email, is_admin) VALUES (%s, %s, %s, %s)',
             (username, password_hash, email, 1 if is_admin else 0)
         )
+        _bump_epoch(cursor, 'users')
         conn.commit()
         conn.close()
         return True
@@ -220,6 +842,102 @@ def create_user(username: str, password: str, email: str, is_admin: bool = False
         return False
 
 
+def bulk_import_users(entrants: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """Create many users at once via COPY into a staging table and one merge.
+
+    Each entrant is {row, username, email, paid, password_hash}; `row` is the
+    caller's row number used in the report. Rows whose username or email
+    already exists, or repeats an earlier row in the same batch, are skipped.
+    Returns (created, conflicts): created is [{row, id, username}] and
+    conflicts is [{row, username, email, reason}].
+    """
+    import csv
+    import io
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for entrant in entrants:
+        writer.writerow([entrant['row'], entrant['username'], entrant['email'],
+                         1 if entrant['paid'] else 0, entrant['password_hash']])
+    buffer.seek(0)
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            CREATE TEMP TABLE entrant_staging (
+                row_num INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                email TEXT NOT NULL,
+                paid INTEGER NOT NULL,
+                password_hash TEXT NOT NULL,
+                conflict TEXT
+            ) ON COMMIT DROP
+        ''')
+        cursor.copy_expert(
+            'COPY entrant_staging (row_num, username, email, paid, password_hash) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+        
+        # Flag every conflict in one pass: existing accounts first, then repeats within the file
+        cursor.execute('''
+            UPDATE entrant_staging s
+            SET conflict = CASE
+                WHEN EXISTS (SELECT 1 FROM users u WHERE u.username = s.username) THEN 'duplicate username'
+                WHEN EXISTS (SELECT 1 FROM users u WHERE u.email = s.email) THEN 'duplicate email'
+                WHEN s.row_num > first.first_username_row THEN 'duplicate username in file'
+                WHEN s.row_num > first.first_email_row THEN 'duplicate email in file'
+            END
+            FROM (
+                SELECT
+                    row_num,
+                    MIN(row_num) OVER (PARTITION BY username) AS first_username_row,
+                    MIN(row_num) OVER (PARTITION BY email) AS first_email_row
+                FROM entrant_staging
+            ) first
+            WHERE first.row_num = s.row_num
+        ''')
+        
+        cursor.execute('''
+            WITH created AS (
+                INSERT INTO users (username, password_hash, email, paid)
+                SELECT username, password_hash, email, paid
+                FROM entrant_staging
+                WHERE conflict IS NULL
+                ORDER BY row_num
+                ON CONFLICT DO NOTHING
+                RETURNING id, username
+            )
+            SELECT s.row_num AS row, c.id, s.username
+            FROM created c
+            JOIN entrant_staging s ON s.username = c.username
+            ORDER BY s.row_num
+        ''')
+        created = [dict(row) for row in cursor.fetchall()]
+        
+        cursor.execute('''
+            SELECT row_num AS row, username, email, conflict AS reason
+            FROM entrant_staging
+            WHERE conflict IS NOT NULL
+        ''')
+        conflicts = [dict(row) for row in cursor.fetchall()]
+        
+        # Clean rows that ON CONFLICT still skipped lost a race with a live signup
+        flagged = {c['row'] for c in conflicts} | {c['row'] for c in created}
+        for entrant in entrants:
+            if entrant['row'] not in flagged:
+                conflicts.append({'row': entrant['row'], 'username': entrant['username'],
+                                  'email': entrant['email'], 'reason': 'created by another signup during import'})
+        conflicts.sort(key=lambda c: c['row'])
+        
+        if created:
+            _bump_epoch(cursor, 'users')
+        conn.commit()
+        return created, conflicts
+    finally:
+        conn.close()
+
+
 def verify_user(username: str, password: str) -> Optional[Dict]:
     """Verify user credentials and return user data"""
     conn = get_connection()
@@ -237,36 +955,53 @@ def verify_user(username: str, password: str) -> Optional[Dict]:
     return None
 
 
-def get_all_races() -> List[Dict]:
+@read_only
+def iter_races(batch_size: Optional[int] = None) -> Iterator[models.Race]:
+    """Stream all races ordered by race number"""
+    return stream_rows(f'SELECT {RACE_COLUMNS} FROM races ORDER BY race_number',
+                       row_type=models.Race, batch_size=batch_size)
+
+
+@read_only
+def get_all_races() -> List[models.Race]:
     """Get all races ordered by race number"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM races ORDER BY race_number')
-    races = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return races
+    return list(iter_races())
 
 
-def get_next_race() -> Optional[Dict]:
+@read_only
+def get_next_race() -> Optional[models.Race]:
     """Get the next incomplete race"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'SELECT * FROM races WHERE is_completed = 0 ORDER BY race_number LIMIT 1'
-    )
-    race = cursor.fetchone()
-    conn.close()
-    return dict(race) if race else None
+    return next(stream_rows(
+        f'SELECT {RACE_COLUMNS} FROM races WHERE is_completed = 0 ORDER BY race_number LIMIT 1',
+        row_type=models.Race
+    ), None)
 
 
-def get_race_by_id(race_id: int) -> Optional[Dict]:
+@read_only
+def get_race_by_id(race_id: int) -> Optional[models.Race]:
     """Get race by ID"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM races WHERE id = %s', (race_id,))
-    race = cursor.fetchone()
-    conn.close()
-    return dict(race) if race else None
+    return next(stream_rows(f'SELECT {RACE_COLUMNS} FROM races WHERE id = %s', (race_id,), models.Race), None)
+
+
+def picks_visible(race) -> bool:
+    """Whether everyone's picks for a race can be shown: from race day on, or once completed"""
+    if race['is_completed']:
+        return True
+    try:
+        return datetime.now().date() >= datetime.strptime(race['race_date'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        # If date parsing fails, show the race
+        return True
+
+
+def picks_locked(race, at: Optional[datetime] = None) -> bool:
+    """Whether manual picks for a race were closed at a time (default now): from midnight on race day"""
+    if race['is_completed']:
+        return True
+    try:
+        return (at or datetime.now()).date() >= datetime.strptime(race['race_date'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return False
 
 
 def create_race(race_number: int, race_name: str, race_date: str, track: str) -> bool:
@@ -278,6 +1013,7 @@ def create_race(race_number: int, race_name: str, race_date: str, track: str) ->
             'INSERT INTO races (race_number, race_name, race_date, track) VALUES (%s, %s, %s, %s)',
             (race_number, race_name, race_date, track)
         )
+        _bump_epoch(cursor, 'races')
         conn.commit()
         conn.close()
         return True
@@ -286,203 +1022,1061 @@ def create_race(race_number: int, race_name: str, race_date: str, track: str) ->
         return False
 
 
-def make_pick(user_id: int, race_id: int, driver_name: str) -> Tuple[bool, str]:
-    """Make a pick for a race. Returns (success, message)"""
+def make_pick(user_id: int, race_id: int, driver_name: str, source: str = 'manual',
+              submitted_at: Optional[datetime] = None) -> Tuple[bool, str]:
+    """Make a pick for a race. Returns (success, message)
+    
+    source ('manual' or 'auto') is recorded with the pick in pick_events.
+    submitted_at (default now) is when the user submitted it: manual picks are
+    checked against the race-day lock as of then, and it is the logged time.
+    """
+    submitted_at = submitted_at or datetime.now()
+    
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Check if driver has already been used by this user
-    cursor.execute('''
-        SELECT COUNT(*) as count FROM picks 
-        WHERE user_id = %s AND driver_name = %s
-    ''', (user_id, driver_name))
-    
-    result = cursor.fetchone()
-    count = result['count']
-    if count > 0:
+    # One pick write per user at a time, so the previous pick read below is
+    # still current when the masks and counts are updated from it
+    cursor.execute('SELECT is_admin FROM users WHERE id = %s FOR NO KEY UPDATE', (user_id,))
+    user = cursor.fetchone()
+    if not user:
         conn.close()
-        return False, f"You have already used {driver_name} in a previous race!"
+        return False, "User not found"
     
-    # Check if race is still open
-    cursor.execute('SELECT is_completed FROM races WHERE id = %s', (race_id,))
+    # Check the race is still open and the driver unused by this user (one bit
+    # of their mask, no picks scan) in one query, which also gets the driver's id
+    cursor.execute('''
+        SELECT r.is_completed, r.race_date, d.id AS driver_id,
+               driver_mask_has((SELECT used FROM user_driver_masks WHERE user_id = %s), d.id) AS driver_used
+        FROM races r
+        LEFT JOIN drivers d ON d.name = %s
+        WHERE r.id = %s
+    ''', (user_id, driver_name, race_id))
     race = cursor.fetchone()
     if not race:
         conn.close()
         return False, "Race not found"
     
+    if race['driver_used']:
+        conn.close()
+        return False, f"You have already used {driver_name} in a previous race!"
+    
     if race['is_completed']:
         conn.close()
         return False, "This race is already completed"
     
-    # Make the pick (INSERT or UPDATE)
+    if source == 'manual' and picks_locked(race, submitted_at):
+        conn.close()
+        return False, "Picks for this race locked at midnight on race day"
+    
+    # Make the pick (INSERT or UPDATE), update the user's driver mask and the
+    # race's pick counts, log it and advance the picks epoch, all in one
+    # statement. Only a driver nobody has picked before costs an extra round
+    # trip, to add it to drivers. A changed pick frees the old driver's bit and
+    # moves one count from the old driver to the new one; both count rows are
+    # written in driver id order so two users swapping drivers can't deadlock.
+    # Admins' picks aren't counted
     try:
+        driver_id = race['driver_id'] if race['driver_id'] is not None else _add_driver(cursor, driver_name)
         cursor.execute('''
-            INSERT INTO picks (user_id, race_id, driver_name)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (user_id, race_id) 
-            DO UPDATE SET driver_name = EXCLUDED.driver_name
-        ''', (user_id, race_id, driver_name))
+            WITH previous AS (
+                SELECT d.id FROM picks p JOIN drivers d ON d.name = p.driver_name
+                WHERE p.user_id = %(user_id)s AND p.race_id = %(race_id)s
+            ), mask AS (
+                INSERT INTO user_driver_masks (user_id, used)
+                VALUES (%(user_id)s, driver_mask_set(NULL, %(driver_id)s, 1))
+                ON CONFLICT (user_id) DO UPDATE SET used = driver_mask_set(
+                    driver_mask_set(user_driver_masks.used, (SELECT id FROM previous), 0),
+                    %(driver_id)s, 1
+                )
+            ), counted AS (
+                INSERT INTO pick_counts (race_id, driver_id, picks)
+                SELECT %(race_id)s, change.driver_id, change.delta
+                FROM (VALUES (%(driver_id)s, 1),
+                             ((SELECT id FROM previous), -1)) AS change (driver_id, delta)
+                WHERE %(counted)s AND change.driver_id IS NOT NULL
+                  AND (SELECT id FROM previous) IS DISTINCT FROM %(driver_id)s
+                ORDER BY change.driver_id
+                ON CONFLICT (race_id, driver_id) DO UPDATE SET picks = pick_counts.picks + EXCLUDED.picks
+            ), pick AS (
+                INSERT INTO picks (user_id, race_id, driver_name)
+                VALUES (%(user_id)s, %(race_id)s, %(driver)s)
+                ON CONFLICT (user_id, race_id) 
+                DO UPDATE SET driver_name = EXCLUDED.driver_name
+                RETURNING user_id, race_id
+            ), epoch AS (
+                UPDATE data_epochs SET epoch = epoch + 1, updated_at = NOW() WHERE domain = 'picks'
+            )
+            INSERT INTO pick_events (event_at, user_id, race_id, driver_id, source)
+            SELECT %(submitted_at)s, pick.user_id, pick.race_id, %(driver_id)s, %(source)s
+            FROM pick
+        ''', {'user_id': user_id, 'race_id': race_id, 'driver': driver_name,
+              'source': PICK_SOURCES.index(source), 'submitted_at': submitted_at,
+              'driver_id': driver_id, 'counted': not user['is_admin']})
         conn.commit()
         conn.close()
+        _invalidate_pick_reads()
         return True, "Pick saved successfully!"
     except Exception as e:
         conn.close()
         return False, f"Error saving pick: {str(e)}"
 
 
-def get_user_picks(user_id: int) -> List[Dict]:
-    """Get all picks for a user"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT p.*, r.race_name, r.race_date, r.is_completed, r.race_number
+def _add_driver(cursor, name: str) -> int:
+    """Add a driver that wasn't in drivers when the caller looked, returning its id.
+    
+    Only call it for a name that was just looked up and missing: an INSERT
+    takes a value from the id sequence even when it conflicts.
+    """
+    cursor.execute('INSERT INTO drivers (name) VALUES (%s) ON CONFLICT (name) DO NOTHING RETURNING id', (name,))
+    row = cursor.fetchone()
+    if row is None:
+        # Another session added it first; its insert has committed by now
+        cursor.execute('SELECT id FROM drivers WHERE name = %s', (name,))
+        row = cursor.fetchone()
+    return row['id']
+
+
+def _iter_pick_events(where: str, params: tuple, batch_size: Optional[int]) -> Iterator[models.PickEvent]:
+    return stream_rows(f'''
+        SELECT e.event_at, u.username, r.race_number, r.race_name, d.name AS driver_name,
+               (%s::text[])[e.source + 1] AS source
+        FROM pick_events e
+        JOIN users u ON u.id = e.user_id
+        JOIN races r ON r.id = e.race_id
+        JOIN drivers d ON d.id = e.driver_id
+        WHERE {where}
+        ORDER BY e.event_at, r.race_number
+    ''', (list(PICK_SOURCES),) + params, models.PickEvent, batch_size)
+
+
+@read_only
+def iter_user_pick_history(user_id: int, batch_size: Optional[int] = None) -> Iterator[models.PickEvent]:
+    """Stream every pick a user has made or been assigned, oldest first"""
+    return _iter_pick_events('e.user_id = %s', (user_id,), batch_size)
+
+
+@read_only
+def iter_race_pick_history(race_id: int, batch_size: Optional[int] = None) -> Iterator[models.PickEvent]:
+    """Stream every pick made or assigned for a race, oldest first"""
+    return _iter_pick_events('e.race_id = %s', (race_id,), batch_size)
+
+
+@read_only
+def iter_user_picks(user_id: int, batch_size: Optional[int] = None) -> Iterator[models.PickDetail]:
+    """Stream a user's picks with their race details"""
+    return stream_rows('''
+        SELECT p.id, p.user_id, p.race_id, p.driver_name, p.points, p.created_at,
+               r.race_name, r.race_date, r.is_completed, r.race_number
         FROM picks p
         JOIN races r ON p.race_id = r.id
         WHERE p.user_id = %s
         ORDER BY r.race_number
-    ''', (user_id,))
-    picks = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return picks
+    ''', (user_id,), models.PickDetail, batch_size)
+
+
+@read_only
+def get_user_picks(user_id: int) -> List[models.PickDetail]:
+    """Get all picks for a user"""
+    return list(iter_user_picks(user_id))
 
 
-def get_user_pick_for_race(user_id: int, race_id: int) -> Optional[Dict]:
+@read_only
+def get_user_pick_for_race(user_id: int, race_id: int) -> Optional[models.Pick]:
     """Get user's pick for a specific race"""
+    return next(stream_rows(
+        'SELECT id, user_id, race_id, driver_name, points, created_at FROM picks WHERE user_id = %s AND race_id = %s',
+        (user_id, race_id), models.Pick
+    ), None)
+
+
+_driver_ids: Dict[str, int] = {}
+
+
+@read_only
+def _load_driver_ids() -> Dict[str, int]:
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute(
-        'SELECT * FROM picks WHERE user_id = %s AND race_id = %s',
-        (user_id, race_id)
-    )
-    pick = cursor.fetchone()
+    cursor.execute('SELECT id, name FROM drivers')
+    ids = {row['name']: row['id'] for row in cursor.fetchall()}
+    conn.close()
+    return ids
+
+
+def get_driver_ids(names: Iterable[str] = (), refresh: bool = False) -> Dict[str, int]:
+    """drivers.id by name, cached in-process; reloaded when asked for a name it hasn't seen"""
+    global _driver_ids
+    if refresh or not _driver_ids or any(name not in _driver_ids for name in names):
+        _driver_ids = _load_driver_ids()
+    return _driver_ids
+
+
+def driver_names_for(mask: int) -> List[str]:
+    """Names of the drivers set in a mask"""
+    import driver_masks
+    
+    ids = driver_masks.ids(mask)
+    names = {driver_id: name for name, driver_id in get_driver_ids().items()}
+    if any(driver_id not in names for driver_id in ids):
+        names = {driver_id: name for name, driver_id in get_driver_ids(refresh=True).items()}
+    return [names[driver_id] for driver_id in ids if driver_id in names]
+
+
+@read_only
+def get_used_driver_masks(user_ids: List[int]) -> Dict[int, int]:
+    """Used-driver masks (see driver_masks.py) for these users, in one indexed lookup"""
+    import driver_masks
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT user_id, used FROM user_driver_masks WHERE user_id = ANY(%s)', (list(user_ids),))
+    masks = {row['user_id']: driver_masks.from_bytes(row['used']) for row in cursor.fetchall()}
     conn.close()
-    return dict(pick) if pick else None
+    return {user_id: masks.get(user_id, 0) for user_id in user_ids}
+
+
+def get_used_driver_mask(user_id: int) -> int:
+    """A user's used drivers as a bitmask by drivers.id"""
+    return get_used_driver_masks([user_id])[user_id]
 
 
 def get_used_drivers(user_id: int) -> List[str]:
     """Get list of drivers already used by a user"""
+    return driver_names_for(get_used_driver_mask(user_id))
+
+
+@read_only
+def get_all_driver_masks(hide_after: Optional[str] = None) -> List[Tuple[int, bytes, List[int]]]:
+    """Every non-admin user's used-driver mask in one query, as (user_id, used, hidden driver ids).
+    
+    With hide_after (a YYYY-MM-DD date), hidden lists the drivers.id of each
+    user's picks for uncompleted races after that date, whose bits are set in
+    the mask but which aren't visible to other players yet.
+    """
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute(
-        'SELECT driver_name FROM picks WHERE user_id = %s',
-        (user_id,)
-    )
-    drivers = [row['driver_name'] for row in cursor.fetchall()]
+    cursor.execute('''
+        SELECT u.id, COALESCE(m.used, ''::bytea) AS used, COALESCE(h.driver_ids, '{}') AS hidden
+        FROM users u
+        LEFT JOIN user_driver_masks m ON m.user_id = u.id
+        LEFT JOIN (
+            SELECT p.user_id, array_agg(d.id) AS driver_ids
+            FROM picks p
+            JOIN races r ON r.id = p.race_id
+            JOIN drivers d ON d.name = p.driver_name
+            WHERE %(hide_after)s::text IS NOT NULL AND r.is_completed = 0 AND r.race_date > %(hide_after)s
+            GROUP BY p.user_id
+        ) h ON h.user_id = u.id
+        WHERE u.is_admin = 0
+        ORDER BY u.id
+    ''', {'hide_after': hide_after})
+    rows = [(row['id'], bytes(row['used']), row['hidden']) for row in cursor.fetchall()]
     conn.close()
-    return drivers
+    return rows
+
+
+@read_only
+def get_completed_picks() -> List[tuple]:
+    """Get every non-admin user's picks for completed races (user_id, driver_name)"""
+    return list(stream_rows('''
+        SELECT p.user_id, p.driver_name
+        FROM picks p
+        JOIN races r ON p.race_id = r.id
+        JOIN users u ON p.user_id = u.id
+        WHERE r.is_completed = 1 AND u.is_admin = 0
+    '''))
+
+
+@read_only
+def get_driver_usage() -> List[tuple]:
+    """Get how often each driver has been picked in completed races, and the points they scored"""
+    return list(stream_rows('''
+        SELECT p.driver_name, COUNT(*) AS picks, COALESCE(SUM(p.points), 0) AS points
+        FROM picks p
+        JOIN races r ON p.race_id = r.id
+        JOIN users u ON p.user_id = u.id
+        WHERE r.is_completed = 1 AND u.is_admin = 0
+        GROUP BY p.driver_name
+        ORDER BY picks DESC, p.driver_name
+    '''))
+
+
+@read_only
+def get_track_history() -> List[tuple]:
+    """Get all stored results joined to their race's track"""
+    return list(stream_rows('''
+        SELECT res.driver_name, r.track, r.race_number, r.race_date, res.finish_position, res.points
+        FROM results res
+        JOIN races r ON res.race_id = r.id
+        ORDER BY r.race_date
+    '''))
+
+
+@read_only
+def get_track_index(track: str) -> Dict[str, Dict]:
+    """Get the performance index for a track, keyed by driver name"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT driver_name, starts, avg_points, best_finish, recency_score, last_race_date
+        FROM driver_track_index
+        WHERE track = %s
+        ORDER BY recency_score DESC
+    ''', (track,))
+    index = {row['driver_name']: dict(row) for row in cursor.fetchall()}
+    conn.close()
+    return index
+
+
+def _scoring_rules(cursor) -> Dict:
+    """Rules in effect (stored JSON merged over scoring.DEFAULT_RULES)"""
+    import json
+    import scoring
+    
+    cursor.execute('SELECT rules FROM scoring_rules ORDER BY id DESC LIMIT 1')
+    row = cursor.fetchone()
+    return scoring.merge_rules(json.loads(row['rules']) if row else {})
+
+
+@read_only
+def get_scoring_rules() -> Dict:
+    """Get the scoring rules in effect"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    rules = _scoring_rules(cursor)
+    conn.close()
+    return rules
+
+
+def save_scoring_rules(rules: Dict) -> bool:
+    """Store a new rule set; run scoring.rescore_season() to apply it (and its no-pick penalty) to past races and standings history"""
+    import json
+    
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute('INSERT INTO scoring_rules (rules) VALUES (%s)', (json.dumps(rules),))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Error saving scoring rules: {e}")
+        return False
+
+
+def _write_no_pick_penalties(cursor, penalty: int, race_id: Optional[int] = None) -> int:
+    """Replace no-pick penalties for one completed race (or all of them). Returns how many were given."""
+    # race_id NULL means every race
+    cursor.execute('''
+        DELETE FROM score_adjustments
+        WHERE reason = 'no_pick' AND (%s::int IS NULL OR race_id = %s)
+    ''', (race_id, race_id))
+    if not penalty:
+        return 0
+    cursor.execute('''
+        INSERT INTO score_adjustments (user_id, race_id, reason, points)
+        SELECT u.id, r.id, 'no_pick', %s
+        FROM users u
+        CROSS JOIN races r
+        WHERE u.is_admin = 0 AND r.is_completed = 1
+        AND (%s::int IS NULL OR r.id = %s)
+        AND NOT EXISTS (SELECT 1 FROM picks p WHERE p.user_id = u.id AND p.race_id = r.id)
+    ''', (-abs(penalty), race_id, race_id))
+    return cursor.rowcount
+
+
+# Stored columns of a result row, in the order _scored_results builds them
+_RESULT_FIELDS = ('driver_name', 'finish_position', 'points', 'stage1_position',
+                  'stage2_position', 'fastest_lap', 'raw_scored')
+
+
+def _scored_results(rules: Dict, results: List[Dict]) -> List[tuple]:
+    """Result rows (as _RESULT_FIELDS tuples) with driver points from the rules.
+    
+    Each result is {driver_name, finish_position} plus either the driver's
+    total points, or raw stage1_position/stage2_position/fastest_lap data that
+    the scoring rules turn into points.
+    """
+    import scoring
+    
+    raw_scored = [result.get('points') is None for result in results]
+    finish = [result['finish_position'] for result in results]
+    stage1 = [result.get('stage1_position') for result in results]
+    stage2 = [result.get('stage2_position') for result in results]
+    fastest_lap = [1 if result.get('fastest_lap') else 0 for result in results]
+    points = scoring.driver_points(
+        rules, finish, [s or 0 for s in stage1], [s or 0 for s in stage2], fastest_lap,
+        [result.get('points') or 0 for result in results], raw_scored
+    )
+    return [
+        (result['driver_name'], finish[i], int(points[i]), stage1[i], stage2[i], fastest_lap[i], int(raw_scored[i]))
+        for i, result in enumerate(results)
+    ]
+
+
+def _result_columns(rows: List[tuple]) -> List[list]:
+    """Transpose _scored_results rows into one list per column, for unnest()"""
+    return [list(column) for column in zip(*rows)] or [[] for _ in _RESULT_FIELDS]
+
+
+def _rescore_race_picks(cursor, race_id: int, rules: Dict) -> List[Dict]:
+    """Score the race's picks from its stored results, touching only picks whose points change.
+    
+    Picks of a driver with no result score 0. Returns {user_id, username,
+    driver_name, old_points, new_points} for each pick changed.
+    """
+    import scoring
+    
+    cursor.execute('SELECT driver_name, finish_position, points FROM results WHERE race_id = %s', (race_id,))
+    rows = cursor.fetchall()
+    pick_points = scoring.pick_points(rules, [r['points'] for r in rows], [r['finish_position'] for r in rows])
+    
+    # p is the pre-update row, so RETURNING can report both old and new points
+    cursor.execute('''
+        UPDATE picks
+        SET points = COALESCE(scored.points, 0)
+        FROM picks p
+        LEFT JOIN unnest(%s::text[], %s::int[]) AS scored(driver_name, points)
+            ON scored.driver_name = p.driver_name
+        WHERE picks.id = p.id AND p.race_id = %s
+        AND p.points IS DISTINCT FROM COALESCE(scored.points, 0)
+        RETURNING picks.user_id, (SELECT username FROM users WHERE id = picks.user_id) AS username,
+                  picks.driver_name, p.points AS old_points, picks.points AS new_points
+    ''', ([r['driver_name'] for r in rows], pick_points.tolist(), race_id))
+    return cursor.fetchall()
 
 
 def enter_race_results(race_id: int, results: List[Dict[str, any]]) -> bool:
-    """Enter results for a race. Results should be list of {driver_name, finish_position, points}"""
+    """Enter results for a race and score its picks (see _scored_results for the result format)"""
     try:
         conn = get_connection()
         cursor = conn.cursor()
+        rules = _scoring_rules(cursor)
+        rows = _scored_results(rules, results)
         
         # Delete existing results for this race
         cursor.execute('DELETE FROM results WHERE race_id = %s', (race_id,))
         
         # Insert new results
-        for result in results:
-            cursor.execute(
-                'INSERT INTO results (race_id, driver_name, finish_position, points) VALUES (%s, %s, %s, %s)',
-                (race_id, result['driver_name'], result['finish_position'], result['points'])
-            )
+        cursor.execute('''
+            INSERT INTO results (race_id, driver_name, finish_position, points,
+                                 stage1_position, stage2_position, fastest_lap, raw_scored)
+            SELECT %s, * FROM unnest(%s::text[], %s::int[], %s::int[], %s::int[], %s::int[], %s::int[], %s::int[])
+        ''', (race_id, *_result_columns(rows)))
         
-        # Update picks with points
-        for result in results:
-            cursor.execute('''
-                UPDATE picks 
-                SET points = %s 
-                WHERE race_id = %s AND driver_name = %s
-            ''', (result['points'], race_id, result['driver_name']))
+        # Score every pick for this race in one statement
+        _rescore_race_picks(cursor, race_id, rules)
         
         # Mark race as completed
         cursor.execute('UPDATE races SET is_completed = 1 WHERE id = %s', (race_id,))
+        _write_no_pick_penalties(cursor, rules['no_pick_penalty'], race_id)
+        
+        # Refresh the performance index for this race's track only
+        cursor.execute('SELECT track FROM races WHERE id = %s', (race_id,))
+        race = cursor.fetchone()
+        if race:
+            _refresh_track_index(cursor, race['track'])
+        
+        _write_standings_snapshot(cursor, race_id)
+        _bump_epoch(cursor, 'results', 'picks', 'races')
         
         conn.commit()
         conn.close()
+        
+        # Every session reruns now; make them share one fresh query instead of serving old totals
+        invalidate_all()
+        
+        # Regenerate the static standings and race files that readers fetch without queries
+        import publisher
+        publisher.publish_race_async(race_id)
         return True
     except Exception as e:
         print(f"Error entering results: {e}")
         return False
 
 
-def get_leaderboard() -> List[Dict]:
-    """Get current leaderboard with total points"""
+def correct_race_results(race_id: int, results: List[Dict[str, any]], dry_run: bool = False) -> Optional[Dict]:
+    """Apply a corrected result set to a completed race, changing only what differs.
+    
+    Results are diffed by driver against the stored ones: new drivers are
+    inserted, missing ones deleted and changed ones updated. Picks whose points
+    change are rescored (picks of a removed driver drop to 0), and each user's
+    delta is added to the standings history of this and every later race,
+    which are then re-ranked. With dry_run the change report is computed and
+    rolled back.
+    
+    Returns {'added', 'removed', 'changed', 'picks', 'standings_rows'} or None on error.
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        rules = _scoring_rules(cursor)
+        
+        cursor.execute('SELECT is_completed, track FROM races WHERE id = %s', (race_id,))
+        race = cursor.fetchone()
+        if not race or not race['is_completed']:
+            conn.close()
+            print(f"Error correcting results: race {race_id} has no results to correct")
+            return None
+        
+        cursor.execute(f"SELECT {', '.join(_RESULT_FIELDS)} FROM results WHERE race_id = %s FOR UPDATE", (race_id,))
+        stored = {row['driver_name']: tuple(row[f] for f in _RESULT_FIELDS) for row in cursor.fetchall()}
+        corrected = {row[0]: row for row in _scored_results(rules, results)}
+        
+        added = [row for name, row in corrected.items() if name not in stored]
+        removed = [name for name in stored if name not in corrected]
+        changed = [row for name, row in corrected.items() if name in stored and stored[name] != row]
+        
+        if removed:
+            cursor.execute('DELETE FROM results WHERE race_id = %s AND driver_name = ANY(%s)', (race_id, removed))
+        if added:
+            cursor.execute('''
+                INSERT INTO results (race_id, driver_name, finish_position, points,
+                                     stage1_position, stage2_position, fastest_lap, raw_scored)
+                SELECT %s, * FROM unnest(%s::text[], %s::int[], %s::int[], %s::int[], %s::int[], %s::int[], %s::int[])
+            ''', (race_id, *_result_columns(added)))
+        if changed:
+            cursor.execute('''
+                UPDATE results
+                SET finish_position = v.finish_position, points = v.points,
+                    stage1_position = v.stage1_position, stage2_position = v.stage2_position,
+                    fastest_lap = v.fastest_lap, raw_scored = v.raw_scored
+                FROM unnest(%s::text[], %s::int[], %s::int[], %s::int[], %s::int[], %s::int[], %s::int[])
+                    AS v(driver_name, finish_position, points, stage1_position, stage2_position, fastest_lap, raw_scored)
+                WHERE results.race_id = %s AND results.driver_name = v.driver_name
+            ''', (*_result_columns(changed), race_id))
+        
+        # Always rescore: also repairs picks left stale by earlier full re-entries
+        picks = _rescore_race_picks(cursor, race_id, rules)
+        
+        # Carry each user's change into the standings from this race on
+        standings_rows = 0
+        if picks:
+            deltas = {}
+            for pick in picks:
+                deltas[pick['user_id']] = deltas.get(pick['user_id'], 0) + pick['new_points'] - (pick['old_points'] or 0)
+            cursor.execute('''
+                UPDATE standings_history sh
+                SET total_points = sh.total_points + d.delta
+                FROM unnest(%s::int[], %s::int[]) AS d(user_id, delta)
+                WHERE sh.user_id = d.user_id AND d.delta <> 0
+                AND sh.race_number >= (SELECT race_number FROM races WHERE id = %s)
+            ''', (list(deltas), list(deltas.values()), race_id))
+            standings_rows = cursor.rowcount
+            cursor.execute('''
+                UPDATE standings_history sh
+                SET rank = ranked.rank
+                FROM (
+                    SELECT race_number, user_id,
+                           RANK() OVER (PARTITION BY race_number ORDER BY total_points DESC) AS rank
+                    FROM standings_history
+                    WHERE race_number >= (SELECT race_number FROM races WHERE id = %s)
+                ) ranked
+                WHERE sh.race_number = ranked.race_number AND sh.user_id = ranked.user_id
+                AND sh.rank <> ranked.rank
+            ''', (race_id,))
+        
+        report = {
+            'added': [dict(zip(_RESULT_FIELDS, row)) for row in added],
+            'removed': removed,
+            'changed': [
+                {'driver_name': row[0], 'old_finish': stored[row[0]][1], 'new_finish': row[1],
+                 'old_points': stored[row[0]][2], 'new_points': row[2]}
+                for row in changed
+            ],
+            'picks': [dict(pick) for pick in picks],
+            'standings_rows': standings_rows,
+        }
+        
+        if dry_run or not (added or removed or changed or picks):
+            conn.rollback()
+            conn.close()
+            return report
+        
+        _refresh_track_index(cursor, race['track'])
+        _bump_epoch(cursor, 'results', 'picks')
+        
+        conn.commit()
+        conn.close()
+        
+        invalidate_all()
+        import publisher
+        publisher.publish_race_async(race_id)
+        return report
+    except Exception as e:
+        print(f"Error correcting results: {e}")
+        return None
+
+
+# Numbers every driver name in results and picks the same way in each query
+_DRIVER_CODES_CTE = '''
+    WITH driver_codes AS (
+        SELECT driver_name, ROW_NUMBER() OVER (ORDER BY driver_name) - 1 AS code
+        FROM (SELECT driver_name FROM results UNION SELECT driver_name FROM picks) names
+    )
+'''
+
+
+def get_scoring_inputs() -> tuple:
+    """Everything a full-season rescore reads, as integer tuples.
+    
+    Returns (results, picks): results are (id, race_id, driver_code,
+    finish_position, stage1_position, stage2_position, fastest_lap, points,
+    raw_scored) and picks are (id, race_id, driver_code, points), for completed
+    races, with missing values as 0. Driver names are numbered in the query so
+    scoring never compares strings. Reads the primary so the rescore starts
+    from committed data. Every column needs its own name: the cursor returns
+    dicts, so unnamed COALESCE columns would overwrite each other.
+    """
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('''
+    cursor.execute(_DRIVER_CODES_CTE + '''
+        SELECT res.id, res.race_id, d.code,
+               COALESCE(res.finish_position, 0) AS finish_position,
+               COALESCE(res.stage1_position, 0) AS stage1_position,
+               COALESCE(res.stage2_position, 0) AS stage2_position,
+               COALESCE(res.fastest_lap, 0) AS fastest_lap,
+               COALESCE(res.points, 0) AS points,
+               COALESCE(res.raw_scored, 0) AS raw_scored
+        FROM results res
+        JOIN races r ON r.id = res.race_id
+        JOIN driver_codes d ON d.driver_name = res.driver_name
+        WHERE r.is_completed = 1
+    ''')
+    results = [tuple(row.values()) for row in cursor.fetchall()]
+    cursor.execute(_DRIVER_CODES_CTE + '''
+        SELECT p.id, p.race_id, d.code, COALESCE(p.points, 0) AS points
+        FROM picks p
+        JOIN races r ON r.id = p.race_id
+        JOIN driver_codes d ON d.driver_name = p.driver_name
+        WHERE r.is_completed = 1
+    ''')
+    picks = [tuple(row.values()) for row in cursor.fetchall()]
+    conn.close()
+    return results, picks
+
+
+def apply_scores(result_updates: tuple, pick_updates: tuple, no_pick_penalty: int) -> int:
+    """Write a rescore back in one transaction.
+    
+    result_updates and pick_updates are (ids, points) lists of the rows whose
+    points changed. Penalties, track indexes and standings history are rebuilt
+    to match. Returns the number of no-pick penalties given, or -1 on error.
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        for table, (ids, points) in (('results', result_updates), ('picks', pick_updates)):
+            if ids:
+                cursor.execute(f'''
+                    UPDATE {table} SET points = v.points
+                    FROM unnest(%s::int[], %s::int[]) AS v(id, points)
+                    WHERE {table}.id = v.id
+                ''', (ids, points))
+        penalties = _write_no_pick_penalties(cursor, no_pick_penalty)
+        
+        _refresh_track_index(cursor)
+        cursor.execute('SELECT id FROM races WHERE is_completed = 1 ORDER BY race_number')
+        for race in cursor.fetchall():
+            _write_standings_snapshot(cursor, race['id'])
+        _bump_epoch(cursor, 'results', 'picks')
+        
+        conn.commit()
+        conn.close()
+        
+        invalidate_all()
+        import publisher
+        publisher.publish_all_async()
+        return penalties
+    except Exception as e:
+        print(f"Error applying scores: {e}")
+        return -1
+
+
+@read_only
+def iter_leaderboard(batch_size: Optional[int] = None) -> Iterator[models.LeaderboardEntry]:
+    """Stream the current leaderboard with total points"""
+    return stream_rows('''
         SELECT 
             u.id,
             u.username,
-            COALESCE(SUM(p.points), 0) as total_points,
+            COALESCE(SUM(p.points), 0) + COALESCE((SELECT SUM(a.points) FROM score_adjustments a WHERE a.user_id = u.id), 0) as total_points,
             COUNT(p.id) as picks_made
         FROM users u
         LEFT JOIN picks p ON u.id = p.user_id
         WHERE u.is_admin = 0
         GROUP BY u.id, u.username
         ORDER BY total_points DESC, u.username
-    ''')
+    ''', row_type=models.LeaderboardEntry, batch_size=batch_size)
+
+
+@coalesced()
+@read_only
+def get_leaderboard() -> List[models.LeaderboardEntry]:
+    """Get current leaderboard with total points"""
+    return list(iter_leaderboard())
+
+
+# How tied totals are ranked: competition ranking (1, 2, 2, 4) or dense (1, 2, 2, 3)
+RANK_FUNCTIONS = {
+    'competition': 'RANK()',
+    'dense': 'DENSE_RANK()',
+}
+
+# Live totals ranked in the database; callers filter on position so only the
+# rows they display ever leave the server
+_RANKED_LEADERBOARD_SQL = '''
+    WITH totals AS (
+        SELECT
+            u.id,
+            u.username,
+            COALESCE(SUM(p.points), 0) + COALESCE((SELECT SUM(a.points) FROM score_adjustments a WHERE a.user_id = u.id), 0) as total_points,
+            COUNT(p.id) as picks_made
+        FROM users u
+        LEFT JOIN picks p ON u.id = p.user_id
+        WHERE u.is_admin = 0
+        GROUP BY u.id, u.username
+    ),
+    ranked AS (
+        SELECT
+            totals.*,
+            {rank_function} OVER (ORDER BY total_points DESC) AS rank,
+            ROW_NUMBER() OVER (ORDER BY total_points DESC, username) AS position,
+            COUNT(*) OVER () AS entrants
+        FROM totals
+    )
+'''
+
+
+def _ranked_leaderboard_sql(method: str) -> str:
+    """Leaderboard CTE using the requested tie handling"""
+    if method not in RANK_FUNCTIONS:
+        raise ValueError(f"Unknown rank method: {method}")
+    return _RANKED_LEADERBOARD_SQL.format(rank_function=RANK_FUNCTIONS[method])
+
+
+@read_only
+def get_user_rank(user_id: int, method: str = 'competition') -> Optional[Dict]:
+    """Get a user's rank without fetching the leaderboard.
+
+    Returns {id, username, total_points, picks_made, rank, position, entrants},
+    where position is the user's row in leaderboard order (ties by username).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(_ranked_leaderboard_sql(method) + '''
+        SELECT * FROM ranked WHERE id = %s
+    ''', (user_id,))
+    rank = cursor.fetchone()
+    conn.close()
+    return dict(rank) if rank else None
+
+
+@coalesced()
+@read_only
+def get_leaderboard_top(limit: int, method: str = 'competition') -> List[Dict]:
+    """Get the first `limit` leaderboard rows with their ranks"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(_ranked_leaderboard_sql(method) + '''
+        SELECT * FROM ranked WHERE position <= %s ORDER BY position
+    ''', (limit,))
     leaderboard = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return leaderboard
 
 
-def get_race_results(race_id: int) -> List[Dict]:
-    """Get results for a specific race"""
+@read_only
+def get_leaderboard_window(user_id: int, radius: int = 3, method: str = 'competition') -> List[Dict]:
+    """Get the leaderboard rows within `radius` positions of a user"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(_ranked_leaderboard_sql(method) + '''
+        , me AS (SELECT position FROM ranked WHERE id = %s)
+        SELECT ranked.* FROM ranked, me
+        WHERE ranked.position BETWEEN me.position - %s AND me.position + %s
+        ORDER BY ranked.position
+    ''', (user_id, radius, radius))
+    leaderboard = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return leaderboard
+
+
+@read_only
+def iter_ranked_leaderboard(method: str = 'competition', batch_size: Optional[int] = None) -> Iterator[tuple]:
+    """Stream the whole leaderboard with ranks, in position order"""
+    return stream_rows(_ranked_leaderboard_sql(method) + '''
+        SELECT * FROM ranked ORDER BY position
+    ''', batch_size=batch_size)
+
+
+@read_only
+def get_standings_as_of(race_number: int) -> List[Dict]:
+    """Get standings as of the latest snapshotted race at or before race_number"""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
-        SELECT * FROM results 
-        WHERE race_id = %s 
-        ORDER BY finish_position
-    ''', (race_id,))
-    results = [dict(row) for row in cursor.fetchall()]
+        SELECT sh.race_number, sh.user_id, u.username, sh.total_points, sh.rank
+        FROM standings_history sh
+        JOIN users u ON sh.user_id = u.id
+        WHERE sh.race_number = (
+            SELECT MAX(race_number) FROM standings_history WHERE race_number <= %s
+        )
+        ORDER BY sh.rank, u.username
+    ''', (race_number,))
+    standings = [dict(row) for row in cursor.fetchall()]
     conn.close()
-    return results
+    return standings
 
 
-def get_all_picks_for_race(race_id: int) -> List[Dict]:
-    """Get all users' picks for a specific race"""
+@coalesced()
+@read_only
+def get_rank_changes(race_number: Optional[int] = None) -> Dict[int, Dict]:
+    """Get each user's rank movement between a snapshot and the one before it.
+    
+    Defaults to the latest snapshot. Returns {user_id: {rank, previous_rank, change}}
+    where change is positive for users who moved up and previous_rank is None
+    for users with no earlier snapshot.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        WITH cur AS (
+            SELECT MAX(race_number) AS race_number FROM standings_history
+            WHERE %s IS NULL OR race_number <= %s
+        ),
+        prev AS (
+            SELECT MAX(race_number) AS race_number FROM standings_history
+            WHERE race_number < (SELECT race_number FROM cur)
+        )
+        SELECT latest.user_id, latest.rank, earlier.rank AS previous_rank
+        FROM standings_history latest
+        LEFT JOIN standings_history earlier
+            ON earlier.user_id = latest.user_id
+            AND earlier.race_number = (SELECT race_number FROM prev)
+        WHERE latest.race_number = (SELECT race_number FROM cur)
+    ''', (race_number, race_number))
+    changes = {}
+    for row in cursor.fetchall():
+        previous = row['previous_rank']
+        changes[row['user_id']] = {
+            'rank': row['rank'],
+            'previous_rank': previous,
+            'change': previous - row['rank'] if previous is not None else None,
+        }
+    conn.close()
+    return changes
+
+
+@read_only
+def get_user_standings_history(user_id: int) -> List[Dict]:
+    """Get a user's points and rank after each completed race"""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
+        SELECT race_number, total_points, rank
+        FROM standings_history
+        WHERE user_id = %s
+        ORDER BY race_number
+    ''', (user_id,))
+    history = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return history
+
+
+# Datasets available for season exports, streamed row by row
+EXPORT_QUERIES = {
+    'users': '''
+        SELECT username, email, paid, created_at
+        FROM users
+        WHERE is_admin = 0
+        ORDER BY username
+    ''',
+    'picks': '''
+        SELECT r.race_number, r.race_name, u.username, p.driver_name, p.points, p.created_at
+        FROM picks p
+        JOIN users u ON p.user_id = u.id
+        JOIN races r ON p.race_id = r.id
+        WHERE u.is_admin = 0
+        ORDER BY r.race_number, u.username
+    ''',
+    'results': '''
+        SELECT r.race_number, r.race_name, r.track, r.race_date, res.finish_position, res.driver_name, res.points
+        FROM results res
+        JOIN races r ON res.race_id = r.id
+        ORDER BY r.race_number, res.finish_position
+    ''',
+    'standings': '''
+        SELECT sh.race_number, sh.rank, u.username, sh.total_points
+        FROM standings_history sh
+        JOIN users u ON sh.user_id = u.id
+        ORDER BY sh.race_number, sh.rank, u.username
+    ''',
+}
+
+
+@read_only
+def iter_export_rows(dataset: str, batch_size: int = 1000):
+    """Stream the rows of an export dataset (see EXPORT_QUERIES)"""
+    if dataset not in EXPORT_QUERIES:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    return iter_query(EXPORT_QUERIES[dataset], batch_size=batch_size)
+
+
+@read_only
+def iter_race_results(race_id: int, batch_size: Optional[int] = None) -> Iterator[models.Result]:
+    """Stream results for a specific race in finishing order"""
+    return stream_rows('''
+        SELECT id, race_id, driver_name, finish_position, points
+        FROM results 
+        WHERE race_id = %s 
+        ORDER BY finish_position
+    ''', (race_id,), models.Result, batch_size)
+
+
+@coalesced()
+@read_only
+def get_race_results(race_id: int) -> List[models.Result]:
+    """Get results for a specific race"""
+    return list(iter_race_results(race_id))
+
+
+@read_only
+def iter_race_picks(race_id: int, batch_size: Optional[int] = None) -> Iterator[models.RacePick]:
+    """Stream all users' picks for a specific race"""
+    return stream_rows('''
         SELECT u.username, p.driver_name, p.points, r.is_completed
         FROM picks p
         JOIN users u ON p.user_id = u.id
         JOIN races r ON p.race_id = r.id
         WHERE p.race_id = %s AND u.is_admin = 0
         ORDER BY u.username
-    ''', (race_id,))
-    picks = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return picks
+    ''', (race_id,), models.RacePick, batch_size)
+
+
+@coalesced()
+@read_only
+def get_all_picks_for_race(race_id: int) -> List[models.RacePick]:
+    """Get all users' picks for a specific race"""
+    return list(iter_race_picks(race_id))
+
+
+@coalesced()
+@read_only
+def get_pick_counts(race_id: int) -> List[models.PickCount]:
+    """How many users picked each driver for a race, most picked first.
+    
+    Reads the pick_counts counters, so it is one row per picked driver
+    however many entrants there are. Callers decide whether the race's
+    picks may be shown yet (see picks_visible).
+    """
+    return list(stream_rows('''
+        SELECT d.name AS driver_name, c.picks
+        FROM pick_counts c
+        JOIN drivers d ON d.id = c.driver_id
+        WHERE c.race_id = %s AND c.picks > 0
+        ORDER BY c.picks DESC, d.name
+    ''', (race_id,), models.PickCount))
+
+
+def _invalidate_pick_reads():
+    """Drop this process's coalesced reads that include picks, right after a pick commits.
+    
+    Otherwise they could serve pre-write data for up to their stale window,
+    to the picking user too. Other processes catch up when they observe the
+    picks epoch move (frame_cache.observe).
+    """
+    for read in (get_all_picks_for_race, get_pick_counts, get_leaderboard, get_leaderboard_top):
+        read.invalidate()
+
+
+@read_only
+def iter_users(batch_size: Optional[int] = None) -> Iterator[models.User]:
+    """Stream all non-admin users with their details"""
+    return stream_rows('''
+        SELECT id, username, email, paid, created_at
+        FROM users
+        WHERE is_admin = 0
+        ORDER BY username
+    ''', row_type=models.User, batch_size=batch_size)
 
 
-def get_all_users() -> List[Dict]:
+@read_only
+def get_all_users() -> List[models.User]:
     """Get all non-admin users with their details"""
+    return list(iter_users())
+
+
+@read_only
+def get_users_page(after_username: Optional[str] = None, limit: int = 50,
+                   paid: Optional[bool] = None, search: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Get one page of non-admin users ordered by username.
+
+    Keyset pagination: pass the returned cursor as after_username to get the next
+    page. paid filters to paid/unpaid users and search is a case-insensitive
+    username prefix. Returns (users, next_cursor) with next_cursor None on the
+    last page.
+    """
+    conditions = ['is_admin = 0']
+    params = []
+    if after_username is not None:
+        conditions.append('username > %s')
+        params.append(after_username)
+    if paid is not None:
+        conditions.append('paid = %s')
+        params.append(1 if paid else 0)
+    if search:
+        escaped = search.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        conditions.append('lower(username) LIKE %s')
+        params.append(escaped + '%')
+    
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('''
+    cursor.execute(f'''
         SELECT id, username, email, paid, created_at
         FROM users
-        WHERE is_admin = 0
+        WHERE {' AND '.join(conditions)}
         ORDER BY username
-    ''')
+        LIMIT %s
+    ''', params + [limit + 1])
     users = [dict(row) for row in cursor.fetchall()]
     conn.close()
-    return users
+    
+    if len(users) > limit:
+        users = users[:limit]
+        return users, users[-1]['username']
+    return users, None
 
 
-def update_user_payment_status(user_id: int, paid: bool) -> bool:
-    """Update user's payment status"""
+@read_only
+def get_user_payment_counts() -> Dict[str, int]:
+    """Get total and paid counts of non-admin users"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT COUNT(*) AS total, COUNT(*) FILTER (WHERE paid = 1) AS paid
+        FROM users
+        WHERE is_admin = 0
+    ''')
+    counts = dict(cursor.fetchone())
+    conn.close()
+    return counts
+
+
+def set_payment_statuses(statuses: Dict[int, bool]) -> bool:
+    """Update payment status for many users ({user_id: paid}) in one statement, so all or none apply"""
+    if not statuses:
+        return True
     try:
         conn = get_connection()
         cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE users SET paid = %s WHERE id = %s',
-            (1 if paid else 0, user_id)
-        )
+        cursor.execute('''
+            UPDATE users SET paid = v.paid
+            FROM unnest(%s::int[], %s::int[]) AS v(id, paid)
+            WHERE users.id = v.id
+        ''', (list(statuses), [1 if paid else 0 for paid in statuses.values()]))
+        _bump_epoch(cursor, 'users')
         conn.commit()
         conn.close()
         return True
@@ -491,21 +2085,45 @@ def update_user_payment_status(user_id: int, paid: bool) -> bool:
         return False
 
 
-def get_users_without_pick(race_id: int) -> List[Dict]:
-    """Get all users who haven't made a pick for a specific race"""
+def set_payment_status(user_ids: List[int], paid: bool) -> bool:
+    """Give many users the same payment status"""
+    return set_payment_statuses({user_id: paid for user_id in user_ids})
+
+
+def update_user_payment_status(user_id: int, paid: bool) -> bool:
+    """Update user's payment status"""
+    return set_payment_status([user_id], paid)
+
+
+@read_only
+def is_admin(user_id: int) -> bool:
+    """Whether a user is an admin now; session tokens carry the flag as it was at login"""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('''
+    cursor.execute('SELECT is_admin FROM users WHERE id = %s', (user_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return bool(row and row['is_admin'])
+
+
+@read_only
+def get_user_by_username(username: str) -> Optional[models.UserRef]:
+    """Look up a user by exact username"""
+    users = list(stream_rows('SELECT id, username FROM users WHERE username = %s', (username,), models.UserRef))
+    return users[0] if users else None
+
+
+@read_only
+def get_users_without_pick(race_id: int) -> List[models.UserRef]:
+    """Get all users who haven't made a pick for a specific race"""
+    return list(stream_rows('''
         SELECT u.id, u.username
         FROM users u
         WHERE u.is_admin = 0
         AND u.id NOT IN (
             SELECT user_id FROM picks WHERE race_id = %s
         )
-    ''', (race_id,))
-    users = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return users
+    ''', (race_id,), models.UserRef))
 
 
 def auto_assign_picks(race_id: int, available_drivers: List[str]) -> Tuple[int, List[str]]:
@@ -513,26 +2131,34 @@ def auto_assign_picks(race_id: int, available_drivers: List[str]) -> Tuple[int,
     Returns: (number of picks assigned, list of errors)"""
     import random
     
-    users_without_picks = get_users_without_pick(race_id)
+    # Read from the primary: a lagging replica could miss a pick made moments
+    # ago and the assignment would overwrite it
+    import driver_masks
+    
+    with routing.use_primary():
+        users_without_picks = get_users_without_pick(race_id)
+        used_masks = get_used_driver_masks([user['id'] for user in users_without_picks])
     assigned_count = 0
     errors = []
     
+    # Drivers in the list that have never been picked have no id yet; they're free for everyone
+    driver_ids = get_driver_ids(refresh=True)
+    never_picked = [d for d in available_drivers if d not in driver_ids]
+    available_mask = driver_masks.of(driver_ids[d] for d in available_drivers if d in driver_ids)
+    
     for user in users_without_picks:
         user_id = user['id']
         username = user['username']
         
-        # Get drivers this user has already used
-        used_drivers = get_used_drivers(user_id)
-        
-        # Find available drivers (not used by this user)
-        user_available = [d for d in available_drivers if d not in used_drivers]
+        # Find available drivers (not used by this user) with one bit operation
+        user_available = driver_names_for(available_mask & ~used_masks[user_id]) + never_picked
         
         if user_available:
             # Randomly select a driver
             selected_driver = random.choice(user_available)
             
             # Make the pick
-            success, message = make_pick(user_id, race_id, selected_driver)
+            success, message = make_pick(user_id, race_id, selected_driver, source='auto')
             if success:
                 assigned_count += 1
             else:
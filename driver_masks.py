@@ -0,0 +1,46 @@
+"""
+Bitmasks of drivers
+
+A set of drivers is an int with bit n set for the driver whose drivers.id is
+n. A user's used drivers are stored that way in user_driver_masks.used (a
+BYTEA, least significant byte first, matching Postgres get_bit/set_bit), so
+availability checks and counts are bit operations instead of scans of the
+user's picks.
+"""
+from typing import Iterable, List, Optional
+
+
+def from_bytes(data: Optional[bytes]) -> int:
+    """Mask from a user_driver_masks.used value"""
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+def to_bytes(mask: int) -> bytes:
+    """user_driver_masks.used value for a mask"""
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+def of(driver_ids: Iterable[int]) -> int:
+    """Mask with the given driver ids set"""
+    mask = 0
+    for driver_id in driver_ids:
+        mask |= 1 << driver_id
+    return mask
+
+
+def has(mask: int, driver_id: Optional[int]) -> bool:
+    return driver_id is not None and (mask >> driver_id) & 1 == 1
+
+
+def ids(mask: int) -> List[int]:
+    """Driver ids set in a mask, lowest first"""
+    found = []
+    while mask:
+        low = mask & -mask
+        found.append(low.bit_length() - 1)
+        mask ^= low
+    return found
+
+
+def count(mask: int) -> int:
+    return mask.bit_count()
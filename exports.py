@@ -0,0 +1,222 @@
+"""
+Streaming season exports: users, pick history, results and standings
+
+Rows come from a server-side cursor and are written in chunks, so memory use
+stays flat regardless of season size. Exports for the admin panel run in a
+background thread and land in a temporary file that is then offered as a
+download.
+
+Usage:
+    python exports.py picks --format csv -o picks.csv
+    python exports.py standings --format parquet -o standings.parquet
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+
+import database as db
+
+DATASETS = list(db.EXPORT_QUERIES)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Rows per chunk handed to the output file
+CHUNK_ROWS = 1000
+
+# Finished export files are removed after this long
+JOB_TTL_SECONDS = 3600
+
+
+def _chunks(rows: Iterable[Dict], size: int = CHUNK_ROWS) -> Iterator[list]:
+    """Group a row stream into lists of at most `size` rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_chunks(rows: Iterable[Dict]) -> Iterator[bytes]:
+    """Encode a row stream as CSV, one chunk of bytes per CHUNK_ROWS rows"""
+    header_written = False
+    for chunk in _chunks(rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        columns = list(chunk[0].keys())
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows([row[c] for c in columns] for row in chunk)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def jsonl_chunks(rows: Iterable[Dict]) -> Iterator[bytes]:
+    """Encode a row stream as JSON Lines, one chunk of bytes per CHUNK_ROWS rows"""
+    for chunk in _chunks(rows):
+        yield ''.join(json.dumps(dict(row), default=_json_default) + '\n' for row in chunk).encode('utf-8')
+
+
+def write_parquet(rows: Iterable[Dict], out: BinaryIO) -> int:
+    """Write a row stream as Parquet, one record batch per chunk. Returns rows written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    written = 0
+    writer = None
+    try:
+        for chunk in _chunks(rows):
+            if writer is None:
+                schema = pa.RecordBatch.from_pylist([dict(r) for r in chunk]).schema
+                writer = pq.ParquetWriter(out, schema)
+            writer.write_batch(pa.RecordBatch.from_pylist([dict(r) for r in chunk], schema=schema))
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def write_export(dataset: str, fmt: str, out: BinaryIO, progress: Optional[Dict] = None) -> int:
+    """Stream one dataset into a binary file object. Returns rows written.
+
+    When given, progress['rows'] is updated as chunks are written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if progress is None:
+        progress = {}
+    progress['rows'] = 0
+
+    def counted(rows):
+        for row in rows:
+            progress['rows'] += 1
+            yield row
+
+    rows = counted(db.iter_export_rows(dataset, batch_size=CHUNK_ROWS))
+
+    if fmt == 'parquet':
+        write_parquet(rows, out)
+    else:
+        encode = csv_chunks if fmt == 'csv' else jsonl_chunks
+        for chunk in encode(rows):
+            out.write(chunk)
+    return progress['rows']
+
+
+# Background export jobs for the admin panel, keyed by job id
+_jobs: Dict[str, Dict] = {}
+_jobs_lock = threading.Lock()
+_export_dir: Optional[str] = None
+
+
+def _job_dir() -> str:
+    global _export_dir
+    if _export_dir is None:
+        _export_dir = tempfile.mkdtemp(prefix='nascar_exports_')
+    return _export_dir
+
+
+def _run_job(job: Dict):
+    try:
+        with open(job['path'], 'wb') as out:
+            write_export(job['dataset'], job['format'], out, progress=job)
+        job['status'] = 'done'
+    except Exception as e:
+        print(f"Error exporting {job['dataset']}: {e}")
+        job['status'] = 'failed'
+        job['error'] = str(e)
+    job['finished_at'] = time.time()
+
+
+def start_export(dataset: str, fmt: str) -> str:
+    """Start exporting a dataset in a background thread. Returns the job id."""
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    _cleanup_jobs()
+    job_id = uuid.uuid4().hex
+    stamp = datetime.now().strftime('%Y%m%d')
+    job = {
+        'id': job_id,
+        'dataset': dataset,
+        'format': fmt,
+        'status': 'running',
+        'rows': 0,
+        'path': os.path.join(_job_dir(), f"{job_id}.{FORMATS[fmt][1]}"),
+        'file_name': f"nascar_{dataset}_{stamp}.{FORMATS[fmt][1]}",
+        'mime': FORMATS[fmt][0],
+        'finished_at': None,
+    }
+    with _jobs_lock:
+        _jobs[job_id] = job
+    threading.Thread(target=_run_job, args=(job,), daemon=True).start()
+    return job_id
+
+
+def get_export(job_id: str) -> Optional[Dict]:
+    """Get a job's status: running, done or failed, plus rows written so far"""
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def _cleanup_jobs():
+    """Drop finished jobs and their files once they are older than JOB_TTL_SECONDS"""
+    cutoff = time.time() - JOB_TTL_SECONDS
+    with _jobs_lock:
+        expired = [j for j in _jobs.values() if j['finished_at'] and j['finished_at'] < cutoff]
+        for job in expired:
+            del _jobs[job['id']]
+    for job in expired:
+        try:
+            os.remove(job['path'])
+        except OSError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export season data without loading it all into memory")
+    parser.add_argument('dataset', choices=DATASETS)
+    parser.add_argument('--format', choices=list(FORMATS), default='csv')
+    parser.add_argument('-o', '--output', help="Output file (defaults to stdout for csv/jsonl)")
+    args = parser.parse_args()
+
+    if args.output:
+        # Write next to the destination and rename, so a failed export never leaves a partial file
+        directory = os.path.dirname(os.path.abspath(args.output))
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as tmp:
+            rows = write_export(args.dataset, args.format, tmp)
+        shutil.move(tmp.name, args.output)
+        print(f"✓ Exported {rows} {args.dataset} rows to {args.output}", file=sys.stderr)
+    elif args.format == 'parquet':
+        parser.error("parquet exports need --output")
+    else:
+        rows = write_export(args.dataset, args.format, sys.stdout.buffer)
+        print(f"✓ Exported {rows} {args.dataset} rows", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cache for page-level DataFrames, keyed on the data epochs they were built from
+
+Pages pass the domains they read (see database.EPOCH_DOMAINS) and a build
+function that queries and frames the data. While none of those domains has
+been written, reruns get the cached result back without touching the
+database or pandas. Entries are shared across sessions, so callers must
+treat returned frames as read-only.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable
+
+from singleflight import SingleFlight, invalidate_all
+
+MAX_ENTRIES = 256
+
+_entries: "OrderedDict[Hashable, object]" = OrderedDict()
+_lock = threading.Lock()
+_flights = SingleFlight()
+_stats = {'hits': 0, 'builds': 0, 'evictions': 0}
+_latest_epochs: Dict[str, int] = {}
+
+
+def observe(epochs: Dict[str, int]):
+    """Drop coalesced read results once any epoch moves past what this process has seen.
+
+    Otherwise a frame for a new epoch could be built from a result cached
+    before the write (possibly made by another process). Anything that
+    serves coalesced reads under an epoch-derived version (e.g. api.py's
+    ETags) calls this first.
+    """
+    with _lock:
+        newer = any(epoch > _latest_epochs.get(domain, epoch - 1) for domain, epoch in epochs.items())
+        seen_before = bool(_latest_epochs)
+        if newer:
+            for domain, epoch in epochs.items():
+                _latest_epochs[domain] = max(epoch, _latest_epochs.get(domain, epoch))
+    if newer and seen_before:
+        invalidate_all()
+
+
+def cached_frame(page: str, params: tuple, domains: Iterable[str], epochs: Dict[str, int],
+                 build: Callable[[], object]):
+    """Return build()'s result for (page, params), rebuilding only when an epoch in `domains` moved"""
+    observe(epochs)
+    key = (page, params, tuple((d, epochs.get(d)) for d in domains))
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            _stats['hits'] += 1
+            return _entries[key]
+
+    def load():
+        value = build()
+        with _lock:
+            _stats['builds'] += 1
+            _entries[key] = value
+            _entries.move_to_end(key)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+                _stats['evictions'] += 1
+        return value
+
+    # Sessions rerunning together after a write build each frame once
+    return _flights.do(key, load)
+
+
+def clear():
+    """Drop every cached frame"""
+    with _lock:
+        _entries.clear()
+
+
+def stats() -> Dict[str, int]:
+    """Snapshot of hit/build/eviction counters plus the current size"""
+    with _lock:
+        return dict(_stats, entries=len(_entries))
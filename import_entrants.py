@@ -0,0 +1,131 @@
+"""
+Bulk import contest entrants from a CSV file
+
+The CSV needs username and email columns; paid (yes/no, 1/0, true/false) and
+password are optional. Entrants without a password get a random one, which is
+written to the credentials file so it can be sent to them.
+
+Usage:
+    python import_entrants.py entrants.csv [--credentials credentials.csv]
+"""
+import argparse
+import csv
+import io
+import secrets
+from typing import Dict, IO, Iterable, List, Tuple
+
+import database as db
+
+PAID_VALUES = {'1', 'yes', 'y', 'true', 'paid', 'x'}
+
+
+def read_entrants(file: IO[str]) -> Tuple[List[Dict], List[Dict]]:
+    """Parse entrant rows from a CSV file object.
+
+    Returns (entrants, errors); rows are numbered from 2 to match the line
+    number in the file, since line 1 is the header.
+    """
+    reader = csv.DictReader(file)
+    columns = {c.strip().lower() for c in (reader.fieldnames or [])}
+    missing = {'username', 'email'} - columns
+    if missing:
+        raise ValueError(f"CSV must contain columns: {', '.join(sorted(missing))}")
+
+    entrants = []
+    errors = []
+    for row_num, record in enumerate(reader, start=2):
+        record = {k.strip().lower(): (v or '').strip() for k, v in record.items() if k}
+        username = record.get('username', '')
+        email = record.get('email', '')
+        if not username or not email:
+            errors.append({'row': row_num, 'username': username, 'email': email,
+                           'reason': 'missing username or email'})
+            continue
+        entrants.append({
+            'row': row_num,
+            'username': username,
+            'email': email,
+            'paid': record.get('paid', '').lower() in PAID_VALUES,
+            'password': record.get('password') or None,
+        })
+    return entrants, errors
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash passwords in-process.
+
+    A SHA-256 takes microseconds, so a process pool would only add cost, and
+    forking the Streamlit server (which runs background threads) can deadlock.
+    """
+    return [db.hash_password(p) for p in passwords]
+
+
+def import_entrants(file: IO[str]) -> Dict:
+    """Import entrants from a CSV file object.
+
+    Returns {'created': [{row, id, username}],
+             'conflicts': [{row, username, email, reason}],
+             'credentials': [{username, email, password}]}
+    where credentials only lists generated passwords for users actually created.
+    """
+    entrants, errors = read_entrants(file)
+
+    generated = {}
+    for entrant in entrants:
+        if entrant['password'] is None:
+            entrant['password'] = secrets.token_urlsafe(9)
+            generated[entrant['row']] = entrant['password']
+
+    hashes = hash_passwords([e['password'] for e in entrants])
+    for entrant, password_hash in zip(entrants, hashes):
+        entrant['password_hash'] = password_hash
+
+    created, conflicts = db.bulk_import_users(entrants) if entrants else ([], [])
+
+    by_row = {e['row']: e for e in entrants}
+    credentials = [
+        {'username': c['username'], 'email': by_row[c['row']]['email'], 'password': generated[c['row']]}
+        for c in created if c['row'] in generated
+    ]
+    return {
+        'created': created,
+        'conflicts': sorted(errors + conflicts, key=lambda c: c['row']),
+        'credentials': credentials,
+    }
+
+
+def credentials_csv(credentials: Iterable[Dict]) -> str:
+    """Render generated credentials as CSV text"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=['username', 'email', 'password'])
+    writer.writeheader()
+    writer.writerows(credentials)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import contest entrants from a CSV file")
+    parser.add_argument('csv_path', help="CSV with username, email and optional paid/password columns")
+    parser.add_argument('--credentials', default='entrant_credentials.csv',
+                        help="Where to write generated passwords")
+    args = parser.parse_args()
+
+    db.init_db()
+    with open(args.csv_path, newline='') as f:
+        report = import_entrants(f)
+
+    print(f"✓ Created {len(report['created'])} entrants")
+
+    if report['conflicts']:
+        print(f"  ⚠️  Skipped {len(report['conflicts'])} rows:")
+        for conflict in report['conflicts']:
+            print(f"    line {conflict['row']}: {conflict['username'] or '?'} - {conflict['reason']}")
+
+    if report['credentials']:
+        with open(args.credentials, 'w', newline='') as f:
+            f.write(credentials_csv(report['credentials']))
+        print(f"✓ Generated passwords written to {args.credentials}")
+
+
+if __name__ == "__main__":
+    main()
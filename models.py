@@ -0,0 +1,57 @@
+"""
+Compact row types returned by database reads
+
+Rows are namedtuples (no per-row __dict__) that still allow the dict-style
+access the pages use, e.g. race['race_name'], dict(race) and pd.DataFrame(rows).
+"""
+from collections import namedtuple
+from typing import Dict, Iterable, Tuple, Type
+
+
+class _Row:
+    """Mixin giving namedtuple rows read-only mapping access by column name"""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self._fields
+
+
+def row_type(name: str, fields: Iterable[str]) -> Type[tuple]:
+    """Create a compact row class with the given columns"""
+    base = namedtuple(name, list(fields))
+    return type(name, (_Row, base), {'__slots__': ()})
+
+
+User = row_type('User', ['id', 'username', 'email', 'paid', 'created_at'])
+Race = row_type('Race', ['id', 'race_number', 'race_name', 'race_date', 'track', 'is_completed', 'created_at'])
+Pick = row_type('Pick', ['id', 'user_id', 'race_id', 'driver_name', 'points', 'created_at'])
+PickDetail = row_type('PickDetail', Pick._fields + ('race_name', 'race_date', 'is_completed', 'race_number'))
+RacePick = row_type('RacePick', ['username', 'driver_name', 'points', 'is_completed'])
+Result = row_type('Result', ['id', 'race_id', 'driver_name', 'finish_position', 'points'])
+ChatMessage = row_type('ChatMessage', ['username', 'message', 'created_at'])
+LeaderboardEntry = row_type('LeaderboardEntry', ['id', 'username', 'total_points', 'picks_made'])
+UserRef = row_type('UserRef', ['id', 'username'])
+PickCount = row_type('PickCount', ['driver_name', 'picks'])
+PickEvent = row_type('PickEvent', ['event_at', 'username', 'race_number', 'race_name', 'driver_name', 'source'])
+
+# Ad-hoc row types for queries without a declared type, keyed by column names
+_generic_types: Dict[Tuple[str, ...], Type[tuple]] = {}
+
+
+def row_type_for(fields: Iterable[str]) -> Type[tuple]:
+    """Get (or create once) a row class for an arbitrary column list"""
+    fields = tuple(fields)
+    if fields not in _generic_types:
+        _generic_types[fields] = row_type('Row', fields)
+    return _generic_types[fields]
@@ -0,0 +1,161 @@
+"""
+Admission control for pick submissions
+
+Most picks arrive in the last minutes before the lock. Instead of every
+submit opening its own connection, picks go through a queue served by
+PICK_WORKERS threads, so at most that many connections write picks at once
+and a surge waits in line instead of exhausting the database.
+
+- Each pick is stamped with its submission time when it is queued, and
+  make_pick checks the race-day lock against that time, so a pick submitted
+  before the lock counts even if it is written after.
+- The queue is fair per user: a user has at most one queued pick, and
+  submitting again replaces it (keeping its place in line), so resubmitting
+  can't crowd out others.
+- submit() admits up to MAX_QUEUED waiting picks; beyond that it refuses
+  with a "busy" result rather than queueing without bound.
+- wait() gives up after a timeout and the caller shows the pick as pending;
+  poll result() until it is done.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import routing
+
+PICK_WORKERS = int(os.environ.get('PICK_WORKERS', 4))
+MAX_QUEUED = int(os.environ.get('PICK_MAX_QUEUED', 2000))
+
+# Finished tickets are kept this long for polling sessions to collect
+RESULT_TTL_SECONDS = 600
+
+BUSY = (False, "The pick queue is full right now; please try again in a moment")
+
+
+class _Ticket:
+    """One submitted pick and, once written, its (success, message) result"""
+    __slots__ = ('user_id', 'race_id', 'driver_name', 'submitted_at', 'done', 'result', 'finished_at')
+
+    def __init__(self, user_id: int, race_id: int, driver_name: str):
+        self.user_id = user_id
+        self.race_id = race_id
+        self.driver_name = driver_name
+        self.submitted_at = datetime.now()
+        self.done = threading.Event()
+        self.result: Optional[Tuple[bool, str]] = None
+        self.finished_at = 0.0
+
+    def finish(self, result: Tuple[bool, str]):
+        self.result = result
+        self.finished_at = time.monotonic()
+        self.done.set()
+
+
+_ids = itertools.count(1)
+_cond = threading.Condition()
+_queue: "OrderedDict[int, _Ticket]" = OrderedDict()  # user_id -> queued ticket, in line order
+_tickets: Dict[int, _Ticket] = {}
+_workers = []
+
+_stats = {
+    'submitted': 0,
+    'replaced': 0,    # queued picks superseded by the same user's newer pick
+    'rejected': 0,    # refused because the queue was full
+    'written': 0,
+    'in_flight': 0,
+    'max_queued': 0,
+    'max_wait_ms': 0.0,  # longest time from submit to the write starting
+}
+
+
+def _work():
+    import database as db
+
+    while True:
+        with _cond:
+            _cond.wait_for(lambda: _queue)
+            _, ticket = _queue.popitem(last=False)
+            _stats['in_flight'] += 1
+            _stats['max_wait_ms'] = max(_stats['max_wait_ms'],
+                                        (datetime.now() - ticket.submitted_at).total_seconds() * 1000)
+        try:
+            # As the user, so their next reads are pinned to the primary and see this pick
+            with routing.acting_as(ticket.user_id):
+                result = db.make_pick(ticket.user_id, ticket.race_id, ticket.driver_name,
+                                      submitted_at=ticket.submitted_at)
+        except Exception as e:
+            result = (False, f"Error saving pick: {str(e)}")
+        ticket.finish(result)
+        with _cond:
+            _stats['in_flight'] -= 1
+            _stats['written'] += 1
+
+
+def _start_workers():
+    for n in range(PICK_WORKERS):
+        worker = threading.Thread(target=_work, name=f"pick-worker-{n}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+
+
+def _expire_tickets():
+    now = time.monotonic()
+    for ticket_id in [t for t, ticket in _tickets.items()
+                      if ticket.done.is_set() and now - ticket.finished_at > RESULT_TTL_SECONDS]:
+        del _tickets[ticket_id]
+
+
+def submit(user_id: int, race_id: int, driver_name: str) -> int:
+    """Queue a manual pick, stamped with the current time. Returns a ticket id for wait()/result()."""
+    ticket = _Ticket(user_id, race_id, driver_name)
+    ticket_id = next(_ids)
+    with _cond:
+        if not _workers:
+            _start_workers()
+        _expire_tickets()
+        _tickets[ticket_id] = ticket
+        _stats['submitted'] += 1
+
+        previous = _queue.get(user_id)
+        if previous is not None:
+            # Same place in line, newest pick and submission time
+            _stats['replaced'] += 1
+            previous.finish((False, "Replaced by your newer pick"))
+        elif len(_queue) >= MAX_QUEUED:
+            _stats['rejected'] += 1
+            ticket.finish(BUSY)
+            return ticket_id
+
+        _queue[user_id] = ticket
+        _stats['max_queued'] = max(_stats['max_queued'], len(_queue))
+        _cond.notify()
+    return ticket_id
+
+
+def wait(ticket_id: int, timeout: float) -> Optional[Tuple[bool, str]]:
+    """The pick's (success, message), or None if it is still pending after timeout seconds"""
+    ticket = _tickets.get(ticket_id)
+    if ticket is None:
+        return (False, "This pick submission has expired; please check your current pick")
+    ticket.done.wait(timeout)
+    return ticket.result
+
+
+def result(ticket_id: int) -> Optional[Tuple[bool, str]]:
+    """Poll a ticket without waiting"""
+    return wait(ticket_id, 0)
+
+
+def submitted_at(ticket_id: int) -> Optional[datetime]:
+    ticket = _tickets.get(ticket_id)
+    return ticket.submitted_at if ticket else None
+
+
+def stats() -> Dict:
+    """Queue and throughput counters for this process"""
+    with _cond:
+        return dict(_stats, queued=len(_queue), workers=len(_workers))
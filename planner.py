@@ -0,0 +1,219 @@
+"""
+Season pick planner for the one-and-done format.
+
+Each user has to spend every remaining driver on at most one remaining race,
+which is a linear assignment problem: drivers x races with the expected points
+of driver d at race r's track as the payoff. The expected-points matrix is built
+from historical results by track and solved with a NumPy Hungarian algorithm.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import database as db
+import results_store
+
+# How many "virtual starts" of a driver's overall average are blended into
+# their average at a specific track. Keeps one lucky run from dominating.
+PRIOR_STARTS = 2.0
+
+
+def solve_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum-cost assignment for a rectangular cost matrix (Hungarian algorithm).
+
+    Returns (row_indices, col_indices) like scipy's linear_sum_assignment; every
+    row is assigned when rows <= columns, otherwise every column is.
+    """
+    cost = np.asarray(cost, dtype=float)
+    if cost.size == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+
+    # Shortest augmenting path formulation with 1-based rows/columns; column 0
+    # is the virtual start of each augmenting path.
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)    # p[j] = row assigned to column j
+    way = np.zeros(m + 1, dtype=int)  # previous column on the augmenting path
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free & (reduced < minv[1:])
+            minv[1:][improve] = reduced[improve]
+            way[1:][improve] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.nonzero(p[1:])[0]
+    rows = p[1:][cols] - 1
+    if transposed:
+        rows, cols = cols, rows
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+def expected_points_from_codes(d_idx: np.ndarray, t_idx: np.ndarray, points: np.ndarray,
+                               n_drivers: int, n_tracks: int,
+                               prior_starts: float = PRIOR_STARTS) -> np.ndarray:
+    """Build a drivers x tracks matrix of expected points from int-coded results.
+
+    d_idx/t_idx index into the requested drivers/tracks; a t_idx of -1 marks a
+    result at a track that is not requested, which only feeds the driver's
+    overall average. A driver's average at a track is shrunk toward their
+    overall average, which is in turn shrunk toward the field average, so
+    drivers with little or no history at a track still get a sensible estimate.
+    """
+    if len(points) == 0:
+        return np.zeros((n_drivers, n_tracks))
+
+    points = np.asarray(points, dtype=float)
+    field_avg = points.mean()
+
+    driver_sum = np.bincount(d_idx, weights=points, minlength=n_drivers)
+    driver_starts = np.bincount(d_idx, minlength=n_drivers)
+    driver_avg = (driver_sum + prior_starts * field_avg) / (driver_starts + prior_starts)
+
+    on_schedule = t_idx >= 0
+    flat = d_idx[on_schedule] * n_tracks + t_idx[on_schedule]
+    track_sum = np.bincount(flat, weights=points[on_schedule],
+                            minlength=n_drivers * n_tracks).reshape(n_drivers, n_tracks)
+    track_starts = np.bincount(flat, minlength=n_drivers * n_tracks).reshape(n_drivers, n_tracks)
+
+    return (track_sum + prior_starts * driver_avg[:, None]) / (track_starts + prior_starts)
+
+
+def _history_codes(history: List[Dict], drivers: Sequence[str],
+                   tracks: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Int-code result dicts against the requested drivers and tracks"""
+    driver_index = {name: i for i, name in enumerate(drivers)}
+    track_index = {name: i for i, name in enumerate(tracks)}
+    rows = [(driver_index[h['driver_name']], track_index.get(h['track'], -1), h['points'])
+            for h in history if h['driver_name'] in driver_index]
+    if not rows:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+    d_idx, t_idx, points = (np.array(column) for column in zip(*rows))
+    return d_idx.astype(int), t_idx.astype(int), points.astype(float)
+
+
+def build_expected_points(history: List[Dict], drivers: Sequence[str], tracks: Sequence[str],
+                          prior_starts: float = PRIOR_STARTS) -> np.ndarray:
+    """Build a drivers x tracks matrix of expected points from result dicts"""
+    d_idx, t_idx, points = _history_codes(history, drivers, tracks)
+    return expected_points_from_codes(d_idx, t_idx, points, len(drivers), len(tracks), prior_starts)
+
+
+def _plan_from_matrix(expected: np.ndarray, drivers: Sequence[str], races: List[Dict],
+                      used: set) -> Dict:
+    """Solve one user's plan given the shared expected-points matrix"""
+    available = [i for i, name in enumerate(drivers) if name not in used]
+    if not available or not races:
+        return {'recommended': None, 'plan': [], 'expected_total': 0.0}
+
+    # Columns of `expected` are races here; maximize points == minimize -points
+    sub = expected[available]
+    race_rows, driver_cols = solve_assignment(-sub.T)
+
+    plan = []
+    for r, c in zip(race_rows, driver_cols):
+        race = races[r]
+        plan.append({
+            'race_id': race['id'],
+            'race_number': race['race_number'],
+            'race_name': race['race_name'],
+            'track': race['track'],
+            'driver_name': drivers[available[c]],
+            'expected_points': float(sub[c, r]),
+        })
+
+    recommended = plan[0] if plan and plan[0]['race_id'] == races[0]['id'] else None
+    return {
+        'recommended': recommended,
+        'plan': plan,
+        'expected_total': float(sum(p['expected_points'] for p in plan)),
+    }
+
+
+def remaining_schedule(drivers: Sequence[str], history: Optional[List[Dict]] = None) -> Tuple[List[Dict], np.ndarray]:
+    """Remaining races and the drivers x remaining races expected-points matrix.
+
+    Combines this season's results from the database with earlier seasons from
+    the columnar results store, when one has been built.
+    """
+    races = [r for r in db.get_all_races() if not r['is_completed']]
+    if history is None:
+        history = db.get_track_history()
+
+    tracks = sorted({r['track'] for r in races})
+    d_idx, t_idx, points = _history_codes(history, drivers, tracks)
+
+    store = results_store.open_store()
+    if store is not None and len(store):
+        # Seasons already in the database come from there, not the store
+        db_seasons = {int(str(h['race_date'])[:4]) for h in history}
+        rows = ~store.season_mask(db_seasons)
+        store_d = store.remap_drivers(drivers)[rows]
+        store_t = store.remap_tracks(tracks)[rows]
+        store_points = store.points[rows]
+        known = store_d >= 0
+        d_idx = np.concatenate([d_idx, store_d[known]])
+        t_idx = np.concatenate([t_idx, store_t[known]])
+        points = np.concatenate([points, store_points[known]])
+
+    by_track = expected_points_from_codes(d_idx, t_idx, points, len(drivers), len(tracks))
+    track_cols = [tracks.index(r['track']) for r in races]
+    return races, by_track[:, track_cols]
+
+
+def plan_season(user_id: int, drivers: Sequence[str], history: Optional[List[Dict]] = None) -> Dict:
+    """Optimal plan of remaining drivers over remaining races for one user.
+
+    Returns {'recommended': plan entry for the next race or None,
+             'plan': [{race_id, race_number, race_name, track, driver_name, expected_points}],
+             'expected_total': float}
+    A pending pick for an upcoming race does not block that driver; only picks
+    for completed races are treated as used.
+    """
+    races, expected = remaining_schedule(drivers, history)
+    used = {p['driver_name'] for p in db.get_user_picks(user_id) if p['is_completed']}
+    return _plan_from_matrix(expected, drivers, races, used)
+
+
+def plan_all_users(drivers: Sequence[str], history: Optional[List[Dict]] = None) -> Dict[int, Dict]:
+    """Batch mode: plan_season for every user, sharing one schedule/history load"""
+    races, expected = remaining_schedule(drivers, history)
+
+    used_by_user = {user['id']: set() for user in db.get_all_users()}
+    for pick in db.get_completed_picks():
+        used_by_user.setdefault(pick['user_id'], set()).add(pick['driver_name'])
+
+    return {user_id: _plan_from_matrix(expected, drivers, races, used)
+            for user_id, used in used_by_user.items()}
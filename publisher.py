@@ -0,0 +1,197 @@
+"""
+Static snapshot publisher
+
+After enter_race_results commits, the standings and the race's picks and
+results are rendered to files under static/, which Streamlit serves at
+/app/static/ (server.enableStaticServing in .streamlit/config.toml). Readers
+and bots can fetch these with no database queries at all.
+
+Publishing a race only rewrites what that race changed:
+    leaderboard.json / leaderboard.html     standings with ranks
+    races.json                              schedule and completion status
+    driver_usage.json                       picks and points per driver, completed races
+    races/<race_number>/picks.json|html     that race's picks
+    races/<race_number>/results.json        that race's results
+Every file is written to a temp file and swapped in with os.replace, so a
+reader never sees a partial file. manifest.json records when each artifact
+was last published.
+
+Usage:
+    python publisher.py --race 12      # republish one race's artifacts
+    python publisher.py --all          # rebuild everything
+"""
+import argparse
+import html
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List
+
+import database as db
+import routing
+
+STATIC_DIR = os.environ.get('STATIC_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+
+# Publishes from concurrent results entries run one at a time
+_publish_lock = threading.Lock()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _write_atomic(relative_path: str, content: str):
+    """Write a file under STATIC_DIR by renaming a finished temp file over it"""
+    path = os.path.join(STATIC_DIR, relative_path)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_json(relative_path: str, data) -> str:
+    _write_atomic(relative_path, json.dumps(data, default=_json_default, indent=1))
+    return relative_path
+
+
+def _html_table(title: str, columns: List[tuple], rows: Iterable[Dict]) -> str:
+    """A standalone HTML page with one table; columns are (key, heading) pairs"""
+    head = ''.join(f"<th>{html.escape(heading)}</th>" for _, heading in columns)
+    body = ''.join(
+        '<tr>' + ''.join(f"<td>{html.escape('' if row[key] is None else str(row[key]))}</td>" for key, _ in columns) + '</tr>'
+        for row in rows
+    )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f"<title>{html.escape(title)}</title>"
+        '<style>body{font-family:sans-serif}table{border-collapse:collapse}'
+        'td,th{padding:4px 10px;border-bottom:1px solid #ddd;text-align:left}</style>'
+        f"</head><body><h1>{html.escape(title)}</h1>"
+        f"<p>Updated {datetime.now().strftime('%Y-%m-%d %H:%M')}</p>"
+        f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></body></html>"
+    )
+
+
+def publish_leaderboard() -> List[str]:
+    leaderboard = [dict(row) for row in db.iter_ranked_leaderboard()]
+    _write_json('leaderboard.json', {'leaderboard': leaderboard})
+    _write_atomic('leaderboard.html', _html_table(
+        "NASCAR 36 for 36 Standings",
+        [('rank', 'Rank'), ('username', 'Username'), ('total_points', 'Points'), ('picks_made', 'Picks')],
+        leaderboard
+    ))
+    return ['leaderboard.json', 'leaderboard.html']
+
+
+def publish_schedule() -> List[str]:
+    return [_write_json('races.json', {'races': [dict(race) for race in db.get_all_races()]})]
+
+
+def publish_driver_usage() -> List[str]:
+    return [_write_json('driver_usage.json', {'drivers': [dict(row) for row in db.get_driver_usage()]})]
+
+
+def publish_race_files(race) -> List[str]:
+    """Picks and results for one race; picks are only published once they are visible"""
+    prefix = f"races/{race['race_number']}"
+    written = [_write_json(f"{prefix}/results.json", {
+        'race': dict(race),
+        'results': [dict(row) for row in db.iter_race_results(race['id'])],
+    })]
+    if db.picks_visible(race):
+        picks = [dict(row) for row in db.iter_race_picks(race['id'])]
+        written.append(_write_json(f"{prefix}/picks.json", {'race': dict(race), 'picks': picks}))
+        _write_atomic(f"{prefix}/picks.html", _html_table(
+            f"Race {race['race_number']}: {race['race_name']} Picks",
+            [('username', 'Username'), ('driver_name', 'Driver'), ('points', 'Points')],
+            sorted(picks, key=lambda p: (-(p['points'] or 0), p['username']))
+        ))
+        written.append(f"{prefix}/picks.html")
+    return written
+
+
+def _update_manifest(written: List[str]):
+    path = os.path.join(STATIC_DIR, 'manifest.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    stamp = datetime.now().isoformat(timespec='seconds')
+    for artifact in written:
+        manifest[artifact] = stamp
+    _write_json('manifest.json', manifest)
+
+
+def publish_race(race_id: int) -> List[str]:
+    """Republish the artifacts a results entry for this race changed. Returns the files written."""
+    # Read from the primary: a replica may not have the results that were just committed
+    with _publish_lock, routing.use_primary():
+        race = db.get_race_by_id(race_id)
+        if not race:
+            return []
+        written = publish_leaderboard() + publish_schedule() + publish_driver_usage() + publish_race_files(race)
+        _update_manifest(written)
+    return written
+
+
+def publish_all() -> List[str]:
+    """Rebuild every artifact"""
+    with _publish_lock, routing.use_primary():
+        written = publish_leaderboard() + publish_schedule() + publish_driver_usage()
+        for race in db.get_all_races():
+            written += publish_race_files(race)
+        _update_manifest(written)
+    return written
+
+
+def publish_race_async(race_id: int):
+    """Publish in a background thread so the admin's results entry isn't held up"""
+    def run():
+        try:
+            publish_race(race_id)
+        except Exception as e:
+            print(f"Error publishing static files for race {race_id}: {e}")
+    threading.Thread(target=run, daemon=True).start()
+
+
+def publish_all_async():
+    """Rebuild everything in a background thread, e.g. after a season rescore"""
+    def run():
+        try:
+            publish_all()
+        except Exception as e:
+            print(f"Error publishing static files: {e}")
+    threading.Thread(target=run, daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render standings, picks and results to static files")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--race', type=int, help="Race number to republish")
+    group.add_argument('--all', action='store_true', help="Rebuild every artifact")
+    args = parser.parse_args()
+
+    if args.all:
+        written = publish_all()
+    else:
+        race = next((r for r in db.get_all_races() if r['race_number'] == args.race), None)
+        if not race:
+            parser.error(f"No race number {args.race}")
+        written = publish_race(race['id'])
+    print(f"✓ Published {len(written)} files to {STATIC_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Columnar on-disk store for multi-season historical race results.
+
+Each column is a NumPy .npy file that is memory-mapped on open, so analytics
+read straight from the page cache instead of pulling rows through the DB.
+Every write builds a new version directory and then points CURRENT at it with
+a single rename, so a reader sees either the old store or the new one:
+
+    <store>/CURRENT                   name of the live version directory
+    <store>/<version>/manifest.json   row count, column dtypes, driver and track dictionaries
+    <store>/<version>/season.npy      int16
+    <store>/<version>/race.npy        int16  (race number within the season)
+    <store>/<version>/track.npy       int16  (code into manifest["tracks"])
+    <store>/<version>/driver.npy      int16  (code into manifest["drivers"])
+    <store>/<version>/finish.npy      int16
+    <store>/<version>/points.npy      int16
+
+Stores written before versioning, with the files directly in <store>, still
+open and are converted by the next write.
+
+Usage:
+    python results_store.py import-csv history.csv
+    python results_store.py import-db
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_STORE_PATH = os.environ.get('RESULTS_STORE_PATH', os.path.join('data', 'results_store'))
+MANIFEST_FILE = 'manifest.json'
+POINTER_FILE = 'CURRENT'
+STORE_VERSION = 1
+
+COLUMNS = {
+    'season': np.int16,
+    'race': np.int16,
+    'track': np.int16,
+    'driver': np.int16,
+    'finish': np.int16,
+    'points': np.int16,
+}
+
+
+class ResultsStore:
+    """Read-only, memory-mapped view over a results store directory"""
+
+    def __init__(self, path: str, manifest: Dict, columns: Dict[str, np.ndarray]):
+        self.path = path
+        self.manifest = manifest
+        self.drivers: List[str] = manifest['drivers']
+        self.tracks: List[str] = manifest['tracks']
+        self._driver_codes = {name: i for i, name in enumerate(self.drivers)}
+        self._track_codes = {name: i for i, name in enumerate(self.tracks)}
+        self.season = columns['season']
+        self.race = columns['race']
+        self.track = columns['track']
+        self.driver = columns['driver']
+        self.finish = columns['finish']
+        self.points = columns['points']
+
+    @classmethod
+    def open(cls, path: str = DEFAULT_STORE_PATH) -> 'ResultsStore':
+        """Open a store; columns are memory-mapped, nothing is copied"""
+        version = _current_version(path)
+        if version is None:
+            raise FileNotFoundError(f"No results store at {path}")
+        with open(os.path.join(version, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported results store version: {manifest.get('version')}")
+
+        columns = {}
+        for name in COLUMNS:
+            if manifest['rows']:
+                columns[name] = np.load(os.path.join(version, f'{name}.npy'), mmap_mode='r')
+            else:
+                # np.load cannot memory-map zero-length arrays
+                columns[name] = np.empty(0, dtype=COLUMNS[name])
+        return cls(path, manifest, columns)
+
+    def __len__(self) -> int:
+        return self.manifest['rows']
+
+    @property
+    def seasons(self) -> List[int]:
+        return self.manifest['seasons']
+
+    def driver_code(self, name: str) -> int:
+        """Code for a driver name, or -1 if the store has never seen them"""
+        return self._driver_codes.get(name, -1)
+
+    def track_code(self, name: str) -> int:
+        """Code for a track name, or -1 if the store has never seen it"""
+        return self._track_codes.get(name, -1)
+
+    def remap_drivers(self, names: Sequence[str]) -> np.ndarray:
+        """Per-row index into `names` for each row's driver (-1 when not in `names`)"""
+        lookup = np.full(len(self.drivers), -1, dtype=np.int32)
+        for i, name in enumerate(names):
+            code = self.driver_code(name)
+            if code >= 0:
+                lookup[code] = i
+        return lookup[self.driver]
+
+    def remap_tracks(self, names: Sequence[str]) -> np.ndarray:
+        """Per-row index into `names` for each row's track (-1 when not in `names`)"""
+        lookup = np.full(len(self.tracks), -1, dtype=np.int32)
+        for i, name in enumerate(names):
+            code = self.track_code(name)
+            if code >= 0:
+                lookup[code] = i
+        return lookup[self.track]
+
+    def season_mask(self, seasons: Iterable[int]) -> np.ndarray:
+        """Boolean row mask for the given seasons"""
+        return np.isin(self.season, list(seasons))
+
+
+def _current_version(path: str) -> Optional[str]:
+    """Directory holding the live version of the store at path, or None if none has been built"""
+    try:
+        with open(os.path.join(path, POINTER_FILE)) as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        pass
+    if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return path  # written before versioning
+    return None
+
+
+def open_store(path: str = DEFAULT_STORE_PATH) -> Optional[ResultsStore]:
+    """Open the store if one has been built, otherwise None"""
+    if _current_version(path) is None:
+        return None
+    return ResultsStore.open(path)
+
+
+def _retire_versions(path: str, live: str, previous: Optional[str]):
+    """Remove version directories other than the live one and the one it replaced.
+    
+    The replaced version is kept until the next write for readers that read
+    CURRENT just before the swap; readers holding memmaps of older versions
+    keep their (unlinked) files.
+    """
+    keep = {live, previous}
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False) and entry.path not in keep:
+            shutil.rmtree(entry.path, ignore_errors=True)
+    if previous == path:
+        # The files of a store written before versioning sit in path itself
+        for name in [MANIFEST_FILE] + [f'{column}.npy' for column in COLUMNS]:
+            try:
+                os.remove(os.path.join(path, name))
+            except FileNotFoundError:
+                pass
+
+
+def write_store(rows: List[Dict], path: str = DEFAULT_STORE_PATH, replace_races: bool = True) -> int:
+    """Write result rows into the store, merging with what is already there.
+
+    Rows are dicts with season, race_number, track, driver_name, finish_position
+    and points. When replace_races is set, any stored rows for a (season, race)
+    present in `rows` are dropped first, so re-importing a race is idempotent.
+    The new store is built in a fresh version directory and swapped in by
+    renaming a new CURRENT pointer over the old one, so readers never see a
+    half-written column or a missing store.
+    Returns the total number of rows in the store.
+    """
+    existing = open_store(path)
+    drivers = list(existing.drivers) if existing else []
+    tracks = list(existing.tracks) if existing else []
+    driver_codes = {name: i for i, name in enumerate(drivers)}
+    track_codes = {name: i for i, name in enumerate(tracks)}
+
+    def code(codes: Dict[str, int], names: List[str], name: str) -> int:
+        if name not in codes:
+            codes[name] = len(names)
+            names.append(name)
+        return codes[name]
+
+    new = {name: np.empty(len(rows), dtype=dtype) for name, dtype in COLUMNS.items()}
+    for i, row in enumerate(rows):
+        new['season'][i] = int(row['season'])
+        new['race'][i] = int(row['race_number'])
+        new['track'][i] = code(track_codes, tracks, str(row['track']).strip())
+        new['driver'][i] = code(driver_codes, drivers, str(row['driver_name']).strip())
+        new['finish'][i] = int(row['finish_position'])
+        new['points'][i] = int(row['points'])
+
+    if existing is not None and len(existing):
+        keep = np.ones(len(existing), dtype=bool)
+        if replace_races and rows:
+            stored_keys = existing.season.astype(np.int32) * 1000 + existing.race
+            new_keys = np.unique(new['season'].astype(np.int32) * 1000 + new['race'])
+            keep = ~np.isin(stored_keys, new_keys)
+        merged = {name: np.concatenate([np.asarray(getattr(existing, name))[keep], new[name]])
+                  for name in COLUMNS}
+    else:
+        merged = new
+
+    # Keep rows in (season, race, finish) order so season/race slices are contiguous
+    order = np.lexsort((merged['finish'], merged['race'], merged['season']))
+    merged = {name: np.ascontiguousarray(column[order]) for name, column in merged.items()}
+
+    manifest = {
+        'version': STORE_VERSION,
+        'rows': int(len(order)),
+        'columns': {name: np.dtype(dtype).name for name, dtype in COLUMNS.items()},
+        'drivers': drivers,
+        'tracks': tracks,
+        'seasons': sorted(int(s) for s in np.unique(merged['season'])),
+    }
+
+    os.makedirs(path, exist_ok=True)
+    previous = _current_version(path)
+    version = tempfile.mkdtemp(prefix=time.strftime('v%Y%m%d%H%M%S_'), dir=path)
+    for name, column in merged.items():
+        np.save(os.path.join(version, f'{name}.npy'), column)
+    with open(os.path.join(version, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    fd, pointer = tempfile.mkstemp(prefix=f'.{POINTER_FILE}_', dir=path)
+    with os.fdopen(fd, 'w') as f:
+        f.write(os.path.basename(version))
+    os.replace(pointer, os.path.join(path, POINTER_FILE))
+
+    _retire_versions(path, version, previous)
+    return manifest['rows']
+
+
+def import_csv(csv_path: str, path: str = DEFAULT_STORE_PATH, season: Optional[int] = None,
+               race_number: Optional[int] = None, track: Optional[str] = None) -> int:
+    """Import a results CSV into the store.
+
+    Expects columns season, race_number, track, driver_name, finish_position and
+    points. A single-race file in the admin upload format (driver_name,
+    total_points) also works when season, race_number and track are given;
+    finish positions are then assigned by points like the admin panel does.
+    """
+    with open(csv_path, newline='') as f:
+        records = list(csv.DictReader(f))
+
+    single_race = records and 'season' not in records[0]
+    if single_race:
+        if season is None or race_number is None or track is None:
+            raise ValueError("Single-race CSVs need season, race_number and track")
+        records.sort(key=lambda r: int(r['total_points']), reverse=True)
+
+    rows = []
+    for i, record in enumerate(records):
+        points = record.get('points', record.get('total_points'))
+        rows.append({
+            'season': season if single_race else record['season'],
+            'race_number': race_number if single_race else record['race_number'],
+            'track': track if single_race else record['track'],
+            'driver_name': record['driver_name'],
+            'finish_position': i + 1 if single_race else record['finish_position'],
+            'points': points,
+        })
+    return write_store(rows, path)
+
+
+def import_from_db(season: Optional[int] = None, path: str = DEFAULT_STORE_PATH) -> int:
+    """Import the results entered in the database, each under its race's season.
+    
+    A race's season is the year of its race_date. With season, only that
+    season's races are imported.
+    """
+    import database as db
+
+    rows = [dict(h, season=int(str(h['race_date'])[:4])) for h in db.get_track_history()]
+    if season is not None:
+        rows = [row for row in rows if row['season'] == season]
+    return write_store(rows, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the columnar historical results store")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Store directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    csv_cmd = commands.add_parser('import-csv', help="Import results from a CSV file")
+    csv_cmd.add_argument('csv_path')
+    csv_cmd.add_argument('--season', type=int)
+    csv_cmd.add_argument('--race-number', type=int)
+    csv_cmd.add_argument('--track')
+
+    db_cmd = commands.add_parser('import-db', help="Import the results currently in the database")
+    db_cmd.add_argument('--season', type=int, help="Only import this season's races")
+
+    commands.add_parser('info', help="Show what the store contains")
+
+    args = parser.parse_args()
+
+    if args.command == 'import-csv':
+        total = import_csv(args.csv_path, args.store, args.season, args.race_number, args.track)
+        print(f"✓ Store now holds {total} results")
+    elif args.command == 'import-db':
+        total = import_from_db(args.season, args.store)
+        print(f"✓ Store now holds {total} results")
+    else:
+        store = open_store(args.store)
+        if store is None:
+            print(f"No results store at {args.store}")
+            return
+        print(f"Results: {len(store)}")
+        print(f"Seasons: {', '.join(str(s) for s in store.seasons)}")
+        print(f"Drivers: {len(store.drivers)}  Tracks: {len(store.tracks)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Read-replica routing for database.py
+
+Functions decorated with @read_only open their connections on a replica when
+replicas are configured; everything else goes to the primary. After a user's
+own write, that user's reads stay on the primary for a short window so they
+always see what they just wrote (read-your-writes), and replicas lagging more
+than the configured threshold are skipped.
+
+Configure in .streamlit/secrets.toml:
+
+    [database]
+    connection_string = "postgresql://primary/..."
+    replicas = ["postgresql://replica-1/...", "postgresql://replica-2/..."]
+    max_replica_lag_seconds = 5
+"""
+import functools
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+DEFAULT_MAX_LAG_SECONDS = 5.0
+
+# Replica lag is measured at most this often per replica
+LAG_CHECK_INTERVAL_SECONDS = 10.0
+
+# None: caller decides (primary), 'replica': inside a read-only function, 'primary': forced
+_route: ContextVar[Optional[str]] = ContextVar('db_route', default=None)
+_current_user: ContextVar[Optional[int]] = ContextVar('db_current_user', default=None)
+
+_last_write: Dict[int, float] = {}
+_replica_lag: Dict[str, tuple] = {}
+_lag_lock = threading.Lock()
+_round_robin = itertools.count()
+
+
+def read_only(func):
+    """Mark a database function as safe to serve from a replica"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _route.get() is not None:
+            return func(*args, **kwargs)
+        token = _route.set('replica')
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _route.reset(token)
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """Send every query in this block to the primary, read-only or not"""
+    token = _route.set('primary')
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def set_current_user(user_id: Optional[int]):
+    """Tell the router whose request this is, for read-your-writes stickiness"""
+    _current_user.set(user_id)
+
+
+@contextmanager
+def acting_as(user_id: Optional[int]):
+    """Attribute queries in this block to a user, e.g. a write made for them by a worker thread"""
+    token = _current_user.set(user_id)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+def _max_lag(settings: Dict) -> float:
+    return float(settings.get('max_replica_lag_seconds', DEFAULT_MAX_LAG_SECONDS))
+
+
+def _lag_seconds(dsn: str) -> float:
+    """Replication lag of a replica, cached for LAG_CHECK_INTERVAL_SECONDS"""
+    now = time.monotonic()
+    with _lag_lock:
+        cached = _replica_lag.get(dsn)
+        if cached and now - cached[0] < LAG_CHECK_INTERVAL_SECONDS:
+            return cached[1]
+
+    import psycopg2
+
+    try:
+        conn = psycopg2.connect(dsn, connect_timeout=2)
+        try:
+            cursor = conn.cursor()
+            # An idle primary makes replay timestamps look old, so a fully
+            # replayed replica counts as zero lag
+            cursor.execute('''
+                SELECT CASE
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+                END
+            ''')
+            lag = float(cursor.fetchone()[0])
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Replica unavailable, routing reads to primary: {e}")
+        lag = float('inf')
+
+    with _lag_lock:
+        _replica_lag[dsn] = (now, lag)
+    return lag
+
+
+def choose_dsn(settings: Dict) -> str:
+    """Pick the DSN for the connection about to be opened.
+
+    Connections opened outside a read-only function count as a write by the
+    current user and pin that user's reads to the primary for the lag window.
+    """
+    primary = settings.get('connection_string', '')
+    route = _route.get()
+    user_id = _current_user.get()
+    max_lag = _max_lag(settings)
+
+    if route != 'replica':
+        if route is None and user_id is not None:
+            _last_write[user_id] = time.monotonic()
+        return primary
+
+    replicas = list(settings.get('replicas') or [])
+    if not replicas:
+        return primary
+
+    last_write = _last_write.get(user_id) if user_id is not None else None
+    if last_write is not None and time.monotonic() - last_write < max_lag:
+        return primary
+
+    healthy = [dsn for dsn in replicas if _lag_seconds(dsn) <= max_lag]
+    if not healthy:
+        return primary
+    return healthy[next(_round_robin) % len(healthy)]
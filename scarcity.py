@@ -0,0 +1,110 @@
+"""
+Field-wide driver scarcity
+
+How many entrants still have each driver, and how many are projected to pick
+each one at the upcoming races. Every user's used-driver mask (see
+driver_masks.py) is read in one query and unpacked into a users x drivers
+availability matrix with NumPy, so the whole field is a few array operations
+instead of a get_used_drivers call per user.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import database as db
+import planner
+
+# Upcoming races shown in the projected-ownership heatmap
+UPCOMING_RACES = 6
+
+
+def availability_matrix(masks: Sequence[bytes], n_bits: int) -> np.ndarray:
+    """users x n_bits bool matrix, True where the user has not used the driver with that id"""
+    width = (n_bits + 7) // 8
+    if not masks or not width:
+        return np.ones((len(masks), n_bits), dtype=bool)
+    packed = b''.join(mask[:width].ljust(width, b'\0') for mask in masks)
+    used = np.unpackbits(np.frombuffer(packed, dtype=np.uint8).reshape(len(masks), width),
+                         axis=1, bitorder='little')[:, :n_bits]
+    return used == 0
+
+
+def driver_columns(masks: Sequence[bytes], hidden: Sequence[Sequence[int]],
+                   ids: Sequence[int]) -> np.ndarray:
+    """users x drivers availability for drivers with these ids (-1 for a driver nobody has picked).
+
+    Bits of hidden picks are treated as still available.
+    """
+    ids = np.asarray(ids, dtype=int)
+    n_bits = int(ids.max()) + 1 if len(ids) else 0
+    by_id = availability_matrix(masks, n_bits)
+
+    rows = np.repeat(np.arange(len(hidden)), [len(h) for h in hidden])
+    cols = np.fromiter((driver_id for h in hidden for driver_id in h), dtype=int, count=len(rows))
+    in_range = cols < n_bits
+    by_id[rows[in_range], cols[in_range]] = True
+
+    available = np.ones((len(masks), len(ids)), dtype=bool)
+    known = ids >= 0
+    available[:, known] = by_id[:, ids[known]]
+    return available
+
+
+def project_ownership(available: np.ndarray, expected: np.ndarray) -> np.ndarray:
+    """Expected number of users picking each driver at each race (drivers x races).
+
+    Each user is assumed to pick among the drivers they still have in
+    proportion to those drivers' expected points at the race's track. Races
+    are projected independently from today's availability, so a driver can
+    be counted at more than one of them.
+    """
+    weights = np.clip(expected, 0, None)
+    # A race with no history to go on spreads evenly over the available drivers
+    weights = np.where(weights.sum(axis=0) > 0, weights, 1.0)
+    available = available.astype(float)
+    totals = available @ weights
+    inverse = np.divide(1.0, totals, out=np.zeros_like(totals), where=totals > 0)
+    return weights * (available.T @ inverse)
+
+
+def build_scarcity(drivers: Sequence[str], hide_after: Optional[str] = None,
+                   upcoming: int = UPCOMING_RACES) -> Optional[Dict]:
+    """Remaining owners per driver and projected ownership at the next races.
+
+    Returns None if there are no users, otherwise {'users': int,
+    'drivers': [names], 'owners': array per driver, 'races': [race dicts],
+    'projected': drivers x races array of expected pickers}. With hide_after,
+    picks for races after that date don't count as used (see
+    database.get_all_driver_masks).
+    """
+    rows = db.get_all_driver_masks(hide_after)
+    if not rows:
+        return None
+    _, masks, hidden = zip(*rows)
+
+    driver_ids = db.get_driver_ids(refresh=True)
+    available = driver_columns(masks, hidden, [driver_ids.get(name, -1) for name in drivers])
+
+    races, expected = planner.remaining_schedule(drivers)
+    races, expected = races[:upcoming], expected[:, :upcoming]
+    return {
+        'users': len(rows),
+        'drivers': list(drivers),
+        'owners': available.sum(axis=0),
+        'races': races,
+        'projected': project_ownership(available, expected),
+    }
+
+
+def heatmap_rows(scarcity: Dict) -> Tuple[List[Dict], List[Dict]]:
+    """Long-form (owners, projected) rows for charting"""
+    owners = [{'driver_name': name, 'owners': int(count),
+               'share': float(count) / scarcity['users']}
+              for name, count in zip(scarcity['drivers'], scarcity['owners'])]
+    projected = [{'driver_name': name,
+                  'race': f"{race['race_number']}. {race['track']}",
+                  'race_number': race['race_number'],
+                  'projected': float(scarcity['projected'][d, r])}
+                 for d, name in enumerate(scarcity['drivers'])
+                 for r, race in enumerate(scarcity['races'])]
+    return owners, projected
@@ -0,0 +1,167 @@
+"""
+Scoring rules engine
+
+Results store each driver's raw race data (finish position, stage finishes,
+fastest lap); the rules turn that into driver points and then into the points
+a pick earns:
+
+    driver points = finish table[finish] + stage table[stage 1] + stage table[stage 2]
+                    + fastest lap bonus
+    pick points   = driver points, times the win multiplier if the driver won
+
+Results entered as a total (the legacy total_points CSV) keep their entered
+driver points. Entrants with no pick for a completed race get the no-pick
+penalty as a score adjustment.
+
+rescore_season() recomputes every result and pick of the season in one
+vectorized pass and writes the changes back in bulk, e.g. after the rules change.
+
+Usage:
+    python scoring.py rescore
+    python scoring.py show
+"""
+import argparse
+import json
+import time
+from itertools import chain
+from typing import Dict, Sequence
+
+import numpy as np
+
+import database as db
+
+# 2026 Cup Series points (see the Rules page)
+DEFAULT_RULES = {
+    'finish_points': [55, 35, 34, 33, 32, 31, 30, 29, 28, 27,
+                      26, 25, 24, 23, 22, 21, 20, 19, 18, 17,
+                      16, 15, 14, 13, 12, 11, 10, 9, 8, 7,
+                      6, 5, 4, 3, 2, 1, 1, 1, 1, 1],
+    'stage_points': [10, 9, 8, 7, 6, 5, 4, 3, 2, 1],
+    'fastest_lap_points': 1,
+    'win_multiplier': 1.0,
+    'no_pick_penalty': 0,
+}
+
+
+def merge_rules(rules: Dict) -> Dict:
+    """Fill in any rule missing from a stored rule set with its default"""
+    return dict(DEFAULT_RULES, **(rules or {}))
+
+
+def table_points(table: Sequence[int], positions: np.ndarray) -> np.ndarray:
+    """Points for each position from a 1-based points table; 0 or beyond the table scores nothing"""
+    lookup = np.zeros(len(table) + 1, dtype=np.int64)
+    lookup[1:] = table
+    positions = np.asarray(positions, dtype=np.int64)
+    valid = (positions > 0) & (positions <= len(table))
+    return np.where(valid, lookup[np.where(valid, positions, 0)], 0)
+
+
+def driver_points(rules: Dict, finish, stage1, stage2, fastest_lap, entered, raw_scored) -> np.ndarray:
+    """Driver points per result row; rows without raw data keep their entered points"""
+    computed = (
+        table_points(rules['finish_points'], finish)
+        + table_points(rules['stage_points'], stage1)
+        + table_points(rules['stage_points'], stage2)
+        + np.asarray(fastest_lap, dtype=np.int64) * int(rules['fastest_lap_points'])
+    )
+    return np.where(np.asarray(raw_scored, dtype=bool), computed, np.asarray(entered, dtype=np.int64))
+
+
+def pick_points(rules: Dict, points: np.ndarray, finish: np.ndarray) -> np.ndarray:
+    """Contest points for picks of drivers with these driver points and finishes"""
+    multiplier = np.where(np.asarray(finish) == 1, float(rules['win_multiplier']), 1.0)
+    return np.rint(np.asarray(points) * multiplier).astype(np.int64)
+
+
+def score_picks(rules: Dict, result_race, result_driver, result_points, result_finish,
+                pick_race, pick_driver) -> np.ndarray:
+    """Points for every pick, matched to its driver's result in the same race.
+
+    Races and drivers are given as non-negative integer codes; picks whose
+    driver has no result in that race score 0.
+    """
+    result_race = np.asarray(result_race, dtype=np.int64)
+    result_driver = np.asarray(result_driver, dtype=np.int64)
+    pick_race = np.asarray(pick_race, dtype=np.int64)
+    pick_driver = np.asarray(pick_driver, dtype=np.int64)
+
+    n_drivers = int(max(result_driver.max(initial=-1), pick_driver.max(initial=-1))) + 1
+    n_races = int(max(result_race.max(initial=-1), pick_race.max(initial=-1))) + 1
+
+    # Dense race x driver table of what a pick of that driver earns
+    earned = np.zeros(n_races * n_drivers, dtype=np.int64)
+    earned[result_race * n_drivers + result_driver] = pick_points(rules, result_points, result_finish)
+    return earned[pick_race * n_drivers + pick_driver]
+
+
+def _int_matrix(rows: Sequence[tuple], width: int) -> np.ndarray:
+    """Rows of ints as a 2-D array; flattening first is much faster than np.array on tuples"""
+    return np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * width).reshape(-1, width)
+
+
+def compute_scores(rules: Dict, results: Sequence[tuple], picks: Sequence[tuple]) -> tuple:
+    """Score a season's results and picks; returns (result_updates, pick_updates).
+
+    results are (id, race_id, driver_code, finish, stage1, stage2, fastest_lap,
+    points, raw_scored) and picks are (id, race_id, driver_code, points), all
+    integers, as from database.get_scoring_inputs(). Each update is
+    (ids, points) for the rows whose points changed.
+    """
+    results = _int_matrix(results, 9)
+    picks = _int_matrix(picks, 4)
+    ids, race_ids, drivers, finish, stage1, stage2, fastest, entered, raw = results.T
+    pick_ids, pick_races, pick_drivers, pick_entered = picks.T
+
+    points = driver_points(rules, finish, stage1, stage2, fastest, entered, raw)
+    changed = points != entered
+    result_updates = (ids[changed].tolist(), points[changed].tolist())
+
+    scored = score_picks(rules, race_ids, drivers, points, finish, pick_races, pick_drivers)
+    changed = scored != pick_entered
+    pick_updates = (pick_ids[changed].tolist(), scored[changed].tolist())
+    return result_updates, pick_updates
+
+
+def rescore_season(rules: Dict = None) -> Dict:
+    """Recompute every result's and pick's points from the rules and write the changes back.
+
+    Returns {'results_updated', 'picks_updated', 'penalties', 'seconds'}, or
+    None if the season could not be read, scored or written.
+    """
+    start = time.perf_counter()
+    rules = merge_rules(rules if rules is not None else db.get_scoring_rules())
+    try:
+        result_updates, pick_updates = compute_scores(rules, *db.get_scoring_inputs())
+    except Exception as e:
+        print(f"Error rescoring season: {e}")
+        return None
+
+    penalties = db.apply_scores(result_updates, pick_updates, int(rules['no_pick_penalty']))
+    if penalties < 0:
+        return None
+    return {
+        'results_updated': len(result_updates[0]),
+        'picks_updated': len(pick_updates[0]),
+        'penalties': penalties,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring rules and full-season rescoring")
+    parser.add_argument('command', choices=['rescore', 'show'])
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        print(json.dumps(merge_rules(db.get_scoring_rules()), indent=2))
+    else:
+        report = rescore_season()
+        if report is None:
+            raise SystemExit("Rescore failed; no changes were written")
+        print(f"✓ Rescored in {report['seconds'] * 1000:.0f} ms: {report['results_updated']} results, "
+              f"{report['picks_updated']} picks updated, {report['penalties']} no-pick penalties")
+
+
+if __name__ == "__main__":
+    main()
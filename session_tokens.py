@@ -0,0 +1,240 @@
+"""
+Signed session tokens
+
+A login cookie holds a token that carries the user's id, name, email and
+admin flag with an expiry, signed with HMAC-SHA256:
+
+    v1.<base64url JSON claims>.<base64url signature>
+
+verify() checks it entirely in-process, so restoring a session on a new
+visit needs no query. Logging out and changing a password can't un-sign a
+token, so they are recorded in the database (revoked_tokens and
+users.tokens_valid_after) and every process keeps a copy of that revocation
+list, synced every SYNC_SECONDS in a background thread. Revocation times and
+the sync's high-water mark are both the database's clock, so app servers with
+skewed clocks don't miss revocations. A revocation made in this process
+applies immediately; other processes (e.g. api.py) pick it up within one sync.
+
+The admin flag in a token is as of login and isn't revoked with it: admin
+pages check database.is_admin against the users row before trusting it.
+
+Revoked ids are held in a set. Past BLOOM_THRESHOLD of them they go into a
+Bloom filter instead, and the rare token that hits the filter is confirmed
+against the database before being refused.
+
+Tokens without the v1. prefix are the old random tokens in the sessions
+table; database.verify_session still accepts those.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import math
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+TOKEN_PREFIX = 'v1.'
+TOKEN_LIFETIME = timedelta(days=30)
+
+SYNC_SECONDS = float(os.environ.get('SESSION_REVOCATION_SYNC', 30))
+BLOOM_THRESHOLD = int(os.environ.get('SESSION_BLOOM_THRESHOLD', 50000))
+BLOOM_ERROR_RATE = 0.001
+
+# Incremental syncs re-read this far back, so a revocation that commits late still arrives
+SYNC_OVERLAP = timedelta(minutes=2)
+# A full reload drops expired revocations and resizes the Bloom filter
+FULL_RELOAD_SECONDS = 3600
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(secret: bytes, payload: str) -> str:
+    return _b64(hmac.new(secret, payload.encode('ascii'), hashlib.sha256).digest())
+
+
+def is_signed(token: str) -> bool:
+    """Whether a token is in the signed format (otherwise it is a legacy sessions-table token)"""
+    return bool(token) and token.startswith(TOKEN_PREFIX)
+
+
+def issue(secret: bytes, user: Dict) -> str:
+    """Sign a new token for a user dict with id, username, email and is_admin"""
+    now = datetime.now()
+    claims = {
+        'id': user['id'],
+        'username': user['username'],
+        'email': user['email'],
+        'is_admin': user['is_admin'],
+        'iat': now.timestamp(),
+        'exp': (now + TOKEN_LIFETIME).timestamp(),
+        'jti': secrets.token_urlsafe(12),
+    }
+    payload = TOKEN_PREFIX + _b64(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return f"{payload}.{_sign(secret, payload)}"
+
+
+def decode(secret: bytes, token: str) -> Optional[Dict]:
+    """The token's claims if its signature is valid and it hasn't expired; revocation is not checked"""
+    if not is_signed(token):
+        return None
+    payload, _, signature = token.rpartition('.')
+    if not hmac.compare_digest(signature, _sign(secret, payload)):
+        return None
+    try:
+        claims = json.loads(_unb64(payload[len(TOKEN_PREFIX):]))
+    except ValueError:
+        return None
+    if claims.get('exp', 0) <= time.time():
+        return None
+    return claims
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """This process's copy of revoked token ids and per-user cutoffs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, datetime] = {}  # jti -> token expiry
+        self._bloom: Optional[BloomFilter] = None
+        self._valid_after: Dict[int, float] = {}  # user id -> tokens issued before this are revoked
+        self._synced_to: Optional[datetime] = None
+        self._full_reload_at = 0.0
+
+    def revoke(self, jti: str, expires_at: datetime):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            else:
+                self._revoked[jti] = expires_at
+
+    def revoke_user(self, user_id: int, at: datetime):
+        with self._lock:
+            self._valid_after[user_id] = max(self._valid_after.get(user_id, 0.0), at.timestamp())
+
+    def is_revoked(self, claims: Dict) -> bool:
+        if claims['iat'] <= self._valid_after.get(claims['id'], 0.0):
+            return True
+        if self._bloom is None:
+            return claims['jti'] in self._revoked
+        if claims['jti'] not in self._bloom:
+            return False
+        # Possible false positive; only now ask the database
+        import database as db
+        return db.is_token_revoked(claims['jti'])
+
+    def sync(self):
+        """Pull revocations from the database: everything hourly, otherwise what changed since the last sync"""
+        import database as db
+
+        full = time.monotonic() >= self._full_reload_at
+        since = None if full else self._synced_to - SYNC_OVERLAP
+        revoked, valid_after, read_at = db.get_token_revocations(since)
+
+        with self._lock:
+            if full:
+                self._revoked, self._bloom = {}, None
+                if len(revoked) > BLOOM_THRESHOLD:
+                    self._bloom = BloomFilter(2 * len(revoked))
+                self._full_reload_at = time.monotonic() + FULL_RELOAD_SECONDS
+            elif self._bloom is None:
+                now = datetime.now()
+                self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            for jti, (expires_at, _) in revoked.items():
+                if self._bloom is not None:
+                    self._bloom.add(jti)
+                else:
+                    self._revoked[jti] = expires_at
+            for user_id, at in valid_after.items():
+                self._valid_after[user_id] = max(self._valid_after.get(user_id, 0.0), at.timestamp())
+            self._synced_to = read_at
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'revoked': len(self._revoked),
+                'bloom_bits': self._bloom.size if self._bloom is not None else 0,
+                'users_cut_off': len(self._valid_after),
+                'synced_to': self._synced_to,
+            }
+
+
+_revocations = RevocationList()
+_sync_started = threading.Lock()
+_syncer = None
+
+
+def _sync_forever():
+    while True:
+        time.sleep(SYNC_SECONDS)
+        try:
+            _revocations.sync()
+        except Exception as e:
+            print(f"Error syncing session revocations: {e}")
+
+
+def _ensure_synced():
+    """Load the revocation list once, then keep it fresh in the background"""
+    global _syncer
+    if _syncer is not None:
+        return
+    with _sync_started:
+        if _syncer is None:
+            _revocations.sync()
+            _syncer = threading.Thread(target=_sync_forever, name="session-revocations", daemon=True)
+            _syncer.start()
+
+
+def verify(secret: bytes, token: str) -> Optional[Dict]:
+    """The user (id, username, email, is_admin) for a valid, unrevoked signed token"""
+    claims = decode(secret, token)
+    if claims is None:
+        return None
+    _ensure_synced()
+    if _revocations.is_revoked(claims):
+        return None
+    return {key: claims[key] for key in ('id', 'username', 'email', 'is_admin')}
+
+
+def revoked_locally(jti: str, expires_at: datetime):
+    """Apply a logout recorded in the database to this process right away"""
+    _revocations.revoke(jti, expires_at)
+
+
+def user_revoked_locally(user_id: int, at: datetime):
+    """Apply a password change recorded in the database to this process right away"""
+    _revocations.revoke_user(user_id, at)
+
+
+def stats() -> Dict:
+    return _revocations.stats()
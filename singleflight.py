@@ -0,0 +1,158 @@
+"""
+Single-flight request coalescing for hot database reads
+
+When results are posted, every open session reruns and asks for the same
+leaderboard at once. Functions decorated with @coalesced share one in-flight
+query between concurrent identical calls in this process, keep the result
+fresh for a short TTL, and after that serve the stale value while a single
+background refresh runs (stale-while-revalidate).
+"""
+import copy
+import functools
+import threading
+import time
+from typing import Callable, Dict, Hashable
+
+# Counters for every coalesced function in this process
+_stats = {
+    'calls': 0,       # total calls to coalesced functions
+    'hits': 0,        # served from a fresh cached value
+    'stale': 0,       # served a stale value while a refresh runs
+    'coalesced': 0,   # waited on another caller's in-flight query
+    'queries': 0,     # actually ran the underlying function
+    'refreshes': 0,   # background stale-while-revalidate refreshes
+    'errors': 0,
+}
+_stats_lock = threading.Lock()
+
+_registry = []
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class _Flight:
+    """One in-flight call that followers can wait on"""
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            _count('coalesced')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            _count('queries')
+            flight.value = fn()
+            return flight.value
+        except Exception as e:
+            _count('errors')
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+def coalesced(fresh_seconds: float = 2.0, stale_seconds: float = 30.0):
+    """Coalesce concurrent identical calls and cache results with stale-while-revalidate.
+
+    Results younger than fresh_seconds are returned directly. Results up to
+    stale_seconds old are returned immediately while one background refresh
+    runs. Callers get a shallow copy, so they can't mutate the shared value.
+    """
+    def decorator(func):
+        flights = SingleFlight()
+        cache: Dict[Hashable, tuple] = {}
+        refreshing = set()
+        lock = threading.Lock()
+        # Bumped by invalidate(): a query started before it is neither joined nor cached after it
+        generation = [0]
+
+        def load(key, args, kwargs):
+            with lock:
+                started = generation[0]
+            value = flights.do((started, key), lambda: func(*args, **kwargs))
+            with lock:
+                if generation[0] == started:
+                    cache[key] = (time.monotonic(), value)
+            return value
+
+        def refresh(key, args, kwargs):
+            try:
+                load(key, args, kwargs)
+            except Exception as e:
+                print(f"Error refreshing {func.__name__}: {e}")
+            finally:
+                with lock:
+                    refreshing.discard(key)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _count('calls')
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                entry = cache.get(key)
+
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age < fresh_seconds:
+                    _count('hits')
+                    return copy.copy(entry[1])
+                if age < stale_seconds:
+                    with lock:
+                        start = key not in refreshing
+                        refreshing.add(key)
+                    if start:
+                        _count('refreshes')
+                        threading.Thread(target=refresh, args=(key, args, kwargs), daemon=True).start()
+                    _count('stale')
+                    return copy.copy(entry[1])
+
+            return copy.copy(load(key, args, kwargs))
+
+        def invalidate():
+            with lock:
+                cache.clear()
+                generation[0] += 1
+
+        wrapper.invalidate = invalidate
+        _registry.append(wrapper)
+        return wrapper
+    return decorator
+
+
+def invalidate_all():
+    """Drop every cached value, e.g. after new results are entered"""
+    for wrapper in _registry:
+        wrapper.invalidate()
+
+
+def stats() -> Dict[str, int]:
+    """Snapshot of the coalescing counters"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,68 @@
+"""
+driver_masks bit order against Postgres get_bit/set_bit on BYTEA.
+
+Postgres numbers a bytea's bits from the least significant bit of the first
+byte: bit n is bit n % 8 of byte n / 8. The helpers below follow that
+definition and the driver_mask_set/driver_mask_has SQL functions built on it.
+"""
+import pytest
+
+import driver_masks
+
+
+def get_bit(data, n):
+    return (data[n // 8] >> (n % 8)) & 1
+
+
+def set_bit(data, n, value):
+    data = bytearray(data)
+    data[n // 8] = (data[n // 8] & ~(1 << (n % 8))) | (value << (n % 8))
+    return bytes(data)
+
+
+def driver_mask_set(mask, bit, value):
+    """database.py's driver_mask_set: pad with zero bytes, then set_bit"""
+    mask = mask or b''
+    return set_bit(mask + bytes(max(0, bit // 8 + 1 - len(mask))), bit, value)
+
+
+def driver_mask_has(mask, bit):
+    return mask is not None and bit // 8 < len(mask) and get_bit(mask, bit) == 1
+
+
+def test_postgres_documented_examples():
+    # From the Postgres docs for get_bit and set_bit
+    assert get_bit(b'\x12\x34\x56\x78\x90', 30) == 1
+    assert set_bit(b'\x12\x34\x56\x78\x90', 30, 0) == b'\x12\x34\x56\x38\x90'
+
+
+@pytest.mark.parametrize('driver_id', [0, 1, 7, 8, 9, 30, 63, 64, 200])
+def test_python_bits_are_postgres_bits(driver_id):
+    stored = driver_mask_set(None, driver_id, 1)
+    assert driver_masks.to_bytes(driver_masks.of([driver_id])) == stored
+    assert driver_masks.has(driver_masks.from_bytes(stored), driver_id)
+    assert driver_mask_has(stored, driver_id)
+
+
+def test_masks_written_in_sql_read_back_in_python():
+    stored = None
+    for driver_id in [3, 17, 9, 42, 17]:
+        stored = driver_mask_set(stored, driver_id, 1)
+    stored = driver_mask_set(stored, 9, 0)  # a replaced pick
+    mask = driver_masks.from_bytes(stored)
+
+    assert driver_masks.ids(mask) == [3, 17, 42]
+    assert driver_masks.count(mask) == 3
+    assert all(driver_mask_has(stored, i) == driver_masks.has(mask, i) for i in range(64))
+
+
+def test_masks_written_in_python_read_back_in_sql():
+    stored = driver_masks.to_bytes(driver_masks.of([1, 12, 33]))
+    assert [i for i in range(48) if driver_mask_has(stored, i)] == [1, 12, 33]
+
+
+def test_empty_masks():
+    assert driver_masks.from_bytes(None) == 0
+    assert driver_masks.to_bytes(0) == b''
+    assert not driver_mask_has(b'', 0)
+    assert not driver_masks.has(0, None)
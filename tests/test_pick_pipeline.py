@@ -0,0 +1,104 @@
+"""
+The pick queue: replacement, refusal when full, and fairness per user.
+
+database.make_pick is replaced with a recorder that holds every write until
+the test opens the gate, so the workers can be kept busy and picks stay queued.
+"""
+import threading
+import time
+
+import pytest
+
+import database as db
+import pick_pipeline
+import routing
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Writes:
+    """Picks passed to make_pick, as (user_id, race_id, driver_name, submitted_at, acting user)"""
+
+    def __init__(self):
+        self.made = []
+        self.gate = threading.Event()
+
+    def make_pick(self, user_id, race_id, driver_name, submitted_at=None):
+        self.made.append((user_id, race_id, driver_name, submitted_at, routing._current_user.get()))
+        assert self.gate.wait(5)
+        return True, f"Picked {driver_name}"
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """A recorder for make_pick, with every pick worker held busy until writes.gate is set"""
+    writes = Writes()
+    monkeypatch.setattr(db, 'make_pick', writes.make_pick)
+
+    fillers = [pick_pipeline.submit(user_id, 1, 'Filler')
+               for user_id in range(9000, 9000 + pick_pipeline.PICK_WORKERS)]
+    wait_for(lambda: pick_pipeline.stats()['in_flight'] == len(pick_pipeline._workers))
+    assert not pick_pipeline.stats()['queued']
+
+    yield writes
+
+    writes.gate.set()
+    assert None not in [pick_pipeline.wait(ticket, 5) for ticket in fillers]
+    wait_for(lambda: not pick_pipeline.stats()['queued'] and not pick_pipeline.stats()['in_flight'])
+
+
+def test_pick_is_written_as_the_user_with_its_submission_time(writes):
+    ticket = pick_pipeline.submit(1, 3, 'Kyle Larson')
+    assert pick_pipeline.wait(ticket, 0.01) is None
+
+    writes.gate.set()
+
+    assert pick_pipeline.wait(ticket, 5) == (True, "Picked Kyle Larson")
+    assert (1, 3, 'Kyle Larson', pick_pipeline.submitted_at(ticket), 1) in writes.made
+
+
+def test_resubmitting_replaces_the_queued_pick(writes):
+    first = pick_pipeline.submit(1, 3, 'Kyle Larson')
+    second = pick_pipeline.submit(1, 3, 'Chase Elliott')
+
+    assert pick_pipeline.result(first) == (False, "Replaced by your newer pick")
+    assert pick_pipeline.stats()['queued'] == 1
+
+    writes.gate.set()
+    assert pick_pipeline.wait(second, 5) == (True, "Picked Chase Elliott")
+    assert [pick[2] for pick in writes.made if pick[0] == 1] == ['Chase Elliott']
+
+
+def test_replacement_keeps_its_place_in_line(writes):
+    pick_pipeline.submit(1, 3, 'Kyle Larson')
+    pick_pipeline.submit(2, 3, 'Denny Hamlin')
+    pick_pipeline.submit(1, 3, 'Chase Elliott')
+    pick_pipeline.submit(3, 3, 'Ryan Blaney')
+
+    queued = list(pick_pipeline._queue.values())
+    assert [(t.user_id, t.driver_name) for t in queued] == [
+        (1, 'Chase Elliott'), (2, 'Denny Hamlin'), (3, 'Ryan Blaney')]
+
+
+def test_full_queue_refuses_new_users(writes, monkeypatch):
+    monkeypatch.setattr(pick_pipeline, 'MAX_QUEUED', 2)
+    before = pick_pipeline.stats()['rejected']
+
+    tickets = [pick_pipeline.submit(user_id, 3, 'Kyle Larson') for user_id in (1, 2, 3)]
+    # A user already in line can still change their pick
+    replaced = pick_pipeline.submit(2, 3, 'Chase Elliott')
+
+    assert pick_pipeline.result(tickets[2]) == pick_pipeline.BUSY
+    assert pick_pipeline.stats()['rejected'] == before + 1
+    writes.gate.set()
+    assert pick_pipeline.wait(tickets[0], 5) == (True, "Picked Kyle Larson")
+    assert pick_pipeline.wait(replaced, 5) == (True, "Picked Chase Elliott")
+
+
+def test_unknown_ticket_has_expired():
+    assert pick_pipeline.result(-1)[0] is False
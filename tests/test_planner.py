@@ -0,0 +1,41 @@
+"""
+planner.solve_assignment against brute force on small matrices.
+"""
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+import planner
+
+
+def brute_force(cost):
+    """Lowest total cost over every assignment of the shorter side"""
+    n, m = cost.shape
+    if n <= m:
+        return min(sum(cost[i, j] for i, j in zip(range(n), cols)) for cols in permutations(range(m), n))
+    return min(sum(cost[i, j] for i, j in zip(rows, range(m))) for rows in permutations(range(n), m))
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (3, 3), (4, 4), (5, 5), (2, 5), (3, 6), (6, 3), (5, 2)])
+def test_matches_brute_force(shape):
+    rng = np.random.default_rng(sum(shape))
+    for _ in range(20):
+        cost = rng.integers(-20, 50, size=shape).astype(float)
+        rows, cols = planner.solve_assignment(cost)
+
+        assert len(rows) == min(shape)
+        assert len(set(rows.tolist())) == len(rows) and len(set(cols.tolist())) == len(cols)
+        assert list(rows) == sorted(rows)
+        assert cost[rows, cols].sum() == pytest.approx(brute_force(cost))
+
+
+def test_ties_still_give_a_full_assignment():
+    rows, cols = planner.solve_assignment(np.zeros((4, 6)))
+    assert rows.tolist() == [0, 1, 2, 3]
+    assert len(set(cols.tolist())) == 4
+
+
+def test_empty_matrix():
+    rows, cols = planner.solve_assignment(np.zeros((0, 5)))
+    assert rows.tolist() == [] and cols.tolist() == []
@@ -0,0 +1,71 @@
+"""
+Field-wide scarcity from used-driver masks, without a database.
+"""
+import numpy as np
+import pytest
+
+import driver_masks
+import scarcity
+
+
+def mask(*driver_ids):
+    return driver_masks.to_bytes(driver_masks.of(driver_ids))
+
+
+def test_availability_matrix_matches_per_user_bit_tests():
+    masks = [mask(1, 3), mask(), mask(0, 9, 10), mask(15)]
+    available = scarcity.availability_matrix(masks, 12)
+    expected = [[not driver_masks.has(driver_masks.from_bytes(m), i) for i in range(12)] for m in masks]
+    assert available.tolist() == expected
+
+
+def test_availability_matrix_with_no_users():
+    assert scarcity.availability_matrix([], 8).shape == (0, 8)
+
+
+def test_driver_columns_follow_requested_ids():
+    masks = [mask(2, 5), mask(5)]
+    available = scarcity.driver_columns(masks, [[], []], [5, 2, -1, 40])
+    assert available.tolist() == [[False, False, True, True], [False, True, True, True]]
+
+
+def test_hidden_picks_count_as_available():
+    masks = [mask(2, 5), mask(5)]
+    available = scarcity.driver_columns(masks, [[5], [99]], [5, 2])
+    assert available.tolist() == [[True, False], [False, True]]
+
+
+def test_project_ownership_splits_each_user_by_expected_points():
+    available = np.array([[True, True], [True, False], [False, False]])
+    expected = np.array([[30.0, 0.0], [10.0, 0.0]])  # drivers x races; no history at race 2
+
+    projected = scarcity.project_ownership(available, expected)
+
+    assert projected[:, 0].tolist() == pytest.approx([0.75 + 1.0, 0.25])
+    assert projected[:, 1].tolist() == pytest.approx([0.5 + 1.0, 0.5])
+    # Users with no drivers left are not projected to pick anyone
+    assert projected.sum(axis=0).tolist() == pytest.approx([2.0, 2.0])
+
+
+def test_build_scarcity_and_heatmap_rows(monkeypatch):
+    rows = [(1, mask(1), []), (2, mask(1, 2), [2]), (3, mask(2), [])]
+    races = [{'race_number': 7, 'track': 'Dover'}, {'race_number': 8, 'track': 'Pocono'}]
+    monkeypatch.setattr(scarcity.db, 'get_all_driver_masks', lambda hide_after=None: rows)
+    monkeypatch.setattr(scarcity.db, 'get_driver_ids', lambda refresh=False: {'A': 1, 'B': 2})
+    monkeypatch.setattr(scarcity.planner, 'remaining_schedule',
+                        lambda drivers: (races, np.ones((len(drivers), len(races)))))
+
+    result = scarcity.build_scarcity(['A', 'B', 'C'], upcoming=1)
+    owners, projected = scarcity.heatmap_rows(result)
+
+    assert result['users'] == 3
+    assert result['owners'].tolist() == [1, 2, 3]
+    assert [row['owners'] for row in owners] == [1, 2, 3]
+    assert owners[0]['share'] == pytest.approx(1 / 3)
+    assert [row['race'] for row in projected] == ['7. Dover'] * 3
+    assert sum(row['projected'] for row in projected) == pytest.approx(3.0)
+
+
+def test_build_scarcity_without_users(monkeypatch):
+    monkeypatch.setattr(scarcity.db, 'get_all_driver_masks', lambda hide_after=None: [])
+    assert scarcity.build_scarcity(['A']) is None
@@ -0,0 +1,58 @@
+"""
+Scoring rules on plain rows, shaped like database.get_scoring_inputs() returns them.
+"""
+import scoring
+
+RULES = scoring.merge_rules({'win_multiplier': 2})
+FINISH = RULES['finish_points']
+STAGE = RULES['stage_points']
+
+# (id, race_id, driver_code, finish, stage1, stage2, fastest_lap, points, raw_scored)
+RESULTS = [
+    (1, 1, 0, 1, 2, 1, 0, 0, 1),
+    (2, 1, 1, 2, 1, 3, 1, 0, 1),
+    (3, 1, 2, 3, 0, 0, 0, 25, 0),  # entered as a total
+]
+WINNER = FINISH[0] + STAGE[1] + STAGE[0]
+SECOND = FINISH[1] + STAGE[0] + STAGE[2] + RULES['fastest_lap_points']
+
+
+def test_merge_rules_fills_in_defaults():
+    rules = scoring.merge_rules({'no_pick_penalty': -5})
+    assert rules['no_pick_penalty'] == -5
+    assert rules['finish_points'] == scoring.DEFAULT_RULES['finish_points']
+    assert scoring.merge_rules(None) == scoring.DEFAULT_RULES
+
+
+def test_table_points_outside_the_table_score_nothing():
+    assert scoring.table_points([10, 5, 1], [1, 2, 3, 0, 4, -1]).tolist() == [10, 5, 1, 0, 0, 0]
+
+
+def test_driver_points_keep_entered_totals():
+    finish, stage1, stage2, fastest, entered, raw = zip(*[row[3:] for row in RESULTS])
+    points = scoring.driver_points(RULES, finish, stage1, stage2, fastest, entered, raw)
+    assert points.tolist() == [WINNER, SECOND, 25]
+
+
+def test_win_multiplier_applies_to_the_winner_only():
+    rules = scoring.merge_rules({'win_multiplier': 1.5})
+    assert scoring.pick_points(rules, [41, 41], [1, 2]).tolist() == [62, 41]
+
+
+def test_picks_without_a_result_score_zero():
+    scored = scoring.score_picks(RULES, [1, 1], [0, 1], [30, 20], [2, 3], [1, 1, 2], [1, 2, 0])
+    assert scored.tolist() == [20, 0, 0]
+
+
+def test_compute_scores_returns_changed_rows():
+    # (id, race_id, driver_code, points)
+    picks = [(10, 1, 0, 0), (11, 1, 1, SECOND), (12, 1, 2, 0)]
+
+    (result_ids, result_points), (pick_ids, pick_points) = scoring.compute_scores(RULES, RESULTS, picks)
+
+    assert dict(zip(result_ids, result_points)) == {1: WINNER, 2: SECOND}
+    assert dict(zip(pick_ids, pick_points)) == {10: WINNER * 2, 12: 25}
+
+
+def test_compute_scores_of_an_empty_season():
+    assert scoring.compute_scores(RULES, [], []) == (([], []), ([], []))
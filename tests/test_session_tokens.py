@@ -0,0 +1,122 @@
+"""
+Signed session tokens: signing, expiry, tampering and revocation.
+
+The database side of revocation is stubbed: get_token_revocations and
+is_token_revoked are replaced on the database module, and each test gets a
+fresh revocation list with the background sync already marked as started.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import database as db
+import session_tokens
+
+SECRET = b'test secret'
+USER = {'id': 7, 'username': 'kyle', 'email': 'kyle@example.com', 'is_admin': False}
+READ_AT = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    calls = []
+
+    def get_token_revocations(since=None):
+        calls.append(since)
+        return {}, {}, READ_AT
+
+    monkeypatch.setattr(db, 'get_token_revocations', get_token_revocations)
+    monkeypatch.setattr(session_tokens, '_revocations', session_tokens.RevocationList())
+    monkeypatch.setattr(session_tokens, '_syncer', object())
+    return calls
+
+
+def test_issue_and_verify(revocations):
+    token = session_tokens.issue(SECRET, USER)
+    assert session_tokens.is_signed(token)
+    assert session_tokens.verify(SECRET, token) == USER
+
+
+def test_expired_token_is_refused(revocations, monkeypatch):
+    monkeypatch.setattr(session_tokens, 'TOKEN_LIFETIME', timedelta(seconds=-1))
+    token = session_tokens.issue(SECRET, USER)
+    assert session_tokens.decode(SECRET, token) is None
+    assert session_tokens.verify(SECRET, token) is None
+
+
+def test_tampered_token_is_refused(revocations):
+    token = session_tokens.issue(SECRET, USER)
+    payload, _, signature = token.rpartition('.')
+    forged = session_tokens._b64(b'{"id":1,"username":"admin","is_admin":true}')
+
+    assert session_tokens.verify(b'other secret', token) is None
+    assert session_tokens.verify(SECRET, f"{payload}.{signature[::-1]}") is None
+    assert session_tokens.verify(SECRET, f"{session_tokens.TOKEN_PREFIX}{forged}.{signature}") is None
+    assert session_tokens.verify(SECRET, 'legacy-random-token') is None
+
+
+def test_logout_revokes_one_token(revocations):
+    token = session_tokens.issue(SECRET, USER)
+    other = session_tokens.issue(SECRET, USER)
+    claims = session_tokens.decode(SECRET, token)
+
+    session_tokens.revoked_locally(claims['jti'], datetime.fromtimestamp(claims['exp']))
+
+    assert session_tokens.verify(SECRET, token) is None
+    assert session_tokens.verify(SECRET, other) == USER
+
+
+def test_password_change_revokes_earlier_tokens(revocations):
+    token = session_tokens.issue(SECRET, USER)
+    session_tokens.user_revoked_locally(USER['id'], datetime.now(timezone.utc) + timedelta(seconds=1))
+    assert session_tokens.verify(SECRET, token) is None
+
+
+def test_sync_picks_up_revocations_from_the_database_clock(revocations, monkeypatch):
+    token = session_tokens.issue(SECRET, USER)
+    claims = session_tokens.decode(SECRET, token)
+    revocations_list = session_tokens._revocations
+    revocations_list.sync()
+
+    later = READ_AT + timedelta(seconds=30)
+
+    def get_token_revocations(since=None):
+        revocations.append(since)
+        return {claims['jti']: (datetime.max, later)}, {}, later
+
+    monkeypatch.setattr(db, 'get_token_revocations', get_token_revocations)
+    revocations_list.sync()
+
+    assert revocations == [None, READ_AT - session_tokens.SYNC_OVERLAP]
+    assert revocations_list.stats()['synced_to'] == later
+    assert session_tokens.verify(SECRET, token) is None
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = session_tokens.BloomFilter(1000)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    assert sum(f"other-{i}" in bloom for i in range(10000)) < 100
+
+
+def test_many_revocations_fall_back_to_the_bloom_filter(revocations, monkeypatch):
+    tokens = [session_tokens.issue(SECRET, USER) for _ in range(4)]
+    jtis = [session_tokens.decode(SECRET, token)['jti'] for token in tokens]
+    revoked = {jti: (datetime.max, READ_AT) for jti in jtis[:3]}
+    confirmed = []
+
+    def is_token_revoked(jti):
+        confirmed.append(jti)
+        return jti in revoked
+
+    monkeypatch.setattr(session_tokens, 'BLOOM_THRESHOLD', 2)
+    monkeypatch.setattr(db, 'get_token_revocations', lambda since=None: (revoked, {}, READ_AT))
+    monkeypatch.setattr(db, 'is_token_revoked', is_token_revoked)
+    session_tokens._revocations.sync()
+
+    assert session_tokens.stats()['bloom_bits'] > 0
+    assert [session_tokens.verify(SECRET, token) for token in tokens] == [None, None, None, USER]
+    # Only tokens that hit the filter are confirmed against the database
+    assert set(jtis[:3]) <= set(confirmed)
@@ -0,0 +1,145 @@
+"""
+Request coalescing, the stale-while-revalidate window and invalidation.
+"""
+import threading
+import time
+
+import pytest
+
+import singleflight
+
+
+class Source:
+    """A query that counts its calls and can be held open until released"""
+
+    def __init__(self, block=False):
+        self.calls = 0
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, key):
+        self.calls += 1
+        call = self.calls
+        self.started.release()
+        assert self.release.wait(5)
+        return {'key': key, 'call': call}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def run_threads(fn, count):
+    results = [None] * count
+
+    def run(i):
+        results[i] = fn()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_query():
+    source = Source(block=True)
+    cached = singleflight.coalesced()(source)
+    before = singleflight.stats()
+
+    threads, results = run_threads(lambda: cached('a'), 8)
+    assert source.started.acquire(timeout=5)
+    wait_for(lambda: singleflight.stats()['coalesced'] - before['coalesced'] == 7)
+    source.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert source.calls == 1
+    assert results == [{'key': 'a', 'call': 1}] * 8
+    assert cached('b') == {'key': 'b', 'call': 2}
+
+
+def test_fresh_results_are_cached_and_copied():
+    source = Source()
+    cached = singleflight.coalesced(fresh_seconds=60)(source)
+
+    first = cached('a')
+    first['call'] = 'mutated'
+    assert cached('a') == {'key': 'a', 'call': 1}
+    assert source.calls == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError("boom")
+
+    cached = singleflight.coalesced()(failing)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cached()
+    assert len(calls) == 2
+
+
+def test_stale_value_is_served_while_one_refresh_runs():
+    source = Source()
+    cached = singleflight.coalesced(fresh_seconds=0.05, stale_seconds=60)(source)
+    cached('a')
+    time.sleep(0.1)
+
+    source.release.clear()
+    assert cached('a') == {'key': 'a', 'call': 1}
+    assert cached('a') == {'key': 'a', 'call': 1}
+    assert source.started.acquire(timeout=5)
+    source.release.set()
+
+    wait_for(lambda: cached('a')['call'] == 2)
+    assert source.calls == 2
+
+
+def test_expired_value_is_reloaded_inline():
+    source = Source()
+    cached = singleflight.coalesced(fresh_seconds=0.01, stale_seconds=0.02)(source)
+    cached('a')
+    time.sleep(0.05)
+    assert cached('a') == {'key': 'a', 'call': 2}
+
+
+def test_invalidate_drops_cache_and_in_flight_queries():
+    source = Source(block=True)
+    cached = singleflight.coalesced(fresh_seconds=60)(source)
+
+    threads, results = run_threads(lambda: cached('a'), 1)
+    assert source.started.acquire(timeout=5)
+    cached.invalidate()
+
+    # A call after invalidate() doesn't join the query started before it...
+    later_threads, later = run_threads(lambda: cached('a'), 1)
+    assert source.started.acquire(timeout=5)
+    source.release.set()
+    for thread in threads + later_threads:
+        thread.join()
+    assert source.calls == 2
+
+    # ...and only the query started after it is cached
+    assert cached('a') == later[0]
+    assert source.calls == 2
+
+
+def test_invalidate_all_clears_every_function():
+    first, second = Source(), Source()
+    cached_first = singleflight.coalesced(fresh_seconds=60)(first)
+    cached_second = singleflight.coalesced(fresh_seconds=60)(second)
+    cached_first('a')
+    cached_second('a')
+
+    singleflight.invalidate_all()
+
+    assert cached_first('a')['call'] == 2
+    assert cached_second('a')['call'] == 2
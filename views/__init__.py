@@ -0,0 +1,52 @@
+"""
+Pages of the contest app
+
+app.py registers these with st.navigation, so each rerun only imports and runs
+the active page. Page objects are created per run from PAGES; use page(name)
+to link or switch to one.
+"""
+import importlib
+
+import streamlit as st
+
+# Common NASCAR drivers (you can expand this list)
+ALL_DRIVERS = [
+    "Kyle Larson", "Chase Elliott", "Tyler Reddick", "Christopher Bell",
+    "William Byron", "Denny Hamlin", "Kyle Busch", "Chase Briscoe",
+    "Ross Chastain", "Ryan Blaney", "Joey Logano", "Brad Keselowski",
+    "Chris Buescher", "Bubba Wallace", "Alex Bowman", "Daniel Suarez",
+    "Austin Cindric", "Josh Berry", "AJ Allmendinger", "Michael McDowell",
+    "Ricky Stenhouse Jr.", "Ty Gibbs", "Todd Gilliland", "Noah Gragson",
+    "Erik Jones", "Carson Hocevar", "Zane Smith", "Austin Dillon",
+    "John Hunter Nemechek", "Ryan Preece", "Ty Dillon", "Cole Custer",
+    "Riley Herbst", "Cody Ware", "Connor Zilisch", "Shane van Gisbergen"
+]
+
+# Leaderboard page shows this many leaders plus this many entries either side of you
+LEADERBOARD_TOP_N = 25
+LEADERBOARD_RADIUS = 3
+
+# Page name -> (module, function, title, icon)
+PAGES = {
+    'home': ('dashboard', 'show_dashboard', "Home", "🏠"),
+    'picks': ('picks', 'show_picks_page', "Make Picks", "🏎️"),
+    'leaderboard': ('leaderboard', 'show_leaderboard_page', "Leaderboard", "📊"),
+    'my_picks': ('my_picks', 'show_my_picks_page', "My Picks", "📋"),
+    'all_picks': ('all_picks', 'show_all_picks_page', "All Picks", "👥"),
+    'rules': ('rules', 'show_rules_page', "Rules", "📖"),
+    'chat': ('chat', 'show_chat_page', "Chat", "💬"),
+    'admin': ('admin', 'show_admin_page', "Admin Panel", "⚙️"),
+    'login': ('login', 'show_login_page', "Login", "🏁"),
+}
+
+
+def _run(name):
+    """Import the page's module on first use and render it"""
+    module, function, _, _ = PAGES[name]
+    getattr(importlib.import_module(f"views.{module}"), function)()
+
+
+def page(name: str) -> "st.Page":
+    """Create the st.Page for a page name; the home page is the default"""
+    _, _, title, icon = PAGES[name]
+    return st.Page(lambda: _run(name), title=title, icon=icon, url_path=name, default=name == 'home')
@@ -0,0 +1,599 @@
+"""
+Admin panel: races, results, entries and exports
+"""
+import streamlit as st
+import database as db
+import frame_cache
+from datetime import datetime
+
+
+def build_races_table():
+    """Query and frame the admin schedule table"""
+    import pandas as pd
+    
+    races = db.get_all_races()
+    if not races:
+        return None
+    
+    df = pd.DataFrame(races)
+    df['status'] = df['is_completed'].apply(lambda x: '✅ Complete' if x else '⏳ Upcoming')
+    display_df = df[['race_number', 'race_name', 'race_date', 'track', 'status']]
+    display_df.columns = ['Race #', 'Race Name', 'Date', 'Track', 'Status']
+    return display_df
+
+
+def results_from_csv(df_results):
+    """Turn an uploaded results CSV into (preview frame, results for enter_race_results).
+    
+    Totals files (driver_name, total_points) get finish positions by points;
+    raw files (driver_name, finish_position, optional stage1_position,
+    stage2_position, fastest_lap) are scored with the scoring rules.
+    """
+    import pandas as pd
+    
+    raw = 'finish_position' in df_results.columns and 'total_points' not in df_results.columns
+    required_cols = ['driver_name', 'finish_position'] if raw else ['driver_name', 'total_points']
+    if not all(col in df_results.columns for col in required_cols):
+        raise ValueError(f"CSV must contain columns: {', '.join(required_cols)}")
+    
+    if raw:
+        df_results = df_results.sort_values('finish_position').reset_index(drop=True)
+    else:
+        # Sort by points descending to assign finishing positions
+        df_results = df_results.sort_values('total_points', ascending=False).reset_index(drop=True)
+        df_results['finish_position'] = range(1, len(df_results) + 1)
+    
+    def position(row, col):
+        return int(row[col]) if col in row and pd.notna(row[col]) else None
+    
+    results = []
+    for _, row in df_results.iterrows():
+        results.append({
+            'driver_name': str(row['driver_name']).strip(),
+            'finish_position': int(row['finish_position']),
+            'points': None if raw else int(row['total_points']),
+            'stage1_position': position(row, 'stage1_position'),
+            'stage2_position': position(row, 'stage2_position'),
+            'fastest_lap': bool(position(row, 'fastest_lap'))
+        })
+    
+    preview_cols = ['finish_position', 'driver_name'] + [
+        c for c in ['total_points', 'stage1_position', 'stage2_position', 'fastest_lap'] if c in df_results.columns
+    ]
+    return df_results[preview_cols], results
+
+
+def show_admin_page():
+    """Display admin panel"""
+    import io
+    import pandas as pd
+    
+    st.header("⚙️ Admin Panel")
+    
+    if not db.is_admin(st.session_state.user['id']):
+        st.error("Admin access required")
+        return
+    
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Manage Races", "Enter Results", "Manage Entries", "Export Data", "Scoring Rules", "Ownership"])
+    
+    with tab1:
+        st.subheader("Add New Race")
+        with st.form("add_race_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                race_number = st.number_input("Race Number", min_value=1, max_value=36, value=1)
+                race_name = st.text_input("Race Name")
+            with col2:
+                race_date = st.date_input("Race Date")
+                track = st.text_input("Track")
+            
+            if st.form_submit_button("Add Race"):
+                if race_name and track:
+                    if db.create_race(race_number, race_name, str(race_date), track):
+                        st.success("Race added!")
+                        st.rerun()
+                    else:
+                        st.error("Race number already exists")
+                else:
+                    st.warning("Please fill all fields")
+        
+        st.divider()
+        st.subheader("All Races")
+        display_df = frame_cache.cached_frame('admin_races', (), ('races',), db.get_epochs(), build_races_table)
+        if display_df is not None:
+            st.dataframe(display_df, hide_index=True, width='stretch')
+    
+    with tab2:
+        st.subheader("Enter Race Results")
+        
+        races = db.get_all_races()
+        incomplete_races = [r for r in races if not r['is_completed']]
+        
+        if incomplete_races:
+            race_options = {f"Race {r['race_number']}: {r['race_name']}": r['id'] for r in incomplete_races}
+            selected_race_name = st.selectbox("Select Race", list(race_options.keys()))
+            selected_race_id = race_options[selected_race_name]
+            
+            # NASCAR Points System (including stage points)
+            st.info("📊 Upload a CSV file with columns: driver_name, total_points")
+            st.caption("Total points should include stage points + finish position points. "
+                       "Or upload raw results (driver_name, finish_position, and optionally "
+                       "stage1_position, stage2_position, fastest_lap) to score them with the scoring rules.")
+            
+            # CSV Upload option
+            st.divider()
+            st.subheader("Option 1: Upload CSV File")
+            
+            uploaded_file = st.file_uploader(
+                "Upload race results CSV", 
+                type=['csv'],
+                help="CSV should have columns: driver_name, total_points (or driver_name, finish_position)"
+            )
+            
+            if uploaded_file is not None:
+                try:
+                    df_results, results = results_from_csv(pd.read_csv(uploaded_file))
+                    
+                    # Preview the data
+                    st.write("Preview of uploaded results:")
+                    st.dataframe(df_results.head(20), hide_index=True, width='stretch')
+                    st.info(f"Total drivers in file: {len(df_results)}")
+                    
+                    if st.button("✅ Submit Results from CSV", type="primary", width='stretch'):
+                        if db.enter_race_results(selected_race_id, results):
+                            st.success("Results entered successfully!")
+                            st.balloons()
+                            st.rerun()
+                        else:
+                            st.error("Error entering results")
+                
+                except Exception as e:
+                    st.error(f"Error processing CSV: {str(e)}")
+            
+            # Manual entry option
+            st.divider()
+            st.subheader("Option 2: Manual Entry")
+            st.caption("Enter top 10 finishers manually with their total points")
+            
+            with st.form("results_form"):
+                results = []
+                
+                st.write("Enter driver name and total points (including stage points)")
+                cols = st.columns([3, 2])  # Name column wider than points
+                
+                with cols[0]:
+                    st.markdown("**Driver Name**")
+                with cols[1]:
+                    st.markdown("**Total Points**")
+                
+                drivers_data = []
+                for i in range(10):  # Top 10 finishers
+                    cols = st.columns([3, 2])
+                    with cols[0]:
+                        driver = st.text_input(f"Driver {i+1}", key=f"driver_{i}", label_visibility="collapsed")
+                    with cols[1]:
+                        points = st.number_input(f"Points {i+1}", min_value=0, value=0, key=f"points_{i}", label_visibility="collapsed")
+                    
+                    if driver and points > 0:
+                        drivers_data.append({
+                            'driver_name': driver.strip(),
+                            'total_points': points
+                        })
+                
+                if st.form_submit_button("Submit Manual Results"):
+                    if drivers_data:
+                        # Sort by points to determine finish positions
+                        drivers_data.sort(key=lambda x: x['total_points'], reverse=True)
+                        
+                        results = []
+                        for idx, driver_info in enumerate(drivers_data):
+                            results.append({
+                                'driver_name': driver_info['driver_name'],
+                                'finish_position': idx + 1,
+                                'points': driver_info['total_points']
+                            })
+                        
+                        if db.enter_race_results(selected_race_id, results):
+                            st.success("Results entered successfully!")
+                            st.balloons()
+                            st.rerun()
+                        else:
+                            st.error("Error entering results")
+                    else:
+                        st.warning("Please enter at least one driver with points")
+        else:
+            st.info("No incomplete races available")
+        
+        show_results_correction([r for r in races if r['is_completed']])
+    
+    with tab3:
+        st.subheader("👥 Manage Entries")
+        
+        counts = db.get_user_payment_counts()
+        
+        if counts['total']:
+            st.info(f"Total participants: {counts['total']}")
+            
+            # Summary stats
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Entries", counts['total'])
+            with col2:
+                st.metric("✅ Paid", counts['paid'])
+            with col3:
+                st.metric("⏳ Unpaid", counts['total'] - counts['paid'])
+            
+            st.divider()
+            
+            # Participant list, one page at a time
+            st.subheader("Participant List")
+            
+            col1, col2, col3 = st.columns([3, 2, 1])
+            with col1:
+                search = st.text_input("Search username", placeholder="Starts with...")
+            with col2:
+                paid_filter = st.radio("Show", ["All", "Paid", "Unpaid"], horizontal=True)
+            with col3:
+                page_size = st.selectbox("Per page", [25, 50, 100, 250], index=1)
+            
+            # Cursor stack for keyset paging; reset whenever the filters change
+            filters = (search, paid_filter, page_size)
+            if st.session_state.get('users_page_filters') != filters:
+                st.session_state.users_page_filters = filters
+                st.session_state.users_page_cursors = [None]
+            cursors = st.session_state.users_page_cursors
+            
+            paid = {'All': None, 'Paid': True, 'Unpaid': False}[paid_filter]
+            users, next_cursor = db.get_users_page(cursors[-1], page_size, paid, search.strip() or None)
+            
+            if users:
+                df = pd.DataFrame(users)
+                df['joined'] = pd.to_datetime(df['created_at']).dt.strftime('%Y-%m-%d')
+                df['paid'] = df['paid'].astype(bool)
+                df = df[['id', 'username', 'email', 'joined', 'paid']]
+                
+                # Edit payment status in the grid, then save every change in one batch
+                with st.form("payments_form"):
+                    edited = st.data_editor(
+                        df,
+                        column_config={
+                            'id': None,
+                            'username': '👤 Username',
+                            'email': '📧 Email',
+                            'joined': '📅 Joined',
+                            'paid': st.column_config.CheckboxColumn('Paid')
+                        },
+                        disabled=['username', 'email', 'joined'],
+                        hide_index=True,
+                        width='stretch',
+                        key=f"payments_{len(cursors)}_{hash(filters)}"
+                    )
+                    
+                    if st.form_submit_button("💾 Save Payment Changes", type="primary"):
+                        changed = edited[edited['paid'] != df['paid']]
+                        
+                        if changed.empty:
+                            st.info("No changes to save")
+                        elif db.set_payment_statuses({int(user_id): bool(paid) for user_id, paid in zip(changed['id'], changed['paid'])}):
+                            st.success(f"Updated {len(changed)} participant(s)")
+                            st.rerun()
+                        else:
+                            st.error("Error updating payment status")
+            else:
+                st.info("No participants match these filters")
+            
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("◀ Previous", disabled=len(cursors) == 1, width='stretch'):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                st.caption(f"Page {len(cursors)}")
+            with col3:
+                if st.button("Next ▶", disabled=next_cursor is None, width='stretch'):
+                    cursors.append(next_cursor)
+                    st.rerun()
+        else:
+            st.info("No participants yet")
+        
+        # Bulk import
+        st.divider()
+        st.subheader("📤 Bulk Import Entrants")
+        st.caption("CSV with columns: username, email, and optionally paid and password. Missing passwords are generated.")
+        
+        entrants_file = st.file_uploader("Upload entrants CSV", type=['csv'], key="entrants_upload")
+        if entrants_file is not None and st.button("Import Entrants", type="primary"):
+            import import_entrants
+            try:
+                report = import_entrants.import_entrants(io.StringIO(entrants_file.getvalue().decode('utf-8-sig')))
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.success(f"Created {len(report['created'])} entrant(s)")
+                
+                if report['conflicts']:
+                    st.warning(f"Skipped {len(report['conflicts'])} row(s)")
+                    conflicts_df = pd.DataFrame(report['conflicts'])
+                    conflicts_df.columns = ['Line', 'Username', 'Email', 'Reason']
+                    st.dataframe(conflicts_df, hide_index=True, width='stretch')
+                
+                if report['credentials']:
+                    st.download_button(
+                        label="🔑 Download Generated Passwords (CSV)",
+                        data=import_entrants.credentials_csv(report['credentials']),
+                        file_name=f"nascar_credentials_{datetime.now().strftime('%Y%m%d')}.csv",
+                        mime="text/csv",
+                        width='stretch'
+                    )
+        
+        show_pick_history()
+    
+    with tab4:
+        st.subheader("📥 Export Data")
+        st.caption("Exports stream from the database in the background, so large seasons don't tie up the app")
+        
+        import exports
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            dataset = st.selectbox("Dataset", exports.DATASETS, format_func=lambda d: {
+                'users': 'Participants',
+                'picks': 'Full Pick History',
+                'results': 'Race Results',
+                'standings': 'Standings History'
+            }.get(d, d))
+        with col2:
+            fmt = st.selectbox("Format", list(exports.FORMATS), format_func=str.upper)
+        
+        if st.button("Start Export", type="primary"):
+            st.session_state.export_job = exports.start_export(dataset, fmt)
+        
+        job = exports.get_export(st.session_state.get('export_job', ''))
+        if job:
+            if job['status'] == 'running':
+                st.info(f"⏳ Exporting {job['dataset']}... {job['rows']:,} rows so far")
+                st.button("🔄 Check Status")
+            elif job['status'] == 'failed':
+                st.error(f"Export failed: {job.get('error', 'unknown error')}")
+            else:
+                st.success(f"✅ {job['rows']:,} {job['dataset']} rows exported")
+                with open(job['path'], 'rb') as export_file:
+                    st.download_button(
+                        label=f"📄 Download {job['file_name']}",
+                        data=export_file,
+                        file_name=job['file_name'],
+                        mime=job['mime'],
+                        width='stretch'
+                    )
+    
+    with tab5:
+        show_scoring_rules()
+    
+    with tab6:
+        from views.all_picks import show_driver_scarcity
+        
+        show_live_ownership([r for r in db.get_all_races() if not r['is_completed']])
+        
+        st.divider()
+        st.subheader("🧮 Driver Scarcity")
+        st.caption("Includes picks for upcoming races that players can't see yet")
+        show_driver_scarcity(include_pending=True)
+    
+    with st.expander("⚡ Cache Stats"):
+        import singleflight
+        
+        stats = singleflight.stats()
+        st.caption("Hot reads (leaderboard, results, race picks) are shared between sessions in this process")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Calls", f"{stats['calls']:,}")
+        col2.metric("Queries Run", f"{stats['queries']:,}")
+        col3.metric("Coalesced", f"{stats['coalesced']:,}")
+        col4.metric("Served Stale", f"{stats['stale']:,}")
+        
+        frames = frame_cache.stats()
+        st.caption("Page frames are rebuilt only when the data they show changes")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Frame Hits", f"{frames['hits']:,}")
+        col2.metric("Frame Builds", f"{frames['builds']:,}")
+        col3.metric("Cached Frames", f"{frames['entries']:,}")
+        col4.metric("Evictions", f"{frames['evictions']:,}")
+        
+        import write_behind
+        
+        writes = write_behind.stats()
+        st.caption("Chat posts are queued and written in batches")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Queued Now", f"{writes['depth']:,}", help=f"Deepest: {writes['max_depth']:,}")
+        col2.metric("Rows Written", f"{writes['flushed']:,}", help=f"In {writes['batches']:,} batches")
+        col3.metric("Last Flush", f"{writes['last_flush_ms']:.1f} ms", help=f"Slowest: {writes['max_flush_ms']:.1f} ms")
+        col4.metric("Failed Rows", f"{writes['dropped']:,}", help=f"Submits blocked on a full queue: {writes['blocked']:,}")
+        
+        import pick_pipeline
+        
+        picks = pick_pipeline.stats()
+        st.caption(f"Pick submissions are written by {picks['workers'] or pick_pipeline.PICK_WORKERS} workers in submission order")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Picks Queued", f"{picks['queued']:,}", help=f"Most at once: {picks['max_queued']:,}")
+        col2.metric("Picks Written", f"{picks['written']:,}", help=f"Replaced while queued: {picks['replaced']:,}")
+        col3.metric("Longest Wait", f"{picks['max_wait_ms']:.0f} ms")
+        col4.metric("Refused (Full)", f"{picks['rejected']:,}")
+
+
+@st.fragment(run_every=5.0)
+def show_live_ownership(upcoming_races):
+    """Pick counts per driver for an upcoming race, refreshed while picks come in"""
+    st.subheader("📡 Live Pick Ownership")
+    if not upcoming_races:
+        st.info("No upcoming races")
+        return
+    
+    race_options = {f"Race {r['race_number']}: {r['race_name']}": r for r in upcoming_races}
+    race = race_options[st.selectbox("Race", list(race_options.keys()), key='live_ownership_race')]
+    if not db.picks_visible(race):
+        st.caption("Players can't see these picks until race day")
+    
+    # Keyed on the picks epoch, so each refresh shows every pick committed so far
+    counts = frame_cache.cached_frame('live_pick_counts', (race['id'],), ('picks',), db.get_epochs(),
+                                      lambda: db.get_pick_counts(race['id']))
+    if not counts:
+        st.info("No picks yet")
+        return
+    
+    import pandas as pd
+    
+    counts_df = pd.DataFrame([dict(count) for count in counts])
+    total = int(counts_df['picks'].sum())
+    counts_df['share'] = counts_df['picks'] / total * 100
+    st.metric("Picks Made", f"{total:,}")
+    counts_df.columns = ['Driver', 'Picks', 'Share (%)']
+    st.dataframe(counts_df.round(1), hide_index=True, width='stretch')
+
+
+def show_pick_history():
+    """Look up the pick log for a race or a user, e.g. to settle a dispute"""
+    import pandas as pd
+    
+    st.divider()
+    st.subheader("🔎 Pick History")
+    st.caption("Every pick and pick change is logged with its time and whether it was made or auto-assigned")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        races = db.get_all_races()
+        race_options = {"—": None, **{f"Race {r['race_number']}: {r['race_name']}": r['id'] for r in races}}
+        race_id = race_options[st.selectbox("Race", list(race_options.keys()), key="history_race")]
+    with col2:
+        username = st.text_input("Username", key="history_username").strip()
+    
+    if race_id is not None:
+        events = list(db.iter_race_pick_history(race_id))
+        if username:
+            events = [e for e in events if e['username'].lower() == username.lower()]
+    elif username:
+        user = db.get_user_by_username(username)
+        if not user:
+            st.warning("No user with that username")
+            return
+        events = list(db.iter_user_pick_history(user['id']))
+    else:
+        return
+    
+    if events:
+        df = pd.DataFrame(events)
+        df['event_at'] = pd.to_datetime(df['event_at']).dt.strftime('%Y-%m-%d %H:%M:%S')
+        df = df[['event_at', 'username', 'race_number', 'driver_name', 'source']]
+        df.columns = ['Time', 'Username', 'Race #', 'Driver', 'Source']
+        st.dataframe(df, hide_index=True, width='stretch')
+    else:
+        st.info("No picks logged")
+
+
+def show_results_correction(completed_races):
+    """Re-enter a completed race's results (e.g. after a penalty) and apply only the differences"""
+    import pandas as pd
+    
+    st.divider()
+    st.subheader("✏️ Correct Completed Race")
+    st.caption("Upload the corrected results in either CSV format. Only drivers whose results changed "
+               "are rewritten, affected picks are rescored and the standings are updated from that race on.")
+    
+    if not completed_races:
+        st.info("No completed races yet")
+        return
+    
+    race_options = {f"Race {r['race_number']}: {r['race_name']}": r['id'] for r in completed_races}
+    race_id = race_options[st.selectbox("Race to correct", list(race_options.keys()))]
+    corrected_file = st.file_uploader("Upload corrected results CSV", type=['csv'], key="corrected_results_upload")
+    if corrected_file is None:
+        return
+    
+    try:
+        _, results = results_from_csv(pd.read_csv(corrected_file))
+    except Exception as e:
+        st.error(f"Error processing CSV: {str(e)}")
+        return
+    
+    # Preview what the correction would change before applying it
+    report = db.correct_race_results(race_id, results, dry_run=True)
+    if report is None:
+        st.error("Error checking the corrected results")
+        return
+    
+    if not (report['added'] or report['removed'] or report['changed'] or report['picks']):
+        st.info("These results match what is stored; nothing to correct")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Drivers Changed", len(report['changed']))
+    col2.metric("Drivers Added", len(report['added']))
+    col3.metric("Drivers Removed", len(report['removed']))
+    col4.metric("Picks Rescored", len(report['picks']))
+    
+    if report['changed']:
+        changed_df = pd.DataFrame(report['changed'])
+        changed_df.columns = ['Driver', 'Old Finish', 'New Finish', 'Old Points', 'New Points']
+        st.dataframe(changed_df, hide_index=True, width='stretch')
+    if report['removed']:
+        st.caption(f"Removed: {', '.join(report['removed'])}")
+    if report['picks']:
+        picks_df = pd.DataFrame(report['picks'])[['username', 'driver_name', 'old_points', 'new_points']]
+        picks_df.columns = ['Username', 'Driver', 'Old Points', 'New Points']
+        st.dataframe(picks_df, hide_index=True, width='stretch')
+    
+    if st.button("✅ Apply Correction", type="primary"):
+        applied = db.correct_race_results(race_id, results)
+        if applied is None:
+            st.error("Error applying the correction")
+        else:
+            st.success(f"Correction applied: {len(applied['picks'])} pick(s) rescored, "
+                       f"{applied['standings_rows']} standings row(s) updated")
+
+
+def show_scoring_rules():
+    """Edit the scoring rules and rescore the season with them"""
+    import pandas as pd
+    
+    st.subheader("🧮 Scoring Rules")
+    st.caption("Raw results (finish and stage positions, fastest lap) are scored with these rules. "
+               "Results entered as totals keep their entered points; the win multiplier still applies.")
+    
+    rules = db.get_scoring_rules()
+    
+    with st.form("scoring_rules_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            finish = st.data_editor(
+                pd.DataFrame({'Place': range(1, len(rules['finish_points']) + 1), 'Points': rules['finish_points']}),
+                disabled=['Place'], hide_index=True, num_rows="fixed", key="finish_points_editor"
+            )
+        with col2:
+            stage = st.data_editor(
+                pd.DataFrame({'Stage Place': range(1, len(rules['stage_points']) + 1), 'Points': rules['stage_points']}),
+                disabled=['Stage Place'], hide_index=True, num_rows="fixed", key="stage_points_editor"
+            )
+            fastest_lap_points = st.number_input("Fastest lap bonus", min_value=0, value=int(rules['fastest_lap_points']))
+            win_multiplier = st.number_input("Win multiplier", min_value=0.0, value=float(rules['win_multiplier']), step=0.25)
+            no_pick_penalty = st.number_input("No-pick penalty", min_value=0, value=int(rules['no_pick_penalty']),
+                                              help="Points deducted for each completed race without a pick")
+        
+        if st.form_submit_button("💾 Save & Rescore Season", type="primary"):
+            import scoring
+            
+            new_rules = {
+                'finish_points': [int(p) for p in finish['Points']],
+                'stage_points': [int(p) for p in stage['Points']],
+                'fastest_lap_points': int(fastest_lap_points),
+                'win_multiplier': float(win_multiplier),
+                'no_pick_penalty': int(no_pick_penalty),
+            }
+            if not db.save_scoring_rules(new_rules):
+                st.error("Error saving scoring rules")
+            else:
+                report = scoring.rescore_season(new_rules)
+                if report is None:
+                    st.error("Rules saved, but the rescore failed; run `python scoring.py rescore` to retry")
+                else:
+                    st.success(
+                        f"Rescored in {report['seconds'] * 1000:.0f} ms: {report['results_updated']} results, "
+                        f"{report['picks_updated']} picks updated, {report['penalties']} no-pick penalties"
+                    )
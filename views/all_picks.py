@@ -0,0 +1,177 @@
+"""
+Everyone's picks per race, visible from race day
+"""
+from datetime import date
+
+import streamlit as st
+import database as db
+import frame_cache
+from views import ALL_DRIVERS
+
+
+def build_race_picks_view(race_id, is_completed):
+    """Query and frame every pick for one race, plus its popular picks and top scorers"""
+    import pandas as pd
+    
+    all_picks = db.get_all_picks_for_race(race_id)
+    if not all_picks:
+        return None
+    
+    df = pd.DataFrame(all_picks)
+    
+    # Sort by points if race is completed, otherwise by username
+    if is_completed:
+        df = df.sort_values('points', ascending=False)
+        display_df = df[['username', 'driver_name', 'points']]
+        display_df.columns = ['Username', 'Driver Pick', 'Points Earned']
+        top_scorers = df.nlargest(5, 'points')[['username', 'driver_name', 'points']].to_dict('records')
+    else:
+        df = df.sort_values('username')
+        display_df = df[['username', 'driver_name']]
+        display_df.columns = ['Username', 'Driver Pick']
+        top_scorers = []
+    
+    return {
+        'table': display_df,
+        'participants': len(all_picks),
+        'popular': [(count.driver_name, count.picks) for count in db.get_pick_counts(race_id)[:5]],
+        'top_scorers': top_scorers,
+    }
+
+
+def build_scarcity_view(hide_after):
+    """Frame remaining owners and projected ownership per driver for the whole field"""
+    import pandas as pd
+    import scarcity
+    
+    field = scarcity.build_scarcity(ALL_DRIVERS, hide_after)
+    if field is None:
+        return None
+    owners, projected = scarcity.heatmap_rows(field)
+    return {
+        'users': field['users'],
+        'owners': pd.DataFrame(owners).sort_values('owners'),
+        'projected': pd.DataFrame(projected),
+    }
+
+
+def show_driver_scarcity(include_pending=False):
+    """Heatmap of how many entrants still have each driver and who is projected to use them next.
+    
+    Picks for races not yet on race day only count when include_pending is set (admins).
+    """
+    hide_after = None if include_pending else date.today().strftime('%Y-%m-%d')
+    view = frame_cache.cached_frame(
+        'driver_scarcity', (include_pending, hide_after),
+        ('picks', 'results', 'races', 'users'), db.get_epochs(),
+        lambda: build_scarcity_view(hide_after)
+    )
+    if not view:
+        st.info("No entrants yet")
+        return
+    
+    import altair as alt
+    
+    st.caption(f"Of {view['users']} entrants, how many still have each driver, and how many are expected "
+               "to pick them at the next races given what they have left and each driver's history at the track")
+    order = list(view['owners']['driver_name'])
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.altair_chart(
+            alt.Chart(view['owners']).mark_bar().encode(
+                x=alt.X('owners:Q', title='Still Available'),
+                y=alt.Y('driver_name:N', title=None, sort=order),
+                color=alt.Color('share:Q', scale=alt.Scale(scheme='redyellowgreen', domain=[0, 1]), legend=None),
+                tooltip=[alt.Tooltip('driver_name:N', title='Driver'), alt.Tooltip('owners:Q', title='Entrants'),
+                         alt.Tooltip('share:Q', title='Share', format='.0%')]
+            ),
+            width='stretch'
+        )
+    with col2:
+        if len(view['projected']):
+            st.altair_chart(
+                alt.Chart(view['projected']).mark_rect().encode(
+                    x=alt.X('race:N', title='Projected Picks', sort=alt.SortField('race_number')),
+                    y=alt.Y('driver_name:N', title=None, sort=order, axis=None),
+                    color=alt.Color('projected:Q', title='Entrants', scale=alt.Scale(scheme='blues')),
+                    tooltip=[alt.Tooltip('driver_name:N', title='Driver'), alt.Tooltip('race:N', title='Race'),
+                             alt.Tooltip('projected:Q', title='Projected Picks', format='.1f')]
+                ),
+                width='stretch'
+            )
+        else:
+            st.info("No upcoming races to project")
+
+
+def show_all_picks_page():
+    """Display all users' picks for races"""
+    st.header("👥 All Picks by Race")
+    
+    epochs = db.get_epochs()
+    races = frame_cache.cached_frame('race_list', (), ('races',), epochs, db.get_all_races)
+    
+    if not races:
+        st.info("No races available yet")
+        return
+    
+    # Filter to show only races that have reached race day or are completed
+    available_races = [race for race in races if db.picks_visible(race)]
+    
+    if not available_races:
+        st.info("No race picks are available to view yet. Picks become visible on race day.")
+        return
+    
+    race_options = {f"Race {r['race_number']}: {r['race_name']} ({r['race_date']})": r for r in available_races}
+    
+    selected_race_name = st.selectbox("Select a race to view picks", list(race_options.keys()))
+    selected_race = race_options[selected_race_name]
+    
+    st.divider()
+    
+    # Race details
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(f"**Track:** {selected_race['track']}")
+    with col2:
+        st.markdown(f"**Date:** {selected_race['race_date']}")
+    with col3:
+        status = "✅ Completed" if selected_race['is_completed'] else "⏳ Upcoming"
+        st.markdown(f"**Status:** {status}")
+    
+    st.divider()
+    
+    # Get all picks for this race
+    view = frame_cache.cached_frame(
+        'all_picks', (selected_race['id'], bool(selected_race['is_completed'])),
+        ('picks', 'results', 'users'), epochs,
+        lambda: build_race_picks_view(selected_race['id'], selected_race['is_completed'])
+    )
+    
+    if view:
+        st.subheader(f"Picks ({view['participants']} participants)")
+        
+        st.dataframe(view['table'], hide_index=True, width='stretch')
+        
+        # Show summary stats
+        st.divider()
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Most Popular Picks")
+            if view['popular']:
+                for driver, count in view['popular']:
+                    st.write(f"🏎️ **{driver}**: {count} pick(s)")
+            else:
+                st.info("No picks yet")
+        
+        with col2:
+            if selected_race['is_completed']:
+                st.subheader("Top Scorers This Race")
+                for row in view['top_scorers']:
+                    st.write(f"🏆 **{row['username']}** - {row['driver_name']} ({int(row['points'])} pts)")
+    else:
+        st.info("No picks have been made for this race yet")
+    
+    st.divider()
+    st.subheader("🧮 Driver Scarcity")
+    show_driver_scarcity()
@@ -0,0 +1,50 @@
+"""
+Contest chat
+"""
+import streamlit as st
+import database as db
+
+
+def show_chat_page():
+    """Display chat page"""
+    st.header("💬 Chat")
+    chat_box()
+
+
+@st.fragment
+def chat_box():
+    """Messages and input; sending or refreshing reruns only this fragment"""
+    # Get messages
+    messages = db.get_chat_messages(limit=100)
+    
+    # Display messages in a container
+    chat_container = st.container()
+    with chat_container:
+        if messages:
+            for msg in messages:
+                timestamp = msg['created_at'].strftime('%m/%d %I:%M %p')
+                st.markdown(f"**{msg['username']}** · {timestamp}")
+                st.markdown(f"> {msg['message']}")
+                st.markdown("")
+        else:
+            st.info("No messages yet. Be the first to chat!")
+    
+    st.divider()
+    
+    # Message input form
+    with st.form("chat_form", clear_on_submit=True):
+        message = st.text_input("Message", placeholder="Type your message...", label_visibility="collapsed")
+        col1, col2 = st.columns([4, 1])
+        with col2:
+            submit = st.form_submit_button("Send", width='stretch')
+        
+        if submit and message.strip():
+            db.save_chat_message(
+                st.session_state.user['id'],
+                st.session_state.user['username'],
+                message.strip()
+            )
+            st.rerun(scope="fragment")
+    
+    # Auto-refresh button
+    st.button("🔄 Refresh", width='stretch')
@@ -0,0 +1,62 @@
+"""
+Contest overview: schedule, your next pick and the top 5
+"""
+import streamlit as st
+import database as db
+import views
+
+
+def show_dashboard():
+    """Display dashboard with contest overview"""
+    st.header("Contest Overview")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    # Get stats
+    races = db.get_all_races()
+    completed_races = [r for r in races if r['is_completed']]
+    next_race = db.get_next_race()
+    user_picks = db.get_user_picks(st.session_state.user['id'])
+    
+    with col1:
+        st.metric("Total Races", len(races))
+    with col2:
+        st.metric("Completed Races", len(completed_races))
+    with col3:
+        st.metric("Your Picks Made", len(user_picks))
+    
+    st.divider()
+    
+    # Next race info
+    if next_race:
+        st.subheader("📍 Next Race")
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            st.markdown(f"**{next_race['race_name']}**")
+            st.markdown(f"🏟️ {next_race['track']}")
+            st.markdown(f"📅 {next_race['race_date']}")
+        with col2:
+            user_pick = db.get_user_pick_for_race(st.session_state.user['id'], next_race['id'])
+            if user_pick:
+                st.success(f"✅ Your pick: {user_pick['driver_name']}")
+            else:
+                st.warning("⚠️ No pick yet")
+                if st.button("Make Pick Now"):
+                    st.switch_page(views.page('picks'))
+    else:
+        st.info("No upcoming races. Check with admin.")
+    
+    st.divider()
+    
+    # Quick leaderboard
+    st.subheader("🏆 Top 5 Leaderboard")
+    leaderboard = db.get_leaderboard_top(5)
+    if leaderboard:
+        import pandas as pd
+        
+        df = pd.DataFrame(leaderboard)
+        df = df[['rank', 'username', 'total_points', 'picks_made']]
+        df.columns = ['Rank', 'Username', 'Total Points', 'Picks Made']
+        st.dataframe(df, hide_index=True, width='stretch')
+    else:
+        st.info("No standings yet")
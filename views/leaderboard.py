@@ -0,0 +1,113 @@
+"""
+Leaderboard around the current user, with rank movement and season trend
+"""
+import streamlit as st
+import database as db
+import frame_cache
+from views import LEADERBOARD_TOP_N, LEADERBOARD_RADIUS
+
+
+def build_leaderboard_view(user_id):
+    """Query and frame the leaderboard rows shown to one user"""
+    import pandas as pd
+    
+    top = db.get_leaderboard_top(LEADERBOARD_TOP_N)
+    if not top:
+        return None
+    
+    # Top of the table plus the rows around the current user, never the full table
+    rows = {entry['id']: entry for entry in top}
+    user_rank = db.get_user_rank(user_id)
+    if user_rank and user_rank['position'] > LEADERBOARD_TOP_N:
+        for entry in db.get_leaderboard_window(user_id, LEADERBOARD_RADIUS):
+            rows[entry['id']] = entry
+    
+    df = pd.DataFrame(sorted(rows.values(), key=lambda entry: entry['position']))
+    
+    # Highlight current user
+    df['is_current_user'] = df['id'] == user_id
+    
+    # Movement since the previous race
+    rank_changes = db.get_rank_changes()
+    
+    def movement(entry_id):
+        change = rank_changes.get(entry_id, {}).get('change')
+        if change is None:
+            return ''
+        if change > 0:
+            return f"▲ {change}"
+        if change < 0:
+            return f"▼ {-change}"
+        return "–"
+    
+    df['movement'] = df['id'].apply(movement)
+    
+    return {
+        'table': df,
+        'entrants': top[0]['entrants'],
+        'user_rank': user_rank,
+        'history': pd.DataFrame(db.get_user_standings_history(user_id)),
+    }
+
+
+def show_leaderboard_page():
+    """Display full leaderboard"""
+    st.header("🏆 Leaderboard")
+    
+    user_id = st.session_state.user['id']
+    view = frame_cache.cached_frame(
+        'leaderboard', (user_id,), ('users', 'picks', 'results'), db.get_epochs(),
+        lambda: build_leaderboard_view(user_id)
+    )
+    
+    if view:
+        df = view['table']
+        entrants = view['entrants']
+        user_rank = view['user_rank']
+        
+        # Display
+        st.dataframe(
+            df[['rank', 'movement', 'username', 'total_points', 'picks_made']],
+            column_config={
+                'rank': 'Rank',
+                'movement': 'Move',
+                'username': 'Username',
+                'total_points': st.column_config.NumberColumn('Total Points', format="%d"),
+                'picks_made': st.column_config.NumberColumn('Picks Made', format="%d")
+            },
+            hide_index=True,
+            width='stretch'
+        )
+        
+        if len(df) < entrants:
+            st.caption(f"Showing the top {LEADERBOARD_TOP_N} and the entries around you out of {entrants}")
+        
+        # User's position
+        if user_rank:
+            st.info(f"Your current position: **#{user_rank['rank']}** out of {entrants}")
+        
+        # Standings trend across completed races
+        history_df = view['history']
+        if len(history_df) > 1:
+            import altair as alt
+            
+            st.subheader("📈 Your Season Trend")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.altair_chart(
+                    alt.Chart(history_df).mark_line(point=True).encode(
+                        x=alt.X('race_number:O', title='Race'),
+                        y=alt.Y('rank:Q', title='Rank', scale=alt.Scale(reverse=True))
+                    ),
+                    width='stretch'
+                )
+            with col2:
+                st.altair_chart(
+                    alt.Chart(history_df).mark_line(point=True).encode(
+                        x=alt.X('race_number:O', title='Race'),
+                        y=alt.Y('total_points:Q', title='Total Points')
+                    ),
+                    width='stretch'
+                )
+    else:
+        st.info("No standings yet")
@@ -0,0 +1,59 @@
+"""
+Login and sign-up page
+"""
+import streamlit as st
+import database as db
+
+
+def show_login_page():
+    """Display login/signup page"""
+    st.title("🏁 NASCAR 36 for 36 Contest")
+    st.markdown("### One and Done - Pick 36 Different Drivers for 36 Races")
+    
+    tab1, tab2 = st.tabs(["Login", "Sign Up"])
+    
+    with tab1:
+        st.subheader("Login")
+        with st.form("login_form"):
+            username = st.text_input("Username")
+            password = st.text_input("Password", type="password")
+            submit = st.form_submit_button("Login")
+            
+            if submit:
+                if username and password:
+                    user = db.verify_user(username, password)
+                    if user:
+                        st.session_state.user = user
+                        
+                        # Create persistent session
+                        session_token = db.create_session(user['id'])
+                        st.session_state.cookies['session_token'] = session_token
+                        st.session_state.cookies.save()
+                        
+                        st.rerun()
+                    else:
+                        st.error("Invalid username or password")
+                else:
+                    st.warning("Please enter both username and password")
+    
+    with tab2:
+        st.subheader("Create Account")
+        with st.form("signup_form"):
+            new_username = st.text_input("Username", key="signup_username")
+            new_email = st.text_input("Email", key="signup_email")
+            new_password = st.text_input("Password", type="password", key="signup_password")
+            new_password_confirm = st.text_input("Confirm Password", type="password")
+            signup = st.form_submit_button("Sign Up")
+            
+            if signup:
+                if not all([new_username, new_email, new_password, new_password_confirm]):
+                    st.warning("Please fill in all fields")
+                elif new_password != new_password_confirm:
+                    st.error("Passwords do not match")
+                elif len(new_password) < 6:
+                    st.error("Password must be at least 6 characters")
+                else:
+                    if db.create_user(new_username, new_password, new_email):
+                        st.success("Account created! Please login.")
+                    else:
+                        st.error("Username or email already exists")
@@ -0,0 +1,54 @@
+"""
+The current user's pick history
+"""
+import streamlit as st
+import database as db
+import frame_cache
+
+
+def build_my_picks_view(user_id):
+    """Query and frame a user's pick history"""
+    import pandas as pd
+    
+    picks = db.get_user_picks(user_id)
+    if not picks:
+        return None
+    
+    df = pd.DataFrame(picks)
+    df['status'] = df['is_completed'].apply(lambda x: '✅ Complete' if x else '⏳ Pending')
+    
+    display_df = df[['race_number', 'race_name', 'race_date', 'driver_name', 'points', 'status']]
+    display_df.columns = ['Race #', 'Race Name', 'Date', 'Driver', 'Points', 'Status']
+    
+    completed_picks = df[df['is_completed'] == 1].shape[0]
+    return {
+        'table': display_df,
+        'total_points': int(df['points'].sum()),
+        'completed': completed_picks,
+        'pending': len(picks) - completed_picks,
+    }
+
+
+def show_my_picks_page():
+    """Display user's pick history"""
+    st.header("📋 My Picks")
+    
+    user_id = st.session_state.user['id']
+    view = frame_cache.cached_frame(
+        'my_picks', (user_id,), ('picks', 'races', 'results'), db.get_epochs(),
+        lambda: build_my_picks_view(user_id)
+    )
+    
+    if view:
+        st.dataframe(view['table'], hide_index=True, width='stretch')
+        
+        # Summary
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Points", view['total_points'])
+        with col2:
+            st.metric("Completed Races", view['completed'])
+        with col3:
+            st.metric("Pending Picks", view['pending'])
+    else:
+        st.info("You haven't made any picks yet!")
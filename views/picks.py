@@ -0,0 +1,194 @@
+"""
+Make or change the pick for the next race
+"""
+import streamlit as st
+import database as db
+import driver_masks
+import pick_pipeline
+from views import ALL_DRIVERS
+
+# How long a submit waits for its pick to be written before showing it as pending
+PICK_WAIT_SECONDS = 3.0
+
+
+def show_picks_page():
+    """Display picks interface"""
+    st.header("🏎️ Make Your Picks")
+    
+    # Get next race
+    next_race = db.get_next_race()
+    
+    if not next_race:
+        st.warning("No upcoming races available for picks")
+        return
+    
+    st.subheader(f"Race {next_race['race_number']}: {next_race['race_name']}")
+    st.markdown(f"**Track:** {next_race['track']}")
+    st.markdown(f"**Date:** {next_race['race_date']}")
+    
+    # Auto-assign picks on race day for users who haven't picked
+    from datetime import datetime, date
+    try:
+        race_date = datetime.strptime(next_race['race_date'], '%Y-%m-%d').date()
+        today = date.today()
+        
+        # If it's race day or later, auto-assign picks for users who haven't picked
+        if today >= race_date:
+            # Only run once per session to avoid repeated assignments
+            session_key = f"auto_assigned_race_{next_race['id']}"
+            if session_key not in st.session_state:
+                assigned_count, errors = db.auto_assign_picks(next_race['id'], ALL_DRIVERS)
+                
+                if assigned_count > 0:
+                    st.info(f"🎲 Auto-assigned {assigned_count} random pick(s) to users who didn't pick before race day")
+                
+                if errors:
+                    with st.expander("⚠️ Auto-assignment issues"):
+                        for error in errors:
+                            st.warning(error)
+                
+                st.session_state[session_key] = True
+    except Exception as e:
+        pass  # Silently handle date parsing errors
+    
+    # Get used drivers, as a bitmask by driver id
+    used_mask = db.get_used_driver_mask(st.session_state.user['id'])
+    used_drivers = db.driver_names_for(used_mask)
+    
+    if used_drivers:
+        st.warning(f"⚠️ You have already used {driver_masks.count(used_mask)} drivers. You cannot pick them again!")
+        with st.expander("View Used Drivers"):
+            st.write(", ".join(sorted(used_drivers)))
+    
+    # Check if user already made a pick
+    existing_pick = db.get_user_pick_for_race(st.session_state.user['id'], next_race['id'])
+    
+    if existing_pick:
+        st.success(f"✅ Current pick: **{existing_pick['driver_name']}**")
+        st.info("You can change your pick until race day")
+    
+    # Driver selection
+    st.divider()
+    st.subheader("Select Your Driver")
+    
+    # Filter out used drivers; a driver with no id has never been picked by anyone
+    driver_ids = db.get_driver_ids()
+    available_drivers = [d for d in ALL_DRIVERS if not driver_masks.has(used_mask, driver_ids.get(d))]
+    available_drivers.sort()
+    
+    pick_form(next_race, available_drivers, existing_pick)
+    if 'pending_pick' in st.session_state:
+        pending_pick_status()
+    elif 'pick_result' in st.session_state:
+        show_pick_result()
+
+    # Track history for the drivers still available
+    with st.expander(f"📈 Driver History at {next_race['track']}"):
+        track_index = db.get_track_index(next_race['track'])
+        history = [dict(track_index[d], driver_name=d) for d in available_drivers if d in track_index]
+        if history:
+            import pandas as pd
+            
+            history_df = pd.DataFrame(history).sort_values('recency_score', ascending=False)
+            history_df = history_df[['driver_name', 'starts', 'avg_points', 'best_finish', 'recency_score', 'last_race_date']]
+            history_df.columns = ['Driver', 'Starts', 'Avg Points', 'Best Finish', 'Recent Form', 'Last Race']
+            st.dataframe(history_df.round(1), hide_index=True, width='stretch')
+            st.caption("Recent Form weights each earlier start at this track less than the one after it")
+        else:
+            st.info("No results at this track yet for your available drivers")
+    
+    # Season planner
+    st.divider()
+    season_planner()
+
+
+@st.fragment
+def pick_form(next_race, available_drivers, existing_pick):
+    """Driver selection and submit; changing the selection reruns only this fragment"""
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        if available_drivers:
+            selected_driver = st.selectbox(
+                "Choose a driver",
+                [""] + available_drivers,
+                index=0 if not existing_pick else (available_drivers.index(existing_pick['driver_name']) + 1 if existing_pick['driver_name'] in available_drivers else 0)
+            )
+        else:
+            st.error("You have used all available drivers!")
+            selected_driver = None
+    
+    with col2:
+        st.metric("Available", len(available_drivers))
+
+    # Submit pick through the queue; the lock is checked against the time it was submitted
+    if selected_driver:
+        if st.button("🏁 Submit Pick", type="primary", width='stretch'):
+            st.session_state.pop('pick_result', None)
+            ticket = pick_pipeline.submit(st.session_state.user['id'], next_race['id'], selected_driver)
+            result = pick_pipeline.wait(ticket, PICK_WAIT_SECONDS)
+            if result is None:
+                st.session_state.pending_pick = (ticket, selected_driver)
+            else:
+                st.session_state.pick_result = (result, True)
+            # Rerun the page so it shows the new pick and the result, or the
+            # pending status poller (a separate fragment)
+            st.rerun()
+
+
+def show_pick_result():
+    """The last submitted pick's result, kept until dismissed or another pick is submitted"""
+    (success, message), new = st.session_state.pick_result
+    if success:
+        st.success(message)
+        if new:
+            st.balloons()
+    else:
+        st.error(message)
+    st.session_state.pick_result = ((success, message), False)
+    if st.button("Dismiss", key="dismiss_pick_result"):
+        del st.session_state.pick_result
+        st.rerun()
+
+
+@st.fragment(run_every=1.0)
+def pending_pick_status():
+    """Poll a pick still waiting in the queue once a second until it is written"""
+    if 'pending_pick' not in st.session_state:
+        return
+    ticket, driver_name = st.session_state.pending_pick
+    result = pick_pipeline.result(ticket)
+    if result is None:
+        submitted_at = pick_pipeline.submitted_at(ticket)
+        st.info(f"⏳ Saving your pick of **{driver_name}** "
+                f"(submitted {submitted_at.strftime('%I:%M:%S %p')}, so it counts even if saving takes a while)")
+        return
+    # Keep the result once the poller is gone, and rerun the page to show it
+    del st.session_state.pending_pick
+    st.session_state.pick_result = (result, True)
+    st.rerun()
+
+
+@st.fragment
+def season_planner():
+    """Optimal season plan behind a toggle; toggling reruns only this fragment"""
+    with st.expander("🧠 Season Planner"):
+        st.caption("Best assignment of your remaining drivers to the remaining races, based on historical results at each track")
+        if st.toggle("Show my optimal season plan"):
+            import planner
+            season_plan = planner.plan_season(st.session_state.user['id'], ALL_DRIVERS)
+            
+            if season_plan['recommended']:
+                recommended = season_plan['recommended']
+                st.success(f"💡 Recommended pick: **{recommended['driver_name']}** ({recommended['expected_points']:.1f} expected pts)")
+            
+            if season_plan['plan']:
+                import pandas as pd
+                
+                plan_df = pd.DataFrame(season_plan['plan'])
+                plan_df = plan_df[['race_number', 'race_name', 'track', 'driver_name', 'expected_points']]
+                plan_df.columns = ['Race #', 'Race Name', 'Track', 'Driver', 'Expected Points']
+                st.dataframe(plan_df.round(1), hide_index=True, width='stretch')
+                st.metric("Projected Season Points", f"{season_plan['expected_total']:.0f}")
+            else:
+                st.info("Nothing left to plan")
@@ -0,0 +1,192 @@
+"""
+Write-behind queue for non-critical writes
+
+Chat posts don't need to commit inside the user's rerun. They are queued in
+memory here and a flusher thread writes them in batches, one multi-row
+INSERT per kind, every FLUSH_INTERVAL seconds or as soon as BATCH_SIZE rows
+are waiting.
+
+Each kind of write registers a batch writer with register(kind, write); the
+writer gets a cursor and the queued rows and runs in the flusher's
+transaction. Readers that must see their own writes look at pending(kind)
+until the rows are flushed.
+
+Durability: the queue is flushed at interpreter exit, so a clean shutdown
+loses nothing and a crash loses at most FLUSH_INTERVAL seconds of writes.
+Set WRITE_BEHIND_INTERVAL=0 to write through synchronously instead.
+
+Backpressure: when MAX_PENDING rows are queued, submit() waits up to
+BLOCK_SECONDS for the flusher and then writes the row itself, so writes are
+never dropped.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+FLUSH_INTERVAL = float(os.environ.get('WRITE_BEHIND_INTERVAL', 0.5))
+BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH', 200))
+MAX_PENDING = int(os.environ.get('WRITE_BEHIND_MAX_PENDING', 5000))
+BLOCK_SECONDS = 2.0
+
+# kind -> batch writer(cursor, rows)
+_writers: Dict[str, Callable] = {}
+
+_queue = deque()  # (kind, row) in submit order
+_in_flight: List[tuple] = []  # the batch being written, still visible to pending()
+_cond = threading.Condition()
+_flush_lock = threading.Lock()  # one flush at a time
+_flusher = None
+
+_stats = {
+    'submitted': 0,
+    'flushed': 0,        # rows taken off the queue by a flush
+    'batches': 0,        # flushes that wrote anything
+    'blocked': 0,        # submits that waited on a full queue
+    'write_through': 0,  # rows written by the caller (sync mode or queue still full)
+    'dropped': 0,        # rows that failed even when written one by one
+    'errors': 0,
+    'max_depth': 0,
+    'last_flush_ms': 0.0,
+    'max_flush_ms': 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount=1, combine=lambda current, amount: current + amount):
+    with _stats_lock:
+        _stats[name] = combine(_stats[name], amount)
+
+
+def register(kind: str, write: Callable):
+    """Register the batch writer for a kind of row"""
+    _writers[kind] = write
+
+
+def _write(batch: List[tuple]):
+    """Write (kind, row) pairs in one transaction, one writer call per kind"""
+    import database as db
+
+    by_kind: Dict[str, list] = {}
+    for kind, row in batch:
+        by_kind.setdefault(kind, []).append(row)
+
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        for kind, rows in by_kind.items():
+            _writers[kind](cursor, rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _write_batch(batch: List[tuple]):
+    """Write a batch; if it fails, retry row by row so one bad row can't block the rest"""
+    try:
+        _write(batch)
+        return
+    except Exception as e:
+        _count('errors')
+        print(f"Error flushing {len(batch)} queued writes, retrying one by one: {e}")
+
+    for item in batch:
+        try:
+            _write([item])
+        except Exception as e:
+            _count('dropped')
+            print(f"Error writing queued {item[0]} row: {e}")
+
+
+def flush() -> int:
+    """Write everything queued so far. Returns the number of rows written."""
+    written = 0
+    with _flush_lock:
+        while True:
+            with _cond:
+                batch = [_queue.popleft() for _ in range(min(BATCH_SIZE, len(_queue)))]
+                _in_flight[:] = batch
+                _cond.notify_all()  # wake submitters waiting on a full queue
+            if not batch:
+                return written
+
+            start = time.perf_counter()
+            try:
+                _write_batch(batch)
+            finally:
+                with _cond:
+                    _in_flight.clear()
+            elapsed = (time.perf_counter() - start) * 1000
+            written += len(batch)
+            _count('flushed', len(batch))
+            _count('batches')
+            _count('last_flush_ms', elapsed, lambda current, new: new)
+            _count('max_flush_ms', elapsed, max)
+
+
+def _run():
+    while True:
+        with _cond:
+            _cond.wait_for(lambda: len(_queue) >= BATCH_SIZE, timeout=FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception as e:
+            _count('errors')
+            print(f"Error in write-behind flusher: {e}")
+
+
+def _start():
+    global _flusher
+    _flusher = threading.Thread(target=_run, name="write-behind", daemon=True)
+    _flusher.start()
+    atexit.register(flush)
+
+
+def submit(kind: str, row: tuple):
+    """Queue a row for the kind's batch writer; returns without waiting for the commit"""
+    if kind not in _writers:
+        raise KeyError(f"No write-behind writer registered for {kind!r}")
+    _count('submitted')
+
+    if FLUSH_INTERVAL <= 0:
+        _count('write_through')
+        _write_batch([(kind, row)])
+        return
+
+    with _cond:
+        if _flusher is None:
+            _start()
+        room = len(_queue) < MAX_PENDING
+        if not room:
+            _count('blocked')
+            _cond.notify_all()
+            room = _cond.wait_for(lambda: len(_queue) < MAX_PENDING, timeout=BLOCK_SECONDS)
+        if room:
+            _queue.append((kind, row))
+            _count('max_depth', len(_queue), max)
+            if len(_queue) >= BATCH_SIZE:
+                _cond.notify_all()
+            return
+
+    # The flusher can't keep up (e.g. the database is down); write in the caller
+    _count('write_through')
+    _write_batch([(kind, row)])
+
+
+def pending(kind: str) -> List[tuple]:
+    """Rows of this kind queued or being written, oldest first.
+
+    A row can briefly show up here and in the database at once, right after
+    its batch commits.
+    """
+    with _cond:
+        return [row for queued_kind, row in _in_flight + list(_queue) if queued_kind == kind]
+
+
+def stats() -> Dict:
+    """Queue depth and flush counters and latency for this process"""
+    with _stats_lock:
+        counters = dict(_stats)
+    return dict(counters, depth=len(_queue))